@@ -1,62 +1,35 @@
-from fastapi import FastAPI
-from pydantic import BaseModel, validator, Field
-from sklearn.pipeline import Pipeline
-import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import Literal
+import io
+import numpy as np
 import pandas as pd
-import mlflow
+import os
+import time
 import json
-import joblib
-from mlflow import MlflowClient
-from sklearn import set_config
-
-# set the output as pandas
-set_config(transform_output='pandas')
-
-# initialize dagshub
-import dagshub
-import mlflow.client
-
-dagshub.init(repo_owner='speedyskill', repo_name='swiggy-delivery-time-prediction', mlflow=True)
-
-# set the mlflow tracking server
-mlflow.set_tracking_uri("https://dagshub.com/speedyskill/swiggy-delivery-time-prediction.mlflow")
-
-
-class Data(BaseModel):  
-    ID: str
-    Delivery_person_ID: str
-    Delivery_person_Age: str
-    Delivery_person_Ratings: str
-    Restaurant_latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
-    Restaurant_longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
-    Delivery_location_latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
-    Delivery_location_longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
-    Order_Date: str
-    Time_Orderd: str
-    Time_Order_picked: str
-    Weatherconditions: str
-    Road_traffic_density: str
-    Vehicle_condition: int
-    Type_of_order: str
-    Type_of_vehicle: str
-    multiple_deliveries: str
-    Festival: str
-    City: str
-
-    @validator('Restaurant_latitude', 'Delivery_location_latitude')
-    def validate_latitude(cls, v):
-        if not (8.0 <= v <= 37.0):
-            raise ValueError(f"Latitude must be between 8.0 and 37.0 for India (got {v})")
-        return v
-
-    @validator('Restaurant_longitude', 'Delivery_location_longitude')
-    def validate_longitude(cls, v):
-        if not (68.0 <= v <= 97.0):
-            raise ValueError(f"Longitude must be between 68.0 and 97.0 for India (got {v})")
-        return v
+import msgspec
+from src.models.registry import get_registry
+from src.serving.model_watcher import (
+    ModelWatcher, RegistrySource, BundleDirectorySource, load_warmup_payloads
+)
+from src.serving.onnx_backend import OnnxFileSource
+from src.serving.shadow import ShadowScorer
+from src.serving.drift_monitor import DriftMonitor
+from src.serving.shard_router import ShardRouter
+from src.serving.admission import AdmissionController, DeadlineExceeded, Overloaded
+from src.serving.tiers import FULL_TIER, TierSelector
+from src.serving.schema import Data, EtaMatrixRequest, RiderRankingRequest, WhatIfRequest
+from src.serving.order_variants import clean_order, eta_matrix, rider_etas, what_if_grid
+from src.serving.fast_decode import DuplexStreamingResponse, LineTooLong, RequestDecoder, iter_lines, to_frame
+from src.features.rider_store import RiderFeatureStore
+from src.serving.tracing import RequestTracer
+from src.serving.warmup import coverage_payloads
+
 
-    
-    
 def load_model_information(file_path):
     with open(file_path) as f:
         run_info = json.load(f)
@@ -64,11 +37,6 @@ def load_model_information(file_path):
     return run_info
 
 
-def load_transformer(transformer_path):
-    transformer = joblib.load(transformer_path)
-    return transformer
-
-
 from scripts.data_clean_utils import (
     change_column_names, data_cleaning, clean_lat_long,
     calculate_haversine_distance, create_distance_type, drop_columns, columns_to_drop
@@ -108,45 +76,382 @@ nominal_cat_cols = ['weather',
 
 ordinal_cat_cols = ["traffic","distance_type"]
 
-#mlflow client
-client = MlflowClient()
-
 # load the model info to get the model name
 model_name = load_model_information("run_information.json")['model_name']
 
 # stage of the model
 stage = "Production"
 
-# get the latest model version
-latest_model_ver = client.get_latest_versions(name=model_name,stages=[stage])[0].version
-
-# load model path
-model_path = f"models:/{model_name}/{latest_model_ver}"
-
-# load the latest model from model registry
-model = mlflow.sklearn.load_model(model_uri=model_path)
+# serve the registry stage, a directory of array bundles or the exported onnx graph
+model_source = os.environ.get("MODEL_SOURCE", "registry")
+if model_source == "bundle":
+    source = BundleDirectorySource(os.environ.get("MODEL_BUNDLE_DIR", "models"))
+elif model_source == "onnx":
+    source = OnnxFileSource(os.environ.get("MODEL_ONNX_PATH", "models/model.onnx"),
+                            intra_op_threads=int(os.environ.get("ONNX_INTRA_OP_THREADS", 0)))
+else:
+    # model registry selected by MODEL_REGISTRY_BACKEND
+    source = RegistrySource(get_registry(), model_name=model_name, stage=stage)
+
+# sample requests used to warm up a model before it is swapped in
+warmup_payloads = load_warmup_payloads(os.environ.get("WARMUP_REQUESTS_PATH", "requests.jsonl"),
+                                       required_fields=list(Data.model_fields))
+# plus one request per traffic, distance type and time of day combination
+if os.environ.get("WARMUP_COVERAGE", "1") == "1":
+    warmup_payloads += coverage_payloads(template=warmup_payloads[0] if warmup_payloads else None)
+
+# watches for new model versions and hot swaps the pipeline
+model_watcher = ModelWatcher(source=source,
+                             clean_fn=perform_data_cleaning,
+                             warmup_payloads=warmup_payloads,
+                             poll_interval=float(os.environ.get("MODEL_POLL_INTERVAL", 30)),
+                             warmup_single_rows=int(os.environ.get("WARMUP_SINGLE_ROWS", 20)),
+                             compile_preprocessor=os.environ.get("COMPILED_PREPROCESSOR", "0") == "1")
+
+
+# shadow score a challenger stage next to the served model
+shadow_scorer = None
+if os.environ.get("SHADOW_MODE", "0") == "1":
+    challenger_source = RegistrySource(get_registry(), model_name=model_name,
+                                       stage=os.environ.get("SHADOW_STAGE", "Staging"))
+    challenger_watcher = ModelWatcher(source=challenger_source,
+                                      clean_fn=perform_data_cleaning,
+                                      warmup_payloads=warmup_payloads,
+                                      poll_interval=model_watcher.poll_interval,
+                                      compile_preprocessor=model_watcher.compile_preprocessor)
+    shadow_scorer = ShadowScorer(challenger_watcher=challenger_watcher,
+                                 log_dir=os.environ.get("SHADOW_LOG_DIR", "reports/shadow"),
+                                 max_queue=int(os.environ.get("SHADOW_QUEUE_SIZE", 256)))
+
+
+# sampled request tracing into a fixed size ring buffer file
+tracer = None
+if os.environ.get("TRACING", "0") == "1":
+    latency_threshold = os.environ.get("TRACE_LATENCY_MS")
+    tracer = RequestTracer(path=os.environ.get("TRACE_PATH", "reports/traces/requests.ring"),
+                           sample_rate=float(os.environ.get("TRACE_SAMPLE_RATE", 0.01)),
+                           latency_threshold_ms=float(latency_threshold) if latency_threshold else None,
+                           n_slots=int(os.environ.get("TRACE_SLOTS", 4096)),
+                           slot_size=int(os.environ.get("TRACE_SLOT_BYTES", 4096)))
+
+
+# live feature sketches compared with the training reference
+drift_monitor = None
+drift_reference_path = os.environ.get("DRIFT_REFERENCE_PATH", "models/drift_reference.json")
+if os.environ.get("DRIFT_MONITOR", "1") == "1" and os.path.exists(drift_reference_path):
+    drift_monitor = DriftMonitor(reference_path=drift_reference_path,
+                                 snapshot_dir=os.environ.get("DRIFT_SNAPSHOT_DIR", "reports/drift"),
+                                 interval=float(os.environ.get("DRIFT_SNAPSHOT_INTERVAL", 10)),
+                                 max_pending_frames=int(os.environ.get("DRIFT_MAX_PENDING_FRAMES", 256)))
+
+
+# per rider history features, memory mapped and reloaded when the table changes
+rider_store = None
+rider_features_path = os.environ.get("RIDER_FEATURES_PATH", "models/rider_features.bundle")
+if os.path.exists(rider_features_path):
+    rider_store = RiderFeatureStore(rider_features_path,
+                                    check_interval=float(os.environ.get("RIDER_FEATURES_CHECK_INTERVAL", 30)))
+
+
+# one model per city type next to the global one, loaded on first use
+shard_router = None
+shard_manifest_path = os.environ.get("SHARD_MANIFEST_PATH", "models/shards/manifest.json")
+if os.environ.get("SHARDS", "0") == "1" and os.path.exists(shard_manifest_path):
+    shard_router = ShardRouter(shard_manifest_path,
+                               max_loaded=int(os.environ.get("SHARD_MAX_LOADED", 2)))
+
+
+# bounded queue with deadlines in front of a dedicated pool for /predict and
+# /predict/fast, and a smaller lane of its own for the batch, stream, arrow,
+# eta matrix, rider and what-if jobs, so their long service times neither
+# hold the single order workers nor skew their wait estimate
+admission = None
+bulk_admission = None
+if os.environ.get("ADMISSION_CONTROL", "1") == "1":
+    admission = AdmissionController(n_workers=int(os.environ.get("INFERENCE_WORKERS", 0)) or None,
+                                    max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", 64)))
+    bulk_admission = AdmissionController(n_workers=int(os.environ.get("BULK_WORKERS", 1)),
+                                         max_queue=int(os.environ.get("BULK_MAX_QUEUE", 8)),
+                                         service_ms=1000.0)
+# time budget of a request without an X-Deadline-Ms header, bulk jobs get longer
+default_deadline_ms = float(os.environ.get("DEFAULT_DEADLINE_MS", 2000))
+bulk_deadline_ms = float(os.environ.get("BULK_DEADLINE_MS", 30000))
+
+# faster, less accurate model tiers for tight deadlines and a full queue
+tier_selector = None
+tier_manifest_path = os.environ.get("TIER_MANIFEST_PATH", "models/tiers/manifest.json")
+if os.environ.get("DEGRADED_TIERS", "0") == "1" and os.path.exists(tier_manifest_path):
+    tier_selector = TierSelector(tier_manifest_path,
+                                 saturated_queue=int(os.environ.get("TIER_SATURATED_QUEUE", 16)),
+                                 safety=float(os.environ.get("TIER_SAFETY", 1.5)))
+
+
+# msgspec decoding of the /predict/fast, /predict/batch and /predict/stream bodies
+request_decoder = RequestDecoder(Data)
+# largest batch body, in orders and in bytes, and orders scored together on a stream
+batch_max_rows = int(os.environ.get("PREDICT_BATCH_MAX_ROWS", 10000))
+# an order is about 600 bytes of JSON
+batch_max_bytes = int(os.environ.get("PREDICT_BATCH_MAX_BYTES", batch_max_rows * 1024))
+stream_chunk_rows = int(os.environ.get("PREDICT_STREAM_CHUNK_ROWS", 256))
+stream_max_line_bytes = int(os.environ.get("PREDICT_STREAM_MAX_LINE_BYTES", 64 * 1024))
+# largest single order body of /predict/fast
+order_max_bytes = int(os.environ.get("PREDICT_ORDER_MAX_BYTES", 64 * 1024))
+# largest arrow table, bulk jobs send more rows than a JSON batch
+arrow_max_rows = int(os.environ.get("PREDICT_ARROW_MAX_ROWS", 1_000_000))
+# largest arrow ipc body, refused before pyarrow reads any of it
+arrow_max_bytes = int(os.environ.get("PREDICT_ARROW_MAX_BYTES", arrow_max_rows * 512))
+# largest eta matrix, in restaurant and delivery point pairs, and rows per model call
+eta_matrix_max_cells = int(os.environ.get("ETA_MATRIX_MAX_CELLS", 4_000_000))
+eta_matrix_chunk_rows = int(os.environ.get("ETA_MATRIX_CHUNK_ROWS", 8192))
+# most candidate riders ranked for one order
+rider_ranking_max_candidates = int(os.environ.get("RIDER_RANKING_MAX_CANDIDATES", 1000))
+# most points of a what-if surface
+what_if_max_points = int(os.environ.get("WHAT_IF_MAX_POINTS", 100_000))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # sklearn is imported with the first model, not with the api
+    from sklearn import set_config
+
+    # set the output as pandas
+    set_config(transform_output='pandas')
+
+    # load and warm up the current model in the background, /ready reports
+    # when it is done, and keep polling for new versions
+    model_watcher.start(wait=False)
+    if tier_selector is not None:
+        tier_selector.load()
+        # a request the fastest tier can still answer in time is not refused
+        if admission is not None:
+            admission.fastest_answer_ms = tier_selector.fastest_ms
+    if shadow_scorer is not None:
+        shadow_scorer.start()
+    if drift_monitor is not None:
+        drift_monitor.start()
+    yield
+    if drift_monitor is not None:
+        drift_monitor.stop()
+    if shadow_scorer is not None:
+        shadow_scorer.stop()
+    if tracer is not None:
+        tracer.close()
+    if admission is not None:
+        admission.shutdown()
+        bulk_admission.shutdown()
+    model_watcher.stop()
 
-# load the preprocessor
-preprocessor_path = "models/preprocessor.joblib"
-preprocessor = load_transformer(preprocessor_path)
-
-# build the model pipeline
-model_pipe = Pipeline(steps=[
-    ('preprocess',preprocessor),
-    ("regressor",model)
-])
 
 # create the app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # create the home endpoint
 @app.get(path="/")
 def home():
     return "Welcome to the Swiggy Food Delivery Time Prediction App"
 
+# readiness, only once a warmed up model is loaded
+@app.get(path="/ready")
+def ready():
+    loaded_model = model_watcher.current
+    if not model_watcher.ready.is_set() or loaded_model is None:
+        return JSONResponse(status_code=503, content={"ready": False})
+    return {"ready": True,
+            "version": loaded_model.version,
+            "warmup_seconds": loaded_model.warmup_seconds}
+
+# currently served model
+@app.get(path="/admin/model")
+def model_info():
+    loaded_model = model_watcher.current
+    if loaded_model is None:
+        return {"model_name": model_name, "version": None}
+    return {
+        "model_name": model_name,
+        "version": loaded_model.version,
+        "source": loaded_model.source,
+        "loaded_at": loaded_model.loaded_at,
+        "warmup_seconds": loaded_model.warmup_seconds
+    }
+
+# shadow scoring counters
+@app.get(path="/admin/shadow")
+def shadow_info():
+    if shadow_scorer is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow_scorer.stats()}
+
+# drift of the served features against the training data
+@app.get(path="/drift")
+def drift(psi_threshold: float = 0.2):
+    if drift_monitor is None:
+        return JSONResponse(status_code=503, content={"detail": "No drift reference profile"})
+    return drift_monitor.report(psi_threshold=psi_threshold)
+
+# shard routing counters, load times and memory
+@app.get(path="/admin/shards")
+def shards_info():
+    if shard_router is None:
+        return {"enabled": False}
+    return {"enabled": True, **shard_router.stats()}
+
+# inference queue depth, shed and expired requests and queue waits
+@app.get(path="/admin/admission")
+def admission_info():
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, "default_deadline_ms": default_deadline_ms, **admission.stats(),
+            "bulk": {"default_deadline_ms": bulk_deadline_ms, **bulk_admission.stats()}}
+
+# requests per model tier and their live and offline latency and accuracy
+@app.get(path="/admin/tiers")
+def tiers_info():
+    if tier_selector is None:
+        return {"enabled": False}
+    return {"enabled": True, **tier_selector.stats()}
+
+# history features of one rider, the default row for riders never seen
+@app.get(path="/riders/{rider_id}/features")
+def rider_features(rider_id: str):
+    if rider_store is None:
+        return JSONResponse(status_code=503, content={"detail": "No rider feature table"})
+    return rider_store.lookup_dict(rider_id)
+
+def current_model():
+    # pin the model for this request so a reload does not affect it
+    loaded_model = model_watcher.current
+    if loaded_model is None:
+        raise HTTPException(status_code=503, detail="Model is not loaded yet",
+                            headers={"Retry-After": "5"})
+    return loaded_model
+
+
+def request_deadline(request: Request, default_ms: float = None) -> float:
+    # monotonic time the caller stops waiting, from its remaining budget in ms
+    budget_ms = request.headers.get("x-deadline-ms")
+    try:
+        budget_ms = float(budget_ms) if budget_ms is not None else (default_ms or default_deadline_ms)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="X-Deadline-Ms must be a number of milliseconds")
+    return time.monotonic() + budget_ms / 1000
+
+
+async def run_admitted(fn, *args, deadline: float, bulk: bool = False):
+    # score on the inference pool, or the bulk lane, refused at once when it
+    # cannot make the deadline
+    if admission is None:
+        return await run_in_threadpool(fn, *args)
+    try:
+        return await (bulk_admission if bulk else admission).run(fn, *args, deadline=deadline)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=f"Overloaded, {e.reason.replace('_', ' ')}",
+                            headers={"Retry-After": str(e.retry_after)})
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="The deadline passed before the request was scored")
+
+
+def model_predict(loaded_model, cleaned_data: pd.DataFrame):
+    # the shard of each row when sharding is on, the served model otherwise
+    if shard_router is not None:
+        return shard_router.predict(cleaned_data, fallback=loaded_model.pipeline)
+    return loaded_model.pipeline.predict(cleaned_data)
+
+
+def predict_order(pred_data: pd.DataFrame, payload, request_start: float, deadline: float = None) -> dict:
+    # score a one row frame, payload returns the request body for the trace
+    loaded_model = current_model()
+    # clean the raw input data
+    clean_start = time.perf_counter()
+    cleaned_data = perform_data_cleaning(pred_data)
+    # the model tier that fits what is left of the deadline
+    tier = FULL_TIER
+    if tier_selector is not None and deadline is not None:
+        tier = tier_selector.choose(remaining_ms=(deadline - time.monotonic()) * 1000,
+                                    queue_depth=admission.queue_depth if admission is not None else 0)
+    # get the predictions
+    start = time.perf_counter()
+    if tier == FULL_TIER:
+        predictions = model_predict(loaded_model, cleaned_data)[0]
+    else:
+        predictions = tier_selector.pipeline(tier).predict(cleaned_data)[0]
+    predict_ms = (time.perf_counter() - start) * 1000
+    if tier_selector is not None:
+        tier_selector.observe(tier, predict_ms, total_ms=(time.perf_counter() - clean_start) * 1000)
+
+    # queue the features for the drift sketches, the update happens off the request
+    if drift_monitor is not None:
+        drift_monitor.observe(cleaned_data)
+
+    # keep a trace of sampled and slow requests
+    if tracer is not None:
+        total_ms = (time.perf_counter() - request_start) * 1000
+        reason = tracer.reason(total_ms)
+        if reason is not None:
+            tracer.record(reason, payload=payload(), cleaned_data=cleaned_data,
+                          timings_ms={"frame": (clean_start - request_start) * 1000,
+                                      "clean": (start - clean_start) * 1000,
+                                      "predict": predict_ms,
+                                      "total": total_ms},
+                          model_version=loaded_model.version, prediction=float(predictions))
+
+    # hand the cleaned features to the challenger, never blocks, only the
+    # full model is compared with it
+    if shadow_scorer is not None and tier == FULL_TIER:
+        shadow_scorer.submit(cleaned_data, float(predictions), predict_ms, loaded_model.version)
+
+    result = {
+    "prediction": round(predictions, 2),
+    "distance": round(float(cleaned_data["distance"].iloc[0]), 2)
+    }
+    # which tier answered when degraded answers are possible
+    if tier_selector is not None:
+        result["tier"] = tier
+    return result
+
+
+def score_orders(pred_data: pd.DataFrame) -> tuple:
+    # predictions and distances in the order of the rows, NaN for the rows
+    # the cleaning drops (minor riders, six star ratings)
+    loaded_model = current_model()
+    cleaned_data = perform_data_cleaning(pred_data)
+    predictions = np.full(len(pred_data), np.nan)
+    distances = np.full(len(pred_data), np.nan)
+    if len(cleaned_data) == 0:
+        return predictions, distances
+    # the cleaning keeps the row index
+    rows = cleaned_data.index.to_numpy()
+    predictions[rows] = model_predict(loaded_model, cleaned_data)
+    distances[rows] = cleaned_data["distance"].to_numpy()
+    if drift_monitor is not None:
+        drift_monitor.observe(cleaned_data)
+    return predictions.round(2), distances.round(2)
+
+
+def predict_orders(pred_data: pd.DataFrame) -> list:
+    # score many orders at once, one result per row in the order of the rows
+    predictions, distances = score_orders(pred_data)
+    return [{"ID": order_id,
+             "prediction": None if np.isnan(prediction) else float(prediction),
+             "distance": None if np.isnan(distance) else float(distance)}
+            for order_id, prediction, distance in zip(pred_data["ID"], predictions, distances)]
+
+
+def predict_table(body: bytes) -> bytes:
+    # pyarrow is only imported by the first arrow request, not at start up
+    from src.serving.arrow_batch import read_table, validate_table, table_to_frame, write_predictions
+
+    # arrow in and out, the orders stay in columns from the stream to the model
+    table = read_table(body)
+    if table.num_rows > arrow_max_rows:
+        raise HTTPException(status_code=413, detail=f"At most {arrow_max_rows} orders per table")
+    return write_predictions(*score_orders(table_to_frame(validate_table(table))))
+
+
 # create the predict endpoint
 @app.post(path="/predict")
-def do_predictions(data: Data):
+async def do_predictions(data: Data, request: Request):
+    request_start = time.perf_counter()
+    deadline = request_deadline(request)
     pred_data = pd.DataFrame({
         'ID': data.ID,
         'Delivery_person_ID': data.Delivery_person_ID,
@@ -170,18 +475,211 @@ def do_predictions(data: Data):
         },index=[0]
     )
 
-    
-    # clean the raw input data
-    cleaned_data = perform_data_cleaning(pred_data)
-    # get the predictions
-    predictions = model_pipe.predict(cleaned_data)[0]
-
-    return {
-    "prediction": round(predictions, 2),
-    "distance": round(float(cleaned_data["distance"].iloc[0]), 2)
-    }
-
+    return await run_admitted(predict_order, pred_data, data.model_dump, request_start, deadline,
+                              deadline=deadline)
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    # refuse an oversized body from its Content-Length, or as soon as the
+    # chunks read go over the limit, before any of it is decoded
+    content_length = request.headers.get("content-length")
+    try:
+        content_length = int(content_length) if content_length is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Content-Length must be a number of bytes")
+    if content_length is not None and content_length > max_bytes:
+        raise HTTPException(status_code=413, detail=f"At most {max_bytes} bytes per body")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"At most {max_bytes} bytes per body")
+    return bytes(body)
+
+# the same prediction with the body decoded by msgspec instead of pydantic
+@app.post(path="/predict/fast")
+async def do_fast_predictions(request: Request):
+    request_start = time.perf_counter()
+    deadline = request_deadline(request)
+    order = request_decoder.decode(await read_body(request, order_max_bytes))
+    return await run_admitted(predict_order, to_frame([order]),
+                              lambda: msgspec.structs.asdict(order), request_start, deadline,
+                              deadline=deadline)
+
+# a JSON array of orders, scored as one frame
+@app.post(path="/predict/batch")
+async def do_batch_predictions(request: Request):
+    orders = request_decoder.decode_batch(await read_body(request, batch_max_bytes))
+    if len(orders) > batch_max_rows:
+        raise HTTPException(status_code=413, detail=f"At most {batch_max_rows} orders per batch")
+    results = await run_admitted(predict_orders, to_frame(orders),
+                                 deadline=request_deadline(request, bulk_deadline_ms), bulk=True)
+    return Response(content=msgspec.json.encode(results), media_type="application/json")
+
+# newline delimited orders in, one result line per order out, scored in chunks
+@app.post(path="/predict/stream")
+async def do_stream_predictions(request: Request):
+    current_model()
+    # every chunk gets the budget of the request, a stream can outlast it;
+    # once the response has started a shed chunk can only end the stream
+    budget = request_deadline(request, bulk_deadline_ms) - time.monotonic()
+    if bulk_admission is not None and bulk_admission.queue_depth >= bulk_admission.max_queue:
+        raise HTTPException(status_code=503, detail="Overloaded, queue full",
+                            headers={"Retry-After": str(bulk_admission.retry_after())})
+
+    async def score(chunk: list):
+        # invalid lines keep their place in the output with their errors
+        orders = [order for _, order, _ in chunk if order is not None]
+        results = iter(await run_admitted(predict_orders, to_frame(orders),
+                                          deadline=time.monotonic() + budget, bulk=True)
+                       if orders else [])
+        lines = []
+        for line_number, order, errors in chunk:
+            result = next(results) if order is not None else {"line": line_number, "detail": errors}
+            lines.append(msgspec.json.encode(result))
+        return b"\n".join(lines) + b"\n"
+
+    def shed(chunk: list, detail: str):
+        # a chunk that was not scored, its lines carry the reason and the stream ends
+        return b"".join(msgspec.json.encode({"line": line_number, "detail": detail}) + b"\n"
+                        for line_number, _, _ in chunk)
+
+    async def results():
+        chunk, line_number = [], 0
+        try:
+            async for line in iter_lines(request.stream(), max_line_bytes=stream_max_line_bytes):
+                try:
+                    chunk.append((line_number, request_decoder.decode(line, loc=("body", line_number)), None))
+                except RequestValidationError as e:
+                    chunk.append((line_number, None, jsonable_encoder(e.errors())))
+                line_number += 1
+                if len(chunk) >= stream_chunk_rows:
+                    yield await score(chunk)
+                    chunk = []
+        except LineTooLong as e:
+            # the rest of the body is not read, the stream ends on this line
+            chunk.append((line_number, None, str(e)))
+        except HTTPException as e:
+            yield shed(chunk, e.detail)
+            return
+        if chunk:
+            try:
+                yield await score(chunk)
+            except HTTPException as e:
+                yield shed(chunk, e.detail)
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+# an arrow ipc stream with the columns of Data, answered with a record
+# batch of prediction and distance, one row per order
+@app.post(path="/predict/arrow")
+async def do_arrow_predictions(request: Request):
+    body = await read_body(request, arrow_max_bytes)
+    content = await run_admitted(predict_table, body,
+                                 deadline=request_deadline(request, bulk_deadline_ms), bulk=True)
+    # already imported by predict_table, off the event loop
+    from src.serving.arrow_batch import ARROW_MEDIA_TYPE
+    return Response(content=content, media_type=ARROW_MEDIA_TYPE)
+
+# eta of every restaurant and delivery point pair of one order context,
+# as JSON rows per restaurant or a float32 .npy matrix
+@app.post(path="/predict/eta_matrix")
+async def predict_eta_matrix(request: EtaMatrixRequest, http_request: Request,
+                             format: Literal["json", "npy"] = "json"):
+    if len(request.restaurants) * len(request.deliveries) > eta_matrix_max_cells:
+        raise HTTPException(status_code=413, detail=f"At most {eta_matrix_max_cells} pairs per matrix")
+    return await run_admitted(score_eta_matrix, request, format,
+                              deadline=request_deadline(http_request, bulk_deadline_ms), bulk=True)
+
+def score_eta_matrix(request: EtaMatrixRequest, format: str) -> Response:
+    n_restaurants, n_deliveries = len(request.restaurants), len(request.deliveries)
+    loaded_model = current_model()
+    restaurants = np.array([[location.latitude, location.longitude] for location in request.restaurants])
+    deliveries = np.array([[location.latitude, location.longitude] for location in request.deliveries])
+
+    # the order is cleaned once, with the first pair for its coordinates
+    raw = {**request.context.model_dump(),
+           "Restaurant_latitude": restaurants[0, 0], "Restaurant_longitude": restaurants[0, 1],
+           "Delivery_location_latitude": deliveries[0, 0], "Delivery_location_longitude": deliveries[0, 1]}
+    try:
+        cleaned = clean_order({name: raw[name] for name in Data.model_fields}, perform_data_cleaning)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    eta = eta_matrix(cleaned, restaurants, deliveries,
+                     predict=lambda frame: model_predict(loaded_model, frame),
+                     resolution_km=request.distance_resolution_km,
+                     chunk_rows=eta_matrix_chunk_rows)
+
+    if format == "npy":
+        buffer = io.BytesIO()
+        np.save(buffer, eta.astype(np.float32))
+        return Response(content=buffer.getvalue(), media_type="application/octet-stream")
+    return Response(content=msgspec.json.encode({"restaurants": n_restaurants,
+                                                 "deliveries": n_deliveries,
+                                                 "eta": eta.round(2).tolist()}),
+                    media_type="application/json")
+
+# candidate riders of one order ranked by their predicted time, the riders
+# the cleaning drops (under 18, rated 6 stars) are listed apart
+@app.post(path="/predict/riders")
+async def rank_riders(request: RiderRankingRequest, http_request: Request):
+    if len(request.candidates) > rider_ranking_max_candidates:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {rider_ranking_max_candidates} candidates per order")
+    return await run_admitted(score_riders, request,
+                              deadline=request_deadline(http_request, bulk_deadline_ms), bulk=True)
+
+def score_riders(request: RiderRankingRequest) -> Response:
+    loaded_model = current_model()
+    order = request.order.model_dump()
+    candidates = pd.DataFrame([candidate.model_dump() for candidate in request.candidates])
+    # the raw order in the column order of Data, the rider fields are filled per candidate
+    raw_order = {name: order.get(name) for name in Data.model_fields}
+    etas = rider_etas(raw_order, candidates, perform_data_cleaning,
+                      predict=lambda frame: model_predict(loaded_model, frame))
+
+    rider_ids = candidates["Delivery_person_ID"].to_numpy()
+    kept = np.flatnonzero(~np.isnan(etas))
+    # stable so that riders with the same eta keep the order they were sent in
+    ranked = kept[np.argsort(etas[kept], kind="stable")][:request.top_k]
+    return Response(content=msgspec.json.encode({
+        "ID": request.order.ID,
+        "riders": [{"rank": rank, "Delivery_person_ID": rider_ids[i], "prediction": round(float(etas[i]), 2)}
+                   for rank, i in enumerate(ranked, start=1)],
+        "excluded": rider_ids[np.isnan(etas)].tolist()}),
+                    media_type="application/json")
+
+# predictions of one order over the grid of pickup delays, traffic, weather
+# and order hours given, with the prediction of the order as sent
+@app.post(path="/predict/what_if")
+async def predict_what_if(request: WhatIfRequest, http_request: Request):
+    axes = request.axes()
+    if not axes:
+        raise HTTPException(status_code=422, detail="At least one axis to sweep")
+    if np.prod([len(values) for values in axes.values()]) > what_if_max_points:
+        raise HTTPException(status_code=413, detail=f"At most {what_if_max_points} points per surface")
+    return await run_admitted(score_what_if, request, axes,
+                              deadline=request_deadline(http_request, bulk_deadline_ms), bulk=True)
+
+def score_what_if(request: WhatIfRequest, axes: dict) -> Response:
+    shape = [len(values) for values in axes.values()]
+    loaded_model = current_model()
+    try:
+        cleaned = clean_order(request.order.model_dump(), perform_data_cleaning)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # the order itself goes last in the same model call as the grid
+    grid = what_if_grid(cleaned, axes)
+    predictions = np.asarray(model_predict(loaded_model, pd.concat([grid, cleaned], ignore_index=True)))
+    return Response(content=msgspec.json.encode({
+        "ID": request.order.ID,
+        "prediction": round(float(predictions[-1]), 2),
+        "axes": axes,
+        "surface": predictions[:-1].round(2).reshape(shape).tolist()}),
+                    media_type="application/json")
    
    
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app="app:app",host='0.0.0.0',port=8000)
\ No newline at end of file
@@ -4,6 +4,7 @@ import folium
 import overpy
 import requests
 import json
+import os
 from datetime import datetime
 from decimal import Decimal
 import pandas as pd
@@ -15,8 +16,8 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
-# API endpoint - configurable
-API_URL = st.sidebar.text_input("API Endpoint", "http://localhost:8000/predict")
+# API endpoint - configurable, the default can come from the container
+API_URL = st.sidebar.text_input("API Endpoint", os.environ.get("API_URL", "http://localhost:8000/predict"))
 
 # Initialize Overpass API
 overpass_api = overpy.Overpass()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import numpy as np
+import pyarrow as pa
+import requests
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from scripts.benchmark_cleaning import git_commit
+from scripts.benchmark_decoding import make_payloads
+from src.serving.arrow_batch import ARROW_MEDIA_TYPE, ORDER_SCHEMA
+
+DEFAULT_SIZES = [100, 1_000, 10_000]
+
+
+def json_round_trip(session: requests.Session, url: str, table: pa.Table) -> np.ndarray:
+    # a batch job holding arrow data has to build the JSON body row by row
+    response = session.post(f"{url}/predict/batch", data=json.dumps(table.to_pylist()),
+                            headers={"content-type": "application/json"})
+    response.raise_for_status()
+    return np.array([row["prediction"] for row in response.json()], dtype=np.float64)
+
+
+def arrow_round_trip(session: requests.Session, url: str, table: pa.Table) -> np.ndarray:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = session.post(f"{url}/predict/arrow", data=sink.getvalue().to_pybytes(),
+                            headers={"content-type": ARROW_MEDIA_TYPE})
+    response.raise_for_status()
+    predictions = pa.ipc.open_stream(response.content).read_all().column("prediction")
+    return predictions.to_numpy(zero_copy_only=False).astype(np.float64)
+
+
+def benchmark_size(n_rows: int, session: requests.Session, url: str, repeats: int, seed: int) -> dict:
+    table = pa.Table.from_pylist(make_payloads(n_rows, seed), schema=ORDER_SCHEMA)
+    paths = {"json_batch": json_round_trip, "arrow": arrow_round_trip}
+
+    # both paths score the same rows to the same predictions
+    predictions = {name: func(session, url, table) for name, func in paths.items()}
+    np.testing.assert_allclose(predictions["json_batch"], predictions["arrow"], equal_nan=True)
+
+    results = {"rows": table.num_rows}
+    for name, func in paths.items():
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func(session, url, table)
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        results[name] = {"repeats": repeats,
+                         "min_s": round(min(timings), 6),
+                         "median_s": round(median, 6),
+                         "rows_per_s": round(table.num_rows / median, 1)}
+    results["speedup"] = round(results["json_batch"]["median_s"] / results["arrow"]["median_s"], 2)
+    print(f"{table.num_rows:>7} rows  json batch {results['json_batch']['rows_per_s']:>10.0f} rows/s  "
+          f"arrow {results['arrow']['rows_per_s']:>10.0f} rows/s  x{results['speedup']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of /predict/arrow against /predict/batch")
+    parser.add_argument("--url", default="http://localhost:8000", help="running app, client and server timed together")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="orders per request, the JSON batch allows PREDICT_BATCH_MAX_ROWS")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="reports/benchmarks/arrow")
+    args = parser.parse_args()
+
+    # one connection for every request
+    session = requests.Session()
+
+    # run every size
+    results = {str(n_rows): benchmark_size(n_rows, session, args.url, args.repeats, args.seed)
+               for n_rows in args.sizes}
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "url": args.url,
+        "python": platform.python_version(),
+        "pyarrow": pa.__version__,
+        "results": results,
+    }
+
+    # one file per commit like the other benchmarks
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
@@ -0,0 +1,115 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import joblib
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from src.models.artifacts import save_artifact
+
+# every format is loaded in a fresh interpreter so the numbers are not skewed
+# by objects or pages left behind by an earlier load
+CHILD_CODE = """
+import json, sys, time
+import numpy, sklearn, lightgbm, joblib
+from src.models.artifacts import load_artifact
+
+def memory():
+    stats = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                stats["rss_mb"] = int(line.split()[1]) / 1024
+    private = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                private += int(line.split()[1])
+    stats["private_mb"] = private / 1024
+    return stats
+
+loader, path = sys.argv[1], sys.argv[2]
+before = memory()
+start = time.perf_counter()
+if loader == "joblib":
+    obj = joblib.load(path)
+elif loader == "joblib_mmap":
+    obj = joblib.load(path, mmap_mode="r")
+elif loader == "bundle_mmap":
+    obj = load_artifact(path, mmap_mode="r")
+else:
+    obj = load_artifact(path, mmap_mode=None)
+load_time = time.perf_counter() - start
+after = memory()
+print(json.dumps({"load_s": load_time,
+                  "rss_mb": after["rss_mb"] - before["rss_mb"],
+                  "private_mb": after["private_mb"] - before["private_mb"]}))
+"""
+
+# name -> (writer, loader used by the child process)
+FORMATS = {
+    "joblib": (lambda obj, path: joblib.dump(obj, path), "joblib"),
+    "joblib_mmap": (lambda obj, path: joblib.dump(obj, path), "joblib_mmap"),
+    "joblib_zlib3": (lambda obj, path: joblib.dump(obj, path, compress=3), "joblib"),
+    "bundle_mmap": (lambda obj, path: save_artifact(obj, path), "bundle_mmap"),
+    "bundle_read": (lambda obj, path: save_artifact(obj, path), "bundle_read"),
+    "bundle_gzip": (lambda obj, path: save_artifact(obj, path, compress="gzip"), "bundle_read"),
+    "bundle_lzma": (lambda obj, path: save_artifact(obj, path, compress="lzma"), "bundle_read"),
+}
+
+
+def run_child(loader: str, path: Path) -> dict:
+    result = subprocess.run([sys.executable, "-c", CHILD_CODE, loader, str(path)],
+                            cwd=root_path, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_artifact(obj, work_dir: Path, repeats: int) -> dict:
+    results = {}
+    for name, (writer, loader) in FORMATS.items():
+        path = work_dir / name
+        writer(obj, path)
+        runs = [run_child(loader, path) for _ in range(repeats)]
+        results[name] = {
+            "disk_mb": round(path.stat().st_size / (1024 * 1024), 2),
+            "load_s": round(min(run["load_s"] for run in runs), 4),
+            "rss_mb": round(min(run["rss_mb"] for run in runs), 2),
+            "private_mb": round(min(run["private_mb"] for run in runs), 2)
+        }
+    return results
+
+
+def print_matrix(artifact_name: str, results: dict) -> None:
+    print(f"\n{artifact_name}")
+    print(f"{'format':<14}{'disk MB':>10}{'load s':>10}{'rss MB':>10}{'private MB':>12}")
+    for name, row in results.items():
+        print(f"{name:<14}{row['disk_mb']:>10}{row['load_s']:>10}"
+              f"{row['rss_mb']:>10}{row['private_mb']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load time, memory and disk size of model artifact formats")
+    parser.add_argument("--artifacts", nargs="+",
+                        default=["models/model.joblib", "models/preprocessor.joblib"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="reports/artifact_benchmark.json")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for artifact in args.artifacts:
+            obj = joblib.load(root_path / artifact)
+            work_dir = Path(tmp_dir) / Path(artifact).stem
+            work_dir.mkdir()
+            report[artifact] = benchmark_artifact(obj, work_dir, args.repeats)
+            print_matrix(artifact, report[artifact])
+
+    output_path = root_path / args.output
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"\nBenchmark saved to {output_path}")
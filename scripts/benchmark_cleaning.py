@@ -0,0 +1,265 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from pathlib import Path
+from sklearn import set_config
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+import scripts.data_clean_utils as serving_cleaning
+import src.data.data_cleaning as pipeline_cleaning
+
+# the preprocessor was fitted with pandas output
+set_config(transform_output='pandas')
+
+DEFAULT_SIZES = [1, 1_000, 100_000, 10_000_000]
+
+# value pools with the formatting of the raw swiggy.csv, including its
+# trailing spaces and "NaN " markers
+CITY_CODES = ["INDO", "BANG", "COIMB", "CHEN", "HYD", "RANCHI", "MYS", "DEH", "KOC", "PUNE",
+              "LUDH", "KNP", "MUM", "KOL", "JAP", "SUR", "GOA", "AURG", "AGR", "VAD", "ALH", "BHP"]
+WEATHER = ["conditions Sunny", "conditions Stormy", "conditions Sandstorms",
+           "conditions Cloudy", "conditions Fog", "conditions Windy", "conditions NaN"]
+TRAFFIC = ["Low ", "Medium ", "High ", "Jam ", "NaN "]
+ORDER_TYPES = ["Snack ", "Meal ", "Drinks ", "Buffet "]
+VEHICLES = ["motorcycle ", "scooter ", "electric_scooter ", "bicycle "]
+FESTIVAL = ["No ", "Yes ", "NaN "]
+CITY_TYPES = ["Metropolitian ", "Urban ", "Semi-Urban ", "NaN "]
+MULTIPLE_DELIVERIES = ["0", "1", "2", "3", "NaN "]
+
+VALID_ROW = {"Delivery_person_Age": "29", "Delivery_person_Ratings": "4.6",
+             "Restaurant_latitude": 12.914264, "Restaurant_longitude": 77.6784,
+             "Delivery_location_latitude": 12.924264, "Delivery_location_longitude": 77.6884,
+             "Time_Orderd": "19:45:00", "Time_Order_picked": "19:55:00",
+             "Weatherconditions": "conditions Sunny", "Road_traffic_density": "Jam ",
+             "multiple_deliveries": "1", "Festival": "No ", "City": "Metropolitian ",
+             "Time_taken(min)": "(min) 32"}
+
+
+def _with_missing(rng, values: np.ndarray, rate: float) -> np.ndarray:
+    values = values.astype(object)
+    values[rng.random(len(values)) < rate] = "NaN "
+    return values
+
+
+def make_raw_data(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Synthetic rows with the columns, dtypes and string formats of the raw
+    dataset, so every cleaning branch (minors, six star ratings, missing
+    markers, zero coordinates) gets exercised.
+    """
+    rng = np.random.default_rng(seed)
+
+    rider_ids = np.char.add(
+        np.char.add(rng.choice(CITY_CODES, n_rows).astype(str), "RES"),
+        np.char.add(np.char.zfill(rng.integers(1, 21, n_rows).astype(str), 2),
+                    np.char.add("DEL", np.char.zfill(rng.integers(1, 4, n_rows).astype(str), 2))))
+
+    restaurant_lat = rng.uniform(10, 31, n_rows)
+    restaurant_lon = rng.uniform(72, 89, n_rows)
+    # a few coordinates are zero or negative in the raw data
+    restaurant_lat[rng.random(n_rows) < 0.01] = 0.0
+    restaurant_lon[rng.random(n_rows) < 0.01] *= -1
+    delivery_lat = np.abs(restaurant_lat) + rng.uniform(-0.2, 0.2, n_rows)
+    delivery_lon = np.abs(restaurant_lon) + rng.uniform(-0.2, 0.2, n_rows)
+
+    order_dates = (pd.Timestamp("2022-02-11")
+                   + pd.to_timedelta(rng.integers(0, 55, n_rows), unit="D")).strftime("%d-%m-%Y")
+    order_minutes = rng.integers(8 * 60, 24 * 60 - 15, n_rows) // 5 * 5
+    picked_minutes = order_minutes + rng.choice([5, 10, 15], n_rows)
+
+    def clock(minutes: np.ndarray) -> np.ndarray:
+        return np.char.add(np.char.add(np.char.zfill((minutes // 60).astype(str), 2), ":"),
+                           np.char.add(np.char.zfill((minutes % 60).astype(str), 2), ":00"))
+
+    ages = rng.integers(15, 51, n_rows)
+    ratings = np.round(rng.uniform(2.5, 5.0, n_rows), 1).astype(str).astype(object)
+    # six star riders are adults in the raw data, the cleaning drops both groups
+    six_star = (rng.random(n_rows) < 0.001) & (ages >= 18)
+    ratings[six_star] = "6"
+
+    data = pd.DataFrame({
+        "ID": np.char.add("0x", np.arange(n_rows).astype(str)),
+        "Delivery_person_ID": rider_ids,
+        "Delivery_person_Age": _with_missing(rng, ages.astype(str), 0.04),
+        "Delivery_person_Ratings": _with_missing(rng, ratings, 0.04),
+        "Restaurant_latitude": restaurant_lat,
+        "Restaurant_longitude": restaurant_lon,
+        "Delivery_location_latitude": delivery_lat,
+        "Delivery_location_longitude": delivery_lon,
+        "Order_Date": order_dates,
+        "Time_Orderd": _with_missing(rng, clock(order_minutes), 0.04),
+        "Time_Order_picked": clock(picked_minutes),
+        "Weatherconditions": rng.choice(WEATHER, n_rows),
+        "Road_traffic_density": rng.choice(TRAFFIC, n_rows, p=[0.33, 0.24, 0.1, 0.32, 0.01]),
+        "Vehicle_condition": rng.integers(0, 4, n_rows),
+        "Type_of_order": rng.choice(ORDER_TYPES, n_rows),
+        "Type_of_vehicle": rng.choice(VEHICLES, n_rows),
+        "multiple_deliveries": rng.choice(MULTIPLE_DELIVERIES, n_rows, p=[0.31, 0.62, 0.04, 0.01, 0.02]),
+        "Festival": rng.choice(FESTIVAL, n_rows, p=[0.975, 0.02, 0.005]),
+        "City": rng.choice(CITY_TYPES, n_rows, p=[0.74, 0.22, 0.01, 0.03]),
+        "Time_taken(min)": np.char.add("(min) ", rng.integers(10, 55, n_rows).astype(str)),
+    })
+    # the first row always survives the cleaning, so the single row case
+    # covers the whole serving path
+    for column, value in VALID_ROW.items():
+        data.at[0, column] = value
+    return data
+
+
+def time_call(func, args: tuple, min_seconds: float, max_repeats: int) -> dict:
+    # one call sets the repeat count, then the remaining calls are timed
+    start = time.perf_counter()
+    func(*args)
+    first = time.perf_counter() - start
+    repeats = int(min(max_repeats, max(0, min_seconds / max(first, 1e-9))))
+    timings = [first]
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return {"repeats": len(timings),
+            "min_s": min(timings),
+            "median_s": statistics.median(timings)}
+
+
+def trace_allocations(func, args: tuple) -> dict:
+    # a separate call under tracemalloc, its overhead would skew the timings
+    tracemalloc.start()
+    result = func(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"peak_alloc_mb": peak / (1024 * 1024),
+            "retained_alloc_mb": current / (1024 * 1024)}
+
+
+def build_cases(module, raw: pd.DataFrame, preprocessor) -> list:
+    """
+    The cleaning steps in pipeline order, each fed the output of the step
+    before it, followed by the fitted preprocessor on the cleaned rows.
+    """
+    renamed = module.change_column_names(raw)
+    cleaned = module.data_cleaning(renamed)
+    lat_long = module.clean_lat_long(cleaned)
+    with_distance = module.calculate_haversine_distance(lat_long)
+
+    cases = [
+        ("change_column_names", module.change_column_names, (raw,)),
+        ("data_cleaning", module.data_cleaning, (renamed,)),
+        ("clean_lat_long", module.clean_lat_long, (cleaned,)),
+        ("calculate_haversine_distance", module.calculate_haversine_distance, (lat_long,)),
+        ("create_distance_type", module.create_distance_type, (with_distance,)),
+        ("time_of_day", module.time_of_day, (cleaned["order_time_hour"],)),
+    ]
+    if preprocessor is not None:
+        features = (module.create_distance_type(with_distance)
+                    .loc[:, preprocessor.feature_names_in_]
+                    .dropna())
+        if len(features):
+            cases.append(("column_transformer", preprocessor.transform, (features,)))
+    return cases
+
+
+def benchmark_size(n_rows: int, preprocessor, min_seconds: float, max_repeats: int,
+                   seed: int) -> dict:
+    raw = make_raw_data(n_rows, seed=seed)
+    modules = {
+        # the serving copy gets requests without the target column
+        "scripts.data_clean_utils": (serving_cleaning, raw.drop(columns=["Time_taken(min)"])),
+        "src.data.data_cleaning": (pipeline_cleaning, raw),
+    }
+
+    results = {}
+    for module_name, (module, module_raw) in modules.items():
+        for case_name, func, args in build_cases(module, module_raw, preprocessor):
+            # the preprocessor is the same object for both modules
+            if case_name == "column_transformer" and "column_transformer" in results:
+                continue
+            key = case_name if case_name == "column_transformer" else f"{module_name}.{case_name}"
+            n_input = len(args[0])
+            timing = time_call(func, args, min_seconds, max_repeats)
+            allocations = trace_allocations(func, args)
+            results[key] = {
+                "n_input_rows": n_input,
+                **{name: round(value, 6) for name, value in timing.items()},
+                "ns_per_row": round(timing["median_s"] * 1e9 / max(n_input, 1), 1),
+                **{name: round(value, 3) for name, value in allocations.items()},
+            }
+            print(f"{n_rows:>10} rows  {key:<60} {timing['median_s'] * 1000:>12.3f} ms  "
+                  f"peak {allocations['peak_alloc_mb']:>10.2f} MB")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root_path,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return "unknown"
+
+
+def compare(current: dict, previous: dict) -> None:
+    # median time ratio per case, above 1 means slower than the previous run
+    print(f"Compared with {previous['commit']}:")
+    for size, cases in current["results"].items():
+        for case, stats in cases.items():
+            old = previous["results"].get(size, {}).get(case)
+            if old and old["median_s"]:
+                print(f"{size:>10} rows  {case:<60} x{stats['median_s'] / old['median_s']:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cleaning functions and the preprocessor")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--preprocessor", default="models/preprocessor.joblib")
+    parser.add_argument("--min-seconds", type=float, default=1.0,
+                        help="keep repeating a case until this much time was spent")
+    parser.add_argument("--max-repeats", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="reports/benchmarks/cleaning")
+    parser.add_argument("--compare", default=None, help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    # load the fitted preprocessor if the pipeline produced one
+    preprocessor_path = root_path / args.preprocessor
+    preprocessor = joblib.load(preprocessor_path) if preprocessor_path.exists() else None
+    if preprocessor is None:
+        print(f"{preprocessor_path} not found, skipping the column transformer")
+
+    # run every size
+    commit = git_commit()
+    results = {str(n_rows): benchmark_size(n_rows, preprocessor, args.min_seconds,
+                                           args.max_repeats, args.seed)
+               for n_rows in args.sizes}
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "results": results,
+    }
+
+    # one file per commit so runs can be compared across commits
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
+
+    if args.compare:
+        with open(root_path / args.compare) as f:
+            compare(report, json.load(f))
@@ -0,0 +1,125 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import msgspec
+import numpy as np
+import pandas as pd
+import pydantic
+from pathlib import Path
+from pydantic import TypeAdapter
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from scripts.benchmark_cleaning import git_commit, make_raw_data, time_call
+from src.serving.fast_decode import RequestDecoder, to_frame
+from src.serving.schema import Data
+
+DEFAULT_SIZES = [1, 10, 100, 1_000, 10_000]
+
+
+def make_payloads(n_rows: int, seed: int) -> list:
+    # synthetic raw rows that pass the Data validators
+    raw = make_raw_data(n_rows * 2, seed=seed).drop(columns=["Time_taken(min)"])
+    payloads = [row for row in raw.to_dict(orient="records")
+                if 8.0 <= row["Restaurant_latitude"] <= 37.0 and 68.0 <= row["Restaurant_longitude"] <= 97.0
+                and 8.0 <= row["Delivery_location_latitude"] <= 37.0
+                and 68.0 <= row["Delivery_location_longitude"] <= 97.0]
+    return payloads[:n_rows]
+
+
+def pydantic_single(body: bytes, adapter: TypeAdapter) -> pd.DataFrame:
+    # what FastAPI and do_predictions do for a /predict body
+    data = adapter.validate_python(json.loads(body), from_attributes=True)
+    return pd.DataFrame({name: getattr(data, name) for name in Data.model_fields}, index=[0])
+
+
+def pydantic_batch(body: bytes, adapter: TypeAdapter) -> pd.DataFrame:
+    # the same for a list[Data] body
+    return pd.DataFrame([item.model_dump() for item in adapter.validate_python(json.loads(body),
+                                                                                from_attributes=True)])
+
+
+def benchmark_size(n_rows: int, decoder: RequestDecoder, min_seconds: float, max_repeats: int,
+                   seed: int) -> dict:
+    payloads = make_payloads(n_rows, seed)
+    if n_rows == 1:
+        # a single order is a JSON object, like /predict and /predict/fast
+        body = json.dumps(payloads[0]).encode()
+        adapter = TypeAdapter(Data)
+        cases = {
+            "pydantic_decode": lambda: adapter.validate_python(json.loads(body), from_attributes=True),
+            "pydantic_frame": lambda: pydantic_single(body, adapter),
+            "msgspec_decode": lambda: decoder.decode(body),
+            "msgspec_frame": lambda: to_frame([decoder.decode(body)]),
+        }
+    else:
+        body = json.dumps(payloads).encode()
+        adapter = TypeAdapter(list[Data])
+        cases = {
+            "pydantic_decode": lambda: adapter.validate_python(json.loads(body), from_attributes=True),
+            "pydantic_frame": lambda: pydantic_batch(body, adapter),
+            "msgspec_decode": lambda: decoder.decode_batch(body),
+            "msgspec_frame": lambda: to_frame(decoder.decode_batch(body)),
+        }
+
+    # both paths hand the cleaning the same frame
+    pd.testing.assert_frame_equal(cases["pydantic_frame"](), cases["msgspec_frame"](), check_dtype=True)
+
+    results = {"body_bytes": len(body)}
+    for name, func in cases.items():
+        timing = time_call(func, (), min_seconds, max_repeats)
+        results[name] = {
+            **{key: round(value, 6) for key, value in timing.items()},
+            "us_per_request": round(timing["median_s"] * 1e6, 2),
+            "us_per_row": round(timing["median_s"] * 1e6 / n_rows, 3),
+        }
+    results["decode_speedup"] = round(results["pydantic_decode"]["median_s"]
+                                      / results["msgspec_decode"]["median_s"], 1)
+    results["frame_speedup"] = round(results["pydantic_frame"]["median_s"]
+                                     / results["msgspec_frame"]["median_s"], 1)
+    print(f"{n_rows:>6} rows  decode pydantic {results['pydantic_decode']['us_per_request']:>10.1f} us  "
+          f"msgspec {results['msgspec_decode']['us_per_request']:>9.1f} us  x{results['decode_speedup']:<5}  "
+          f"with frame pydantic {results['pydantic_frame']['us_per_request']:>10.1f} us  "
+          f"msgspec {results['msgspec_frame']['us_per_request']:>9.1f} us  x{results['frame_speedup']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request decoding, pydantic against msgspec")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="orders per request body")
+    parser.add_argument("--min-seconds", type=float, default=1.0,
+                        help="keep repeating a case until this much time was spent")
+    parser.add_argument("--max-repeats", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="reports/benchmarks/decoding")
+    args = parser.parse_args()
+
+    # decoder of the fast endpoints
+    decoder = RequestDecoder(Data)
+
+    # run every size
+    results = {str(n_rows): benchmark_size(n_rows, decoder, args.min_seconds, args.max_repeats, args.seed)
+               for n_rows in args.sizes}
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pydantic": pydantic.__version__,
+        "msgspec": msgspec.__version__,
+        "results": results,
+    }
+
+    # one file per commit like the other benchmarks
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
@@ -0,0 +1,129 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn import set_config
+from sklearn.pipeline import Pipeline
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+import scripts.data_clean_utils as cleaning
+from scripts.benchmark_cleaning import git_commit, time_call
+from src.serving.order_variants import clean_order, eta_matrix
+
+DEFAULT_SIZES = [10, 100, 1_000]
+DEFAULT_RESOLUTIONS = [0.1, 0.01, 0.001]
+
+# an order in Pune, the restaurants and delivery points are spread around it
+ORDER = {"ID": "0x0", "Delivery_person_ID": "PUNERES13DEL02", "Delivery_person_Age": "27",
+         "Delivery_person_Ratings": "4.7", "Restaurant_latitude": 18.52, "Restaurant_longitude": 73.85,
+         "Delivery_location_latitude": 18.56, "Delivery_location_longitude": 73.90,
+         "Order_Date": "12-03-2022", "Time_Orderd": "19:00:00", "Time_Order_picked": "19:10:00",
+         "Weatherconditions": "conditions Sunny", "Road_traffic_density": "Jam ", "Vehicle_condition": 1,
+         "Type_of_order": "Meal ", "Type_of_vehicle": "motorcycle ", "multiple_deliveries": "1",
+         "Festival": "No ", "City": "Metropolitian "}
+
+
+def serving_cleaning(data: pd.DataFrame) -> pd.DataFrame:
+    # the cleaning of app.py, without the final dropna of data_clean_utils
+    return (
+        data
+        .pipe(cleaning.change_column_names)
+        .pipe(cleaning.data_cleaning)
+        .pipe(cleaning.clean_lat_long)
+        .pipe(cleaning.calculate_haversine_distance)
+        .pipe(cleaning.create_distance_type)
+        .pipe(cleaning.drop_columns, columns=cleaning.columns_to_drop)
+    )
+
+
+def make_points(n_points: int, rng) -> np.ndarray:
+    # up to about 15 km around the order
+    return np.column_stack([rng.uniform(18.45, 18.65, n_points), rng.uniform(73.75, 73.98, n_points)])
+
+
+def per_pair_predictions(restaurants: np.ndarray, deliveries: np.ndarray, predict) -> np.ndarray:
+    # every pair as its own raw row through the full cleaning, the reference
+    raw = pd.DataFrame([{**ORDER, "Restaurant_latitude": r[0], "Restaurant_longitude": r[1],
+                         "Delivery_location_latitude": d[0], "Delivery_location_longitude": d[1]}
+                        for r in restaurants for d in deliveries])
+    return np.asarray(predict(serving_cleaning(raw))).reshape(len(restaurants), len(deliveries))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ETA matrix against one prediction per pair")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="restaurants and delivery points, the matrix is size x size")
+    parser.add_argument("--resolutions", type=float, nargs="+", default=DEFAULT_RESOLUTIONS)
+    parser.add_argument("--accuracy-size", type=int, default=60, help="matrix side checked against per pair rows")
+    parser.add_argument("--model", default="models/model.joblib")
+    parser.add_argument("--preprocessor", default="models/preprocessor.joblib")
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    parser.add_argument("--max-repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="reports/benchmarks/eta_matrix")
+    args = parser.parse_args()
+
+    # served pipeline and output
+    set_config(transform_output="pandas")
+    pipeline = Pipeline(steps=[("preprocess", joblib.load(root_path / args.preprocessor)),
+                               ("regressor", joblib.load(root_path / args.model))])
+    rng = np.random.default_rng(args.seed)
+    cleaned = clean_order(ORDER, serving_cleaning)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        # one /predict worth of work, cleaning and model on a single row
+        single = time_call(lambda: pipeline.predict(serving_cleaning(pd.DataFrame(ORDER, index=[0]))), (),
+                           args.min_seconds, 200)
+
+        # error of every resolution against scoring each pair on its own
+        restaurants, deliveries = make_points(args.accuracy_size, rng), make_points(args.accuracy_size, rng)
+        reference = per_pair_predictions(restaurants, deliveries, pipeline.predict)
+        accuracy = {}
+        for resolution in [0.0] + args.resolutions:
+            error = np.abs(eta_matrix(cleaned, restaurants, deliveries, pipeline.predict, resolution) - reference)
+            accuracy[str(resolution)] = {"max_abs_error": round(float(error.max()), 4),
+                                         "mean_abs_error": round(float(error.mean()), 5),
+                                         "p99_abs_error": round(float(np.quantile(error, 0.99)), 4)}
+            print(f"resolution {resolution:>6} km  max error {error.max():.4f}  mean error {error.mean():.5f} min")
+
+        # time of every matrix size and resolution
+        results = {}
+        for size in args.sizes:
+            restaurants, deliveries = make_points(size, rng), make_points(size, rng)
+            results[str(size)] = {"pairs": size * size,
+                                  "per_pair_estimate_s": round(single["median_s"] * size * size, 3)}
+            for resolution in args.resolutions:
+                timing = time_call(eta_matrix, (cleaned, restaurants, deliveries, pipeline.predict, resolution),
+                                   args.min_seconds, args.max_repeats)
+                results[str(size)][str(resolution)] = {key: round(value, 6) for key, value in timing.items()}
+                print(f"{size:>5} x {size:<5} resolution {resolution:>6} km  {timing['median_s'] * 1000:>9.1f} ms  "
+                      f"one /predict per pair ~{single['median_s'] * size * size:.1f} s")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "single_prediction_s": round(single["median_s"], 6),
+        "accuracy": accuracy,
+        "results": results,
+    }
+
+    # one file per commit like the other benchmarks
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
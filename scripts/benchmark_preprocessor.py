@@ -0,0 +1,101 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+# sets the pandas output the preprocessor is served with
+from scripts.benchmark_cleaning import git_commit, time_call
+from src.features.compiled_preprocessor import CompiledPreprocessor
+
+DEFAULT_SIZES = [1, 10, 100, 1_000, 10_000, 100_000]
+
+
+def make_features(data: pd.DataFrame, n_rows: int, seed: int) -> pd.DataFrame:
+    # cleaned test rows drawn with replacement up to the batch size
+    return data.sample(n=n_rows, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def benchmark_size(n_rows: int, data: pd.DataFrame, preprocessor, compiled: CompiledPreprocessor,
+                   min_seconds: float, max_repeats: int, seed: int) -> dict:
+    features = make_features(data, n_rows, seed)
+    buffer = np.empty((n_rows, compiled.n_features_out), dtype=np.float32)
+
+    expected = np.asarray(preprocessor.transform(features), dtype=np.float64)
+    difference = np.abs(expected - compiled.transform(features))
+    cases = {
+        # as served today, joblib dispatch and pandas output
+        "column_transformer": (preprocessor.transform, (features,)),
+        # new array on every call
+        "compiled": (compiled.transform, (features,)),
+        # the serving path, one buffer reused across calls
+        "compiled_into_buffer": (lambda frame: compiled.transform(frame, out=buffer), (features,)),
+    }
+
+    results = {"max_abs_diff": float(np.nanmax(difference))}
+    for name, (func, args) in cases.items():
+        timing = time_call(func, args, min_seconds, max_repeats)
+        results[name] = {
+            **{key: round(value, 6) for key, value in timing.items()},
+            "ns_per_row": round(timing["median_s"] * 1e9 / n_rows, 1),
+        }
+    speedup = results["column_transformer"]["median_s"] / results["compiled_into_buffer"]["median_s"]
+    results["speedup"] = round(speedup, 1)
+    print(f"{n_rows:>8} rows  column_transformer "
+          f"{results['column_transformer']['median_s'] * 1000:>10.3f} ms  compiled "
+          f"{results['compiled_into_buffer']['median_s'] * 1000:>10.3f} ms  x{speedup:.1f}  "
+          f"max diff {results['max_abs_diff']:.2e}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the compiled preprocessor against the ColumnTransformer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--preprocessor", default="models/preprocessor.joblib")
+    parser.add_argument("--data", default="data/interim/test.csv")
+    parser.add_argument("--min-seconds", type=float, default=1.0,
+                        help="keep repeating a case until this much time was spent")
+    parser.add_argument("--max-repeats", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="reports/benchmarks/preprocessor")
+    args = parser.parse_args()
+
+    # fitted preprocessor and its compiled plan
+    preprocessor = joblib.load(root_path / args.preprocessor)
+    compiled = CompiledPreprocessor(preprocessor)
+    # cleaned rows with the columns the preprocessor was fitted on
+    data = pd.read_csv(root_path / args.data).dropna().loc[:, preprocessor.feature_names_in_]
+
+    # run every size
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = {str(n_rows): benchmark_size(n_rows, data, preprocessor, compiled,
+                                               args.min_seconds, args.max_repeats, args.seed)
+                   for n_rows in args.sizes}
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "results": results,
+    }
+
+    # one file per commit like the cleaning benchmark
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
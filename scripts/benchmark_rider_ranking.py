@@ -0,0 +1,104 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn import set_config
+from sklearn.pipeline import Pipeline
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from scripts.benchmark_cleaning import git_commit, time_call
+from scripts.benchmark_eta_matrix import ORDER, serving_cleaning
+from src.serving.order_variants import excluded_riders, rider_etas
+
+DEFAULT_SIZES = [1, 10, 50, 200]
+VEHICLES = ["motorcycle ", "scooter ", "electric_scooter ", "bicycle "]
+
+
+def make_candidates(n_riders: int, rng) -> pd.DataFrame:
+    # riders of the order's city, a few of them under 18 or rated 6 stars
+    return pd.DataFrame({
+        "Delivery_person_ID": [f"PUNERES{i % 20:02d}DEL{i:02d}" for i in range(n_riders)],
+        "Delivery_person_Age": rng.integers(15, 40, n_riders).astype(str),
+        "Delivery_person_Ratings": rng.choice(["3.5", "4.2", "4.6", "4.9", "5", "6"], n_riders),
+        "Type_of_vehicle": rng.choice(VEHICLES, n_riders),
+        "Vehicle_condition": rng.integers(0, 4, n_riders),
+        "Time_Order_picked": [f"19:{minutes:02d}:00" for minutes in rng.integers(5, 16, n_riders)]})
+
+
+def per_rider_predictions(candidates: pd.DataFrame, predict) -> np.ndarray:
+    # one /predict per rider, the reference and the cost being replaced, the
+    # cleaning fails on a rider both under 18 and rated 6 stars so the
+    # excluded riders are skipped before it
+    etas = np.full(len(candidates), np.nan)
+    excluded = excluded_riders(candidates)
+    for i, rider in enumerate(candidates.to_dict("records")):
+        if not excluded[i]:
+            etas[i] = predict(serving_cleaning(pd.DataFrame({**ORDER, **rider}, index=[0])))[0]
+    return etas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ranking candidate riders against one prediction per rider")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="candidate riders per order")
+    parser.add_argument("--model", default="models/model.joblib")
+    parser.add_argument("--preprocessor", default="models/preprocessor.joblib")
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    parser.add_argument("--max-repeats", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="reports/benchmarks/rider_ranking")
+    args = parser.parse_args()
+
+    # served pipeline and output
+    set_config(transform_output="pandas")
+    pipeline = Pipeline(steps=[("preprocess", joblib.load(root_path / args.preprocessor)),
+                               ("regressor", joblib.load(root_path / args.model))])
+    rng = np.random.default_rng(args.seed)
+
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for size in args.sizes:
+            candidates = make_candidates(size, rng)
+            ranked = time_call(rider_etas, (ORDER, candidates, serving_cleaning, pipeline.predict),
+                               args.min_seconds, args.max_repeats)
+            single = time_call(per_rider_predictions, (candidates, pipeline.predict),
+                               args.min_seconds, max(1, args.max_repeats // size))
+            etas = rider_etas(ORDER, candidates, serving_cleaning, pipeline.predict)
+            reference = per_rider_predictions(candidates, pipeline.predict)
+            results[str(size)] = {
+                "excluded": int(np.isnan(etas).sum()),
+                "ranked_ms": round(ranked["median_s"] * 1000, 3),
+                "per_rider_ms": round(single["median_s"] * 1000, 3),
+                "ranked_ms_per_candidate": round(ranked["median_s"] * 1000 / size, 4),
+                "speedup": round(single["median_s"] / ranked["median_s"], 2),
+                "max_abs_error": float(np.nanmax(np.abs(etas - reference))) if not np.isnan(etas).all() else 0.0,
+            }
+            print(f"{size:>4} riders  ranked {results[str(size)]['ranked_ms']:>8.2f} ms  "
+                  f"one /predict each {results[str(size)]['per_rider_ms']:>9.2f} ms  "
+                  f"x{results[str(size)]['speedup']}  max error {results[str(size)]['max_abs_error']:.2e}")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "results": results,
+    }
+
+    # one file per commit like the other benchmarks
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
@@ -0,0 +1,115 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn import set_config
+from sklearn.pipeline import Pipeline
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from scripts.benchmark_cleaning import git_commit, time_call
+from src.serving.shard_router import ShardRouter, read_rss_mb
+
+
+def shard_memory(router: ShardRouter, data: pd.DataFrame) -> dict:
+    # resident memory a shard adds when loaded and once its pages are used
+    memory = {}
+    for value in router.shard_files:
+        rss_before = read_rss_mb()
+        pipeline = router.get(value)
+        rss_loaded = read_rss_mb()
+        pipeline.predict(data.loc[data[router.column] == value])
+        rss_used = read_rss_mb()
+        memory[value] = {"file_mb": router.stats_by_shard[value]["file_mb"],
+                         "load_ms": router.stats_by_shard[value]["load_ms"],
+                         "rss_after_load_mb": round(rss_loaded - rss_before, 2),
+                         "rss_after_predict_mb": round(rss_used - rss_before, 2)}
+        print(f"{router.column}={value:<15} file {memory[value]['file_mb']:>8.2f} MB  "
+              f"rss +{memory[value]['rss_after_load_mb']:.2f} MB loaded, "
+              f"+{memory[value]['rss_after_predict_mb']:.2f} MB after predict")
+    return memory
+
+
+def routing_overhead(router: ShardRouter, global_pipeline, data: pd.DataFrame,
+                     min_seconds: float, max_repeats: int) -> dict:
+    # a single row through the router against the same shard called directly,
+    # the difference is within the noise of predict so the router's own
+    # timer of the routing work is reported as the overhead
+    overhead = {}
+    for value in router.shard_files:
+        row = data.loc[data[router.column] == value].head(1)
+        shard = router.get(value)
+        direct = time_call(shard.predict, (row,), min_seconds, max_repeats)
+        router._route_seconds, router._routed = 0.0, 0
+        routed = time_call(router.predict, (row, global_pipeline), min_seconds, max_repeats)
+        overhead[value] = {"direct_ms": round(direct["median_s"] * 1000, 4),
+                           "routed_ms": round(routed["median_s"] * 1000, 4),
+                           "route_us": router.stats()["avg_route_us"]}
+    # the whole test split, grouped by partition, against the global model
+    router._route_seconds, router._routed = 0.0, 0
+    batch_routed = time_call(router.predict, (data, global_pipeline), min_seconds, max_repeats)
+    batch_global = time_call(global_pipeline.predict, (data,), min_seconds, max_repeats)
+    overhead["batch"] = {"rows": len(data),
+                         "global_ms": round(batch_global["median_s"] * 1000, 3),
+                         "routed_ms": round(batch_routed["median_s"] * 1000, 3),
+                         "route_us": router.stats()["avg_route_us"]}
+    return overhead
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory per shard and routing overhead of the shard router")
+    parser.add_argument("--manifest", default="models/shards/manifest.json")
+    parser.add_argument("--model", default="models/model.joblib")
+    parser.add_argument("--preprocessor", default="models/preprocessor.joblib")
+    parser.add_argument("--data", default="data/interim/test.csv")
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    parser.add_argument("--max-repeats", type=int, default=200)
+    parser.add_argument("--output-dir", default="reports/benchmarks/shards")
+    args = parser.parse_args()
+
+    # the output the models are served with
+    set_config(transform_output="pandas")
+
+    # every shard fits in memory here, eviction is not measured
+    with open(root_path / args.manifest) as f:
+        manifest = json.load(f)
+    router = ShardRouter(root_path / args.manifest, max_loaded=len(manifest["shards"]))
+    global_pipeline = Pipeline(steps=[("preprocess", joblib.load(root_path / args.preprocessor)),
+                                      ("regressor", joblib.load(root_path / args.model))])
+    data = pd.read_csv(root_path / args.data).dropna().drop(columns=["time_taken"])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        memory = shard_memory(router, data)
+        overhead = routing_overhead(router, global_pipeline, data, args.min_seconds, args.max_repeats)
+    for value, timing in overhead.items():
+        print(f"{value:<15} {timing}")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "column": router.column,
+        "memory": memory,
+        "routing": overhead,
+        "accuracy": {value: {key: shard[key] for key in ("test_rows", "shard_mae", "global_mae")}
+                     for value, shard in manifest["shards"].items()},
+    }
+
+    # one file per commit like the other benchmarks
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
@@ -0,0 +1,90 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn import set_config
+from sklearn.pipeline import Pipeline
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from scripts.benchmark_cleaning import git_commit, time_call
+from scripts.benchmark_eta_matrix import ORDER, serving_cleaning
+from src.serving.order_variants import clean_order, what_if_grid
+
+TRAFFIC = ["Low ", "Medium ", "High ", "Jam "]
+WEATHER = ["conditions Sunny", "conditions Cloudy", "conditions Fog", "conditions Windy",
+           "conditions Stormy", "conditions Sandstorms"]
+
+
+def make_axes(n_delays: int, n_hours: int) -> dict:
+    # every traffic and weather value, delays every 5 minutes and evening hours
+    return {"pickup_delay_minutes": list(range(0, 5 * n_delays, 5)),
+            "Road_traffic_density": TRAFFIC,
+            "Weatherconditions": WEATHER,
+            "order_hour": list(range(24 - n_hours, 24))}
+
+
+def sweep(axes: dict, predict) -> np.ndarray:
+    # what the endpoint does, clean once and score the grid in one call
+    cleaned = clean_order(ORDER, serving_cleaning)
+    return np.asarray(predict(what_if_grid(cleaned, axes))).reshape([len(values) for values in axes.values()])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark a what-if sweep against single predictions")
+    parser.add_argument("--delays", type=int, nargs="+", default=[1, 7, 28], help="delays per sweep")
+    parser.add_argument("--hours", type=int, default=3, help="order hours per sweep")
+    parser.add_argument("--model", default="models/model.joblib")
+    parser.add_argument("--preprocessor", default="models/preprocessor.joblib")
+    parser.add_argument("--min-seconds", type=float, default=1.0)
+    parser.add_argument("--max-repeats", type=int, default=50)
+    parser.add_argument("--output-dir", default="reports/benchmarks/what_if")
+    args = parser.parse_args()
+
+    # served pipeline and output
+    set_config(transform_output="pandas")
+    pipeline = Pipeline(steps=[("preprocess", joblib.load(root_path / args.preprocessor)),
+                               ("regressor", joblib.load(root_path / args.model))])
+
+    results = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        # one /predict worth of work, cleaning and model on a single row
+        single = time_call(lambda: pipeline.predict(serving_cleaning(pd.DataFrame(ORDER, index=[0]))), (),
+                           args.min_seconds, 200)
+        for n_delays in args.delays:
+            axes = make_axes(n_delays, args.hours)
+            points = int(np.prod([len(values) for values in axes.values()]))
+            timing = time_call(sweep, (axes, pipeline.predict), args.min_seconds, args.max_repeats)
+            results[str(points)] = {"sweep_ms": round(timing["median_s"] * 1000, 3),
+                                    "single_predictions": round(timing["median_s"] / single["median_s"], 2),
+                                    "per_point_estimate_ms": round(single["median_s"] * points * 1000, 1)}
+            print(f"{points:>5} points  {timing['median_s'] * 1000:>8.2f} ms, "
+                  f"the time of {results[str(points)]['single_predictions']} single predictions "
+                  f"(one /predict per point ~{results[str(points)]['per_point_estimate_ms'] / 1000:.1f} s)")
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "single_prediction_ms": round(single["median_s"] * 1000, 3),
+        "results": results,
+    }
+
+    # one file per commit like the other benchmarks
+    output_dir = root_path / args.output_dir
+    output_dir.mkdir(exist_ok=True, parents=True)
+    output_path = output_dir / f"{commit}.json"
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Saved results to {output_path}")
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+
+# packages only the training, registry or frontend code paths need
+FORBIDDEN_PACKAGES = ["mlflow", "dagshub", "streamlit", "sklearn", "scipy", "lightgbm"]
+
+
+def measure_imports(module: str, env: dict) -> list:
+    # one fresh interpreter per run, -X importtime writes to stderr
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=root_path, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        records.append({"module": name.strip(),
+                        "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                        "self_ms": int(self_us) / 1000,
+                        "cumulative_ms": int(cumulative_us) / 1000})
+    return records
+
+
+def build_report(records: list, module: str, top: int) -> dict:
+    total_ms = next(record["cumulative_ms"] for record in records
+                    if record["module"] == module)
+    # self time summed per top level package
+    packages = {}
+    for record in records:
+        package = record["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + record["self_ms"]
+
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "n_modules": len(records),
+        "packages_ms": {name: round(ms, 1) for name, ms in
+                        sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        "slowest_modules_ms": {record["module"]: round(record["self_ms"], 1) for record in
+                               sorted(records, key=lambda record: -record["self_ms"])[:top]},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per module import cost of the serving entry point")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeats", type=int, default=5, help="the fastest run is reported")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="fail when importing takes longer than this")
+    parser.add_argument("--output", default="reports/import_time.json")
+    parser.add_argument("--baseline", default=None, help="report to compare the total import time with")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative increase of the total import time over the baseline")
+    args = parser.parse_args()
+
+    # the mlflow backend must not need a connection to be imported
+    env = dict(os.environ)
+    env.setdefault("MODEL_REGISTRY_BACKEND", "mlflow")
+
+    # warm the bytecode cache once, then keep the fastest run
+    measure_imports(args.module, env)
+    runs = [measure_imports(args.module, env) for _ in range(args.repeats)]
+    reports = [build_report(records, args.module, args.top) for records in runs]
+    report = min(reports, key=lambda item: item["total_ms"])
+
+    imported = {record["module"].split(".")[0] for record in runs[0]}
+    report["forbidden_imports"] = sorted(imported & set(FORBIDDEN_PACKAGES))
+    print(json.dumps(report, indent=4))
+
+    output_path = root_path / args.output
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
+
+    # fail on heavy packages in the graph or a blown time budget
+    failures = []
+    if report["forbidden_imports"]:
+        failures.append(f"{args.module} imports {', '.join(report['forbidden_imports'])}")
+    if args.max_seconds is not None and report["total_ms"] > args.max_seconds * 1000:
+        failures.append(f"importing {args.module} took {report['total_ms']}ms, "
+                        f"budget is {args.max_seconds * 1000:.0f}ms")
+    # save or check against the baseline
+    if args.baseline is not None:
+        baseline_path = root_path / args.baseline
+        if args.save_baseline:
+            with open(baseline_path, "w") as f:
+                json.dump(report, f, indent=4)
+            print(f"Saved baseline to {baseline_path}")
+        else:
+            with open(baseline_path) as f:
+                baseline_ms = json.load(f)["total_ms"]
+            if report["total_ms"] > baseline_ms * (1 + args.tolerance):
+                failures.append(f"importing {args.module} took {report['total_ms']}ms, more than "
+                                f"{args.tolerance:.0%} over the baseline of {baseline_ms}ms")
+    if failures:
+        sys.exit("\n".join(failures))
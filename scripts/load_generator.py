@@ -0,0 +1,327 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from scripts.data_clean_utils import perform_data_cleaning
+from src.serving.model_watcher import load_warmup_payloads
+
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+
+def load_payloads(source: str, requests_path: Path, data_path: Path,
+                  n_rows: int, seed: int) -> list:
+    if source == "requests":
+        # the request fields are the raw dataset columns without the target
+        fields = pd.read_csv(data_path, nrows=0).columns.tolist()[:-1]
+        return load_warmup_payloads(requests_path, required_fields=fields)
+
+    # rows sampled from the raw dataset, without the target column
+    df = pd.read_csv(data_path).dropna()
+    df = df.drop(columns=[df.columns.tolist()[-1]])
+    # keep the rows the API can score, the rest are dropped by the cleaning
+    df = df.loc[perform_data_cleaning(df).index]
+    sample = df.sample(min(n_rows, len(df)), random_state=seed)
+    return sample.to_dict(orient="records")
+
+
+def read_rss_mb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        return None
+    return None
+
+
+class RssSampler:
+    # samples the server resident set size while the load runs
+    def __init__(self, pid: int, interval: float):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        start = time.monotonic()
+        while True:
+            rss_mb = read_rss_mb(self.pid)
+            if rss_mb is not None:
+                self.samples.append([round(time.monotonic() - start, 2), round(rss_mb, 2)])
+            if self._stop_event.wait(self.interval):
+                break
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+
+class LoadGenerator:
+    """
+    Replays payloads against the predict endpoint and records one
+    (latency, status) pair per request, status 0 when no response came.
+
+    In ``qps`` mode requests are sent on a fixed schedule and the latency is
+    measured from the scheduled send time, so a slow server is charged for
+    the queueing it causes instead of silently lowering the offered load.
+    In ``concurrency`` mode a fixed number of clients send back to back.
+    With ``deadline_ms`` every request tells the server its time budget.
+    """
+
+    def __init__(self, url: str, payloads: list, timeout: float, deadline_ms: float = None):
+        self.url = url
+        self.payloads = payloads
+        self.timeout = timeout
+        self.headers = {"X-Deadline-Ms": str(deadline_ms)} if deadline_ms else {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.results = []
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, payload: dict, scheduled: float) -> None:
+        try:
+            response = self._session().post(self.url, json=payload, headers=self.headers,
+                                            timeout=self.timeout)
+            status = response.status_code
+        except requests.RequestException:
+            status = 0
+        latency_ms = (time.perf_counter() - scheduled) * 1000
+        with self._lock:
+            self.results.append((latency_ms, status))
+
+    def run_fixed_qps(self, qps: float, duration: float, max_workers: int) -> float:
+        interval = 1.0 / qps
+        n_requests = int(qps * duration)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            start = time.perf_counter()
+            for i in range(n_requests):
+                scheduled = start + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._send, self.payloads[i % len(self.payloads)], scheduled)
+        return time.perf_counter() - start
+
+    def run_fixed_concurrency(self, concurrency: int, duration: float) -> float:
+        deadline = time.perf_counter() + duration
+
+        def client(offset: int) -> None:
+            i = offset
+            while time.perf_counter() < deadline:
+                self._send(self.payloads[i % len(self.payloads)], time.perf_counter())
+                i += concurrency
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for offset in range(concurrency):
+                executor.submit(client, offset)
+        return time.perf_counter() - start
+
+
+def summarise(results: list, elapsed: float, rss_samples: list, deadline_ms: float = None) -> dict:
+    latencies = np.array([latency for latency, _ in results])
+    n_errors = sum(1 for _, status in results if status != 200)
+    # answers the caller could still use, in time for its deadline
+    n_good = sum(1 for latency, status in results
+                 if status == 200 and (deadline_ms is None or latency <= deadline_ms))
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    summary = {
+        "n_requests": len(results),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "goodput_rps": round(n_good / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(n_errors / len(results), 4) if results else 0.0,
+        "status_counts": statuses,
+        "latency_ms": {name: round(float(np.percentile(latencies, q)), 3) if len(latencies) else None
+                       for name, q in PERCENTILES.items()},
+    }
+    if rss_samples:
+        rss = [sample[1] for sample in rss_samples]
+        summary["server_rss_mb"] = {"start": rss[0], "end": rss[-1], "max": max(rss)}
+    return summary
+
+
+def compare_to_baseline(summary: dict, baseline: dict, tolerance: float,
+                        error_tolerance: float) -> list:
+    # a list of human readable regressions, empty when the run is fine
+    regressions = []
+    for name in PERCENTILES:
+        current, reference = summary["latency_ms"][name], baseline["latency_ms"][name]
+        if current is not None and reference and current > reference * (1 + tolerance):
+            regressions.append(f"{name} latency {current}ms > baseline {reference}ms")
+    if summary["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {summary['throughput_rps']} rps < "
+                           f"baseline {baseline['throughput_rps']} rps")
+    if summary["error_rate"] > baseline["error_rate"] + error_tolerance:
+        regressions.append(f"error rate {summary['error_rate']} > baseline {baseline['error_rate']}")
+    if "server_rss_mb" in summary and "server_rss_mb" in baseline:
+        current, reference = summary["server_rss_mb"]["max"], baseline["server_rss_mb"]["max"]
+        if current > reference * (1 + tolerance):
+            regressions.append(f"server max rss {current}MB > baseline {reference}MB")
+    return regressions
+
+
+def start_server(port: int, startup_timeout: float, cpus: list = None) -> subprocess.Popen:
+    # the server can be pinned to its own cores, away from the load generator
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app",
+                               "--host", "127.0.0.1", "--port", str(port)],
+                              cwd=root_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              preexec_fn=(lambda: os.sched_setaffinity(0, cpus)) if cpus else None)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("The API server exited during start up")
+        # wait until the model is loaded and warmed up
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return server
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"The API server did not start within {startup_timeout}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the prediction API")
+    parser.add_argument("--url", default=None, help="predict endpoint, defaults to the started server")
+    parser.add_argument("--start-server", action="store_true", help="start app.py with uvicorn first")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--server-pid", type=int, default=None, help="pid to sample RSS from")
+    parser.add_argument("--source", choices=["requests", "raw"], default="requests")
+    parser.add_argument("--requests-path", default="requests.jsonl")
+    parser.add_argument("--data-path", default="data/raw/swiggy.csv")
+    parser.add_argument("--n-rows", type=int, default=1000)
+    parser.add_argument("--mode", choices=["qps", "concurrency"], default="concurrency")
+    parser.add_argument("--qps", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-workers", type=int, default=64, help="client threads in qps mode")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of untimed load first")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--deadline-ms", type=float, default=None,
+                        help="budget sent in X-Deadline-Ms, later answers do not count as goodput")
+    parser.add_argument("--server-cpus", type=int, nargs="+", default=None,
+                        help="cores the started server is pinned to")
+    parser.add_argument("--client-cpus", type=int, nargs="+", default=None,
+                        help="cores the load generator is pinned to")
+    parser.add_argument("--rss-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="reports/load_test/latest.json")
+    parser.add_argument("--baseline", default="reports/load_test/baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression for latency, throughput and rss")
+    parser.add_argument("--error-tolerance", type=float, default=0.01,
+                        help="allowed absolute increase of the error rate")
+    args = parser.parse_args()
+
+    # load the payloads to replay
+    payloads = load_payloads(args.source, root_path / args.requests_path,
+                             root_path / args.data_path, args.n_rows, args.seed)
+    if not payloads:
+        sys.exit("No payloads to replay")
+    random.Random(args.seed).shuffle(payloads)
+
+    # start the server if asked to
+    server = start_server(args.port, startup_timeout=120, cpus=args.server_cpus) if args.start_server else None
+    # pin the load generator after the server started so the server does not inherit it
+    if args.client_cpus:
+        os.sched_setaffinity(0, args.client_cpus)
+    client_cpus = sorted(os.sched_getaffinity(0))
+    server_cpus = sorted(os.sched_getaffinity(server.pid)) if server is not None else None
+    if server_cpus is not None and set(client_cpus) & set(server_cpus):
+        # the client competes with the server for cpu, results under overload are pessimistic
+        print(f"Warning: the load generator shares cores {sorted(set(client_cpus) & set(server_cpus))} "
+              f"with the server")
+    url = args.url or f"http://127.0.0.1:{args.port}/predict"
+    server_pid = server.pid if server is not None else args.server_pid
+
+    try:
+        # warm up connections and the model without recording anything
+        if args.warmup > 0:
+            LoadGenerator(url, payloads, args.timeout).run_fixed_concurrency(
+                min(args.concurrency, 4), args.warmup)
+
+        # run the timed load
+        generator = LoadGenerator(url, payloads, args.timeout, args.deadline_ms)
+        sampler = RssSampler(server_pid, args.rss_interval) if server_pid else None
+        if sampler is not None:
+            sampler.start()
+        if args.mode == "qps":
+            elapsed = generator.run_fixed_qps(args.qps, args.duration, args.max_workers)
+        else:
+            elapsed = generator.run_fixed_concurrency(args.concurrency, args.duration)
+        if sampler is not None:
+            sampler.stop()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    # summarise the run
+    summary = summarise(generator.results, elapsed, sampler.samples if sampler else [], args.deadline_ms)
+    result = {
+        "config": {"mode": args.mode,
+                   "qps": args.qps if args.mode == "qps" else None,
+                   "concurrency": args.concurrency if args.mode == "concurrency" else None,
+                   "duration_s": args.duration,
+                   "deadline_ms": args.deadline_ms,
+                   "source": args.source,
+                   "n_payloads": len(payloads),
+                   "client_cpus": client_cpus,
+                   "server_cpus": server_cpus},
+        "summary": summary,
+        "server_rss_timeline": sampler.samples if sampler else []
+    }
+    print(json.dumps(summary, indent=4))
+
+    output_path = root_path / args.output
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=4)
+
+    # save or check against the baseline
+    baseline_path = root_path / args.baseline
+    if args.save_baseline:
+        baseline_path.parent.mkdir(exist_ok=True, parents=True)
+        with open(baseline_path, "w") as f:
+            json.dump(result, f, indent=4)
+        print(f"Saved baseline to {baseline_path}")
+    elif baseline_path.exists():
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline["config"] != result["config"]:
+            print("Warning: the baseline was recorded with a different configuration")
+        regressions = compare_to_baseline(summary, baseline["summary"], args.tolerance,
+                                          args.error_tolerance)
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline")
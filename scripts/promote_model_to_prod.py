@@ -1,10 +1,10 @@
-import dagshub
-import mlflow
-from mlflow.tracking import MlflowClient
 import json
+import sys
+from pathlib import Path
 
-dagshub.init(repo_owner='speedyskill', repo_name='swiggy-delivery-time-prediction', mlflow=True)
-mlflow.set_tracking_uri('https://dagshub.com/speedyskill/swiggy-delivery-time-prediction.mlflow')
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.registry import get_registry
 
 def load_model_info(path):
     with open(path) as f:
@@ -14,14 +14,15 @@ def load_model_info(path):
 model_name = load_model_info('run_information.json')['model_name']
 stage = 'Staging'
 
-client = MlflowClient()
+# registry selected by MODEL_REGISTRY_BACKEND
+registry = get_registry()
 
-latest_version = client.get_latest_versions(name=model_name,stages=[stage])[0].version
+latest_version = registry.get_latest_version(model_name=model_name,stage=stage)
 
 promote_stage = 'Production'
 
-client.transition_model_version_stage(
-    name = model_name,
+registry.transition_stage(
+    model_name = model_name,
     version = latest_version,
     stage = promote_stage,
     archive_existing_versions = True
@@ -0,0 +1,50 @@
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from src.serving.tracing import read_traces
+
+
+def matches(record: dict, args) -> bool:
+    if args.reason and record.get("reason") != args.reason:
+        return False
+    if args.version and record.get("model_version") != args.version:
+        return False
+    if args.min_ms is not None and record.get("timings_ms", {}).get("total", 0) < args.min_ms:
+        return False
+    if args.id and record.get("payload", {}).get("ID") != args.id:
+        return False
+    return True
+
+
+def summary_line(record: dict) -> str:
+    timings = record.get("timings_ms", {})
+    stages = " ".join(f"{name}={ms:.1f}" for name, ms in timings.items())
+    when = datetime.fromtimestamp(record["timestamp"]).isoformat(timespec="milliseconds")
+    return (f"#{record['seq']} {when} {record.get('reason', '?'):>7} "
+            f"v{record.get('model_version')} id={record.get('payload', {}).get('ID')} "
+            f"prediction={record.get('prediction')} {stages}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read request traces from the ring buffer file")
+    parser.add_argument("--path", default="reports/traces/requests.ring")
+    parser.add_argument("--last", type=int, default=20, help="newest records to show, 0 for all")
+    parser.add_argument("--reason", choices=["sampled", "slow"], default=None)
+    parser.add_argument("--version", default=None, help="only this model version")
+    parser.add_argument("--min-ms", type=float, default=None, help="only requests at least this slow")
+    parser.add_argument("--id", default=None, help="only the request with this ID")
+    parser.add_argument("--full", action="store_true", help="print whole records as json lines")
+    args = parser.parse_args()
+
+    records = [record for record in read_traces(root_path / args.path) if matches(record, args)]
+    if args.last:
+        records = records[-args.last:]
+
+    for record in records:
+        print(json.dumps(record) if args.full else summary_line(record))
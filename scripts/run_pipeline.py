@@ -0,0 +1,72 @@
+import argparse
+import itertools
+import json
+import sys
+import time
+import yaml
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from src.pipeline_runner import PipelineRunner, with_overrides, write_outs
+
+
+def parse_overrides(items: list) -> dict:
+    # KEY=V1,V2 gives a list of values to sweep, yaml parses every value
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        if not values:
+            raise ValueError(f"Expected KEY=VALUE[,VALUE...], got {item}")
+        grid[key] = [yaml.safe_load(value) for value in values.split(",")]
+    return grid
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the dvc stages in one process, optionally as a parameter sweep")
+    parser.add_argument("--set", dest="overrides", action="append", default=[],
+                        help="dotted params.yaml key and one or more values, e.g. Train.LightGBM.n_estimators=100,200")
+    parser.add_argument("--targets", nargs="+", default=None, help="stages to run, upstream stages included")
+    parser.add_argument("--dry-run", action="store_true", help="do not write the dvc outs")
+    parser.add_argument("--output", default="reports/pipeline/runs.json")
+    args = parser.parse_args()
+
+    with open(root_path / "params.yaml") as f:
+        base_params = yaml.safe_load(f)
+    grid = parse_overrides(args.overrides)
+    combinations = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+    # one runner for the whole sweep so unchanged stages come from its cache
+    runner = PipelineRunner()
+    runs, best = [], None
+    for overrides in combinations:
+        start = time.perf_counter()
+        outputs, records = runner.run(with_overrides(base_params, overrides), targets=args.targets)
+        run = {"overrides": overrides,
+               "metrics": outputs.get("evaluate"),
+               "seconds": round(time.perf_counter() - start, 2),
+               "stages": records}
+        runs.append(run)
+        print(json.dumps({"overrides": overrides, "metrics": run["metrics"], "seconds": run["seconds"]}))
+        # the lowest cross validated error wins, the test split only reports,
+        # without evaluation there is no score and the last run does
+        score = run["metrics"]["cv_mae"] if run["metrics"] else None
+        if best is None or score is None or score < best[0]:
+            best = (score, overrides, outputs)
+
+    output_path = root_path / args.output
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump({"params_file": "params.yaml", "runs": runs}, f, indent=4)
+    print(f"Saved {len(runs)} runs to {output_path}")
+
+    # the dvc outs are written once, for the best run
+    if not args.dry_run:
+        _, overrides, outputs = best
+        written = write_outs(outputs)
+        print(f"Wrote {len(written)} dvc outs: {', '.join(written)}")
+        if overrides:
+            print(f"The outs come from {overrides}, set these in params.yaml before `dvc commit`")
+        else:
+            print("Run `dvc commit` to record them in dvc.lock")
@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+import numpy as np
+from pathlib import Path
+
+root_path = Path(__file__).parent.parent
+sys.path.insert(0, str(root_path))
+
+from src.serving.shadow import read_shadow_log
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+LATENCY_QUANTILES = [0.5, 0.95, 0.99]
+
+
+def describe(values: np.ndarray, quantiles: list) -> dict:
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        **{f"p{int(q * 100)}": float(np.quantile(values, q)) for q in quantiles}
+    }
+
+
+def ks_statistic(a: np.ndarray, b: np.ndarray) -> float:
+    # largest gap between the two empirical distribution functions
+    grid = np.sort(np.concatenate([a, b]))
+    cdf_a = np.searchsorted(np.sort(a), grid, side="right") / len(a)
+    cdf_b = np.searchsorted(np.sort(b), grid, side="right") / len(b)
+    return float(np.abs(cdf_a - cdf_b).max())
+
+
+def build_report(records: np.ndarray, versions: list) -> dict:
+    report = {}
+    pairs = np.unique(records[["primary_version", "challenger_version"]])
+    for primary_id, challenger_id in pairs.tolist():
+        pair = records[(records["primary_version"] == primary_id)
+                       & (records["challenger_version"] == challenger_id)]
+        primary = pair["primary_pred"].astype(float)
+        challenger = pair["challenger_pred"].astype(float)
+        diff = challenger - primary
+        report[f"{versions[primary_id]} vs {versions[challenger_id]}"] = {
+            "n_requests": int(len(pair)),
+            "primary_prediction": describe(primary, QUANTILES),
+            "challenger_prediction": describe(challenger, QUANTILES),
+            "difference": {
+                "mean": float(diff.mean()),
+                "mean_abs": float(np.abs(diff).mean()),
+                "max_abs": float(np.abs(diff).max())
+            },
+            "ks_statistic": ks_statistic(primary, challenger),
+            "primary_latency_ms": describe(pair["primary_ms"].astype(float), LATENCY_QUANTILES),
+            "challenger_latency_ms": describe(pair["challenger_ms"].astype(float), LATENCY_QUANTILES)
+        }
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare served and challenger predictions from the shadow log")
+    parser.add_argument("--log-dir", default="reports/shadow")
+    parser.add_argument("--output", default="reports/shadow/report.json")
+    args = parser.parse_args()
+
+    records, versions = read_shadow_log(root_path / args.log_dir)
+    if len(records) == 0:
+        sys.exit("The shadow log is empty")
+
+    report = build_report(records, versions)
+    print(json.dumps(report, indent=4))
+
+    output_path = root_path / args.output
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=4)
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 from pathlib import Path
 import logging
+from src.profiling import StageProfiler
 
 # create logger
 logger = logging.getLogger("data_cleaning")
@@ -219,9 +220,8 @@ def drop_columns(data: pd.DataFrame, columns: list) -> pd.DataFrame:
  
     
     
-def perform_data_cleaning(data: pd.DataFrame, saved_data_path: Path) -> None:
-    
-    cleaned_data = (
+def clean_data(data: pd.DataFrame) -> pd.DataFrame:
+    return (
         data
         .pipe(change_column_names)
         .pipe(data_cleaning)
@@ -230,6 +230,11 @@ def perform_data_cleaning(data: pd.DataFrame, saved_data_path: Path) -> None:
         .pipe(create_distance_type)
         .pipe(drop_columns,columns=columns_to_drop)
     )
+
+
+def perform_data_cleaning(data: pd.DataFrame, saved_data_path: Path) -> None:
+    
+    cleaned_data = clean_data(data)
     
     # save the data
     cleaned_data.to_csv(saved_data_path,index=False)
@@ -250,10 +255,13 @@ if __name__ == "__main__":
     # data load path
     data_load_path = root_path / "data" / "raw" / "swiggy.csv"
     
-    # load the data
-    df = load_data(data_load_path)
-    logger.info("Data read successfully")
-    
-    # clean the data and save
-    perform_data_cleaning(data=df, saved_data_path=cleaned_data_save_path)
-    logger.info("Data cleaned and saved")
+    with StageProfiler("data_cleaning") as profiler:
+        # load the data
+        with profiler.step("load"):
+            df = load_data(data_load_path)
+        logger.info("Data read successfully")
+        
+        # clean the data and save
+        with profiler.step("clean"):
+            perform_data_cleaning(data=df, saved_data_path=cleaned_data_save_path)
+        logger.info("Data cleaned and saved")
@@ -3,6 +3,7 @@ from sklearn.model_selection import train_test_split
 import yaml
 import logging
 from pathlib import Path
+from src.profiling import StageProfiler
 
 TARGET = "time_taken"
 # create logger
@@ -70,24 +71,28 @@ if __name__ == "__main__":
     # parameters file
     params_file_path = root_path / "params.yaml"
     
-    # load the cleaned data
-    df = load_data(data_path)
-    logger.info("Data Loaded Successfully")
-    
-    # read the parameters
-    parameters = read_params(params_file_path)['Data_Preparation']
-    test_size = parameters['test_size']
-    random_state = parameters['random_state']
-    logger.info("parameters read successfully")
-    
-    # split into train and test data
-    train_data, test_data = split_data(df,test_size=test_size,random_state=random_state)
-    logger.info("Dataset split into train and test data")
-    
-    # save the train and test data
-    data_subsets = [train_data,test_data]
-    data_paths = [save_train_path,save_test_path]
-    filename_list = [train_filename,test_filename]
-    for filename , path, data in zip(filename_list, data_paths, data_subsets):
-        save_data(data=data, save_path=path)
-        logger.info(f"{filename.replace(".csv","")} data saved to location")
+    with StageProfiler("data_preparation") as profiler:
+        # load the cleaned data
+        with profiler.step("load"):
+            df = load_data(data_path)
+        logger.info("Data Loaded Successfully")
+        
+        # read the parameters
+        parameters = read_params(params_file_path)['Data_Preparation']
+        test_size = parameters['test_size']
+        random_state = parameters['random_state']
+        logger.info("parameters read successfully")
+        
+        # split into train and test data
+        with profiler.step("split"):
+            train_data, test_data = split_data(df,test_size=test_size,random_state=random_state)
+        logger.info("Dataset split into train and test data")
+        
+        # save the train and test data
+        data_subsets = [train_data,test_data]
+        data_paths = [save_train_path,save_test_path]
+        filename_list = [train_filename,test_filename]
+        with profiler.step("save"):
+            for filename , path, data in zip(filename_list, data_paths, data_subsets):
+                save_data(data=data, save_path=path)
+                logger.info(f"{filename.replace(".csv","")} data saved to location")
@@ -0,0 +1,151 @@
+import threading
+import numpy as np
+import pandas as pd
+
+
+class CompiledPreprocessor:
+    """
+    Static inference plan for the fitted ColumnTransformer of
+    data_preprocessing.py. Fitting state is read once into scale and offset
+    values, category to column tables and ordinal code dicts, and
+    ``transform`` writes every output column straight into one float32
+    buffer, in the column order of ``get_feature_names_out``.
+
+    Only the steps used by this project are compiled: MinMaxScaler,
+    OneHotEncoder with drop and handle_unknown="ignore", OrdinalEncoder with
+    encoded missing and unknown values, and the passthrough remainder.
+    """
+
+    def __init__(self, preprocessor):
+        self.feature_names_in = list(preprocessor.feature_names_in_)
+        self.feature_names_out = list(preprocessor.get_feature_names_out())
+        # (input column, output position, scale, offset)
+        self.numeric = []
+        # (input column, [(category, output position)]), dropped or unknown categories write 0
+        self.one_hot = []
+        # (input column, output position, {category: code}, unknown code, missing code)
+        self.ordinal = []
+        # (input column, output position)
+        self.passthrough = []
+
+        position = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+            columns = [self.feature_names_in[c] if isinstance(c, (int, np.integer)) else c
+                       for c in columns]
+            kind = type(transformer).__name__
+            if transformer == "passthrough" or kind == "FunctionTransformer":
+                if kind == "FunctionTransformer" and transformer.func is not None:
+                    raise NotImplementedError(f"Cannot compile the function in {name}")
+                for column in columns:
+                    self.passthrough.append((column, position))
+                    position += 1
+            elif kind == "MinMaxScaler":
+                if transformer.clip:
+                    raise NotImplementedError("Clipped MinMaxScaler is not compiled")
+                for column, scale, offset in zip(columns, transformer.scale_, transformer.min_):
+                    self.numeric.append((column, position, float(scale), float(offset)))
+                    position += 1
+            elif kind == "OneHotEncoder":
+                if transformer.handle_unknown != "ignore" or transformer.max_categories is not None \
+                        or transformer.min_frequency is not None:
+                    raise NotImplementedError("Only OneHotEncoder(handle_unknown='ignore') is compiled")
+                drop_idx = transformer.drop_idx_
+                for i, (column, categories) in enumerate(zip(columns, transformer.categories_)):
+                    dropped = None if drop_idx is None else drop_idx[i]
+                    targets = []
+                    for j, category in enumerate(categories):
+                        if j == dropped:
+                            continue
+                        targets.append((category, position))
+                        position += 1
+                    self.one_hot.append((column, targets))
+            elif kind == "OrdinalEncoder":
+                unknown = (transformer.unknown_value
+                           if transformer.handle_unknown == "use_encoded_value" else np.nan)
+                for column, categories in zip(columns, transformer.categories_):
+                    codes = {category: float(code) for code, category in enumerate(categories)
+                             if not pd.isna(category)}
+                    # the missing code is only used when missing values were seen
+                    # as a category, otherwise they are unknown like sklearn does
+                    missing = (float(transformer.encoded_missing_value)
+                               if len(codes) < len(categories) else float(unknown))
+                    self.ordinal.append((column, position, codes, float(unknown), missing))
+                    position += 1
+            else:
+                raise NotImplementedError(f"Cannot compile a {kind} in {name}")
+
+        if position != len(self.feature_names_out):
+            raise ValueError(f"Plan writes {position} columns, the preprocessor "
+                             f"has {len(self.feature_names_out)}")
+        self.n_features_out = position
+
+    def transform(self, data: pd.DataFrame, out: np.ndarray = None) -> np.ndarray:
+        """
+        Encode ``data`` into ``out``, a float32 array of shape
+        (len(data), n_features_out) that is allocated when not given.
+        """
+        n_rows = len(data)
+        if out is None:
+            out = np.empty((n_rows, self.n_features_out), dtype=np.float32)
+
+        for column, position, scale, offset in self.numeric:
+            # float64 like MinMaxScaler, to_numpy may be a view of the frame
+            values = data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            out[:, position] = values * scale + offset
+
+        # elementwise comparisons beat hashing for the few categories per column
+        for column, targets in self.one_hot:
+            values = data[column].to_numpy()
+            for category, position in targets:
+                out[:, position] = values == category
+
+        for column, position, codes, unknown, missing in self.ordinal:
+            values = data[column].to_numpy()
+            encoded = out[:, position]
+            encoded.fill(unknown)
+            for category, code in codes.items():
+                encoded[values == category] = code
+            encoded[pd.isna(values)] = missing
+
+        for column, position in self.passthrough:
+            out[:, position] = data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        return out
+
+
+class CompiledPipeline:
+    """
+    Compiled preprocessor in front of the fitted model. Each serving thread
+    keeps its own feature buffer, grown to the largest batch it has seen,
+    so single row requests allocate nothing for the features. A model
+    fitted with feature names gets the buffer as a frame with those names,
+    checked once here against the preprocessor outputs.
+    """
+
+    def __init__(self, preprocessor, model):
+        self.preprocessor = CompiledPreprocessor(preprocessor)
+        self.model = model
+        fitted_names = getattr(model, "feature_names_in_", None)
+        if fitted_names is not None and list(fitted_names) != self.preprocessor.feature_names_out:
+            raise ValueError("The model was fitted on other features than the preprocessor outputs")
+        self._columns = None if fitted_names is None else self.preprocessor.feature_names_out
+        self._local = threading.local()
+
+    def _buffer(self, n_rows: int) -> np.ndarray:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < n_rows:
+            buffer = np.empty((max(n_rows, 1), self.preprocessor.n_features_out), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer[:n_rows]
+
+    def transform(self, data: pd.DataFrame) -> np.ndarray:
+        return self.preprocessor.transform(data, out=self._buffer(len(data)))
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        features = self.transform(data)
+        if self._columns is not None:
+            # a single float32 block, wrapped without a copy
+            features = pd.DataFrame(features, columns=self._columns, copy=False)
+        return self.model.predict(features)
@@ -8,6 +8,9 @@ from sklearn.preprocessing import (
     OrdinalEncoder)
 import joblib
 from sklearn import set_config
+from src.profiling import StageProfiler
+from src.models.artifacts import save_artifact
+from src.features.drift import FeatureSketch
 
 # set the transformer outputs to pandas
 set_config(transform_output='pandas')
@@ -75,6 +78,23 @@ def drop_missing_values(data: pd.DataFrame) -> pd.DataFrame:
     return df_dropped
 
 
+def build_preprocessor() -> ColumnTransformer:
+    return ColumnTransformer(transformers=[
+            ("scale", MinMaxScaler(), num_cols),
+            ("nominal_encode", OneHotEncoder(drop="first",
+                                            handle_unknown="ignore",
+                                            sparse_output=False), nominal_cat_cols),
+            ("ordinal_encode", OrdinalEncoder(categories=[traffic_order,
+                                                          distance_type_order],
+                                            encoded_missing_value=-999,
+                                            handle_unknown="use_encoded_value",
+                                            unknown_value=-1), ordinal_cat_cols)],
+                                    remainder="passthrough",
+                                    n_jobs=-1,
+                                    force_int_remainder_cols=False,
+                                    verbose_feature_names_out=False)
+
+
 def save_transformer(transformer, save_dir: Path, transformer_name: str):
     # form the save location
     save_location = save_dir / transformer_name
@@ -127,65 +147,62 @@ if __name__ == "__main__":
     save_test_trans_path = save_data_dir / test_trans_filename
     
     # preprocessor
-    preprocessor = ColumnTransformer(transformers=[
-            ("scale", MinMaxScaler(), num_cols),
-            ("nominal_encode", OneHotEncoder(drop="first",
-                                            handle_unknown="ignore",
-                                            sparse_output=False), nominal_cat_cols),
-            ("ordinal_encode", OrdinalEncoder(categories=[traffic_order,
-                                                          distance_type_order],
-                                            encoded_missing_value=-999,
-                                            handle_unknown="use_encoded_value",
-                                            unknown_value=-1), ordinal_cat_cols)],
-                                    remainder="passthrough",
-                                    n_jobs=-1,
-                                    force_int_remainder_cols=False,
-                                    verbose_feature_names_out=False)
-    
-    
-    # load the train and test data with missing values dropped
-    train_df = drop_missing_values(load_data(data_path=train_data_path))
-    logger.info("Train data loaded successfully")
-    test_df = drop_missing_values(load_data(data_path=test_data_path))
-    logger.info("Test data loaded successfully")
+    preprocessor = build_preprocessor()
     
-    # split the train and test data
-    X_train, y_train = make_X_and_y(data=train_df,target_column=target_col)
-    X_test, y_test = make_X_and_y(data=test_df, target_column=target_col)
-    logger.info("Data splitting completed")
     
-    # fit the preprocessor on X_train
-    train_preprocessor(preprocessor=preprocessor, data=X_train)
-    logger.info("Preprocessor is trained")
-    
-    # transform the data
-    X_train_trans =  perform_transformations(preprocessor=preprocessor, data=X_train)
-    logger.info("Train data is transformed")
-    X_test_trans = perform_transformations(preprocessor=preprocessor, data=X_test)
-    logger.info("Test data is transformed")
-    
-    # join back X and y
-    train_trans_df = join_X_and_y(X_train_trans, y_train)
-    test_trans_df = join_X_and_y(X_test_trans, y_test)
-    logger.info("Datasets joined")
-    
-    # save the transformed data
-    data_subsets = [train_trans_df, test_trans_df]
-    data_paths = [save_train_trans_path,save_test_trans_path]
-    filename_list = [train_trans_filename, test_trans_filename]
-    for filename , path, data in zip(filename_list, data_paths, data_subsets):
-        save_data(data=data, save_path=path)
-        logger.info(f"{filename.replace(".csv","")} data saved to location")
+    with StageProfiler("data_preprocessing") as profiler:
+        # load the train and test data with missing values dropped
+        with profiler.step("load"):
+            train_df = drop_missing_values(load_data(data_path=train_data_path))
+            logger.info("Train data loaded successfully")
+            test_df = drop_missing_values(load_data(data_path=test_data_path))
+            logger.info("Test data loaded successfully")
         
-    # save the preprocessor to location
-    # transformer name
-    transformer_filename = "preprocessor.joblib"
-    # directory to save transformers
-    transformer_save_dir = root_path / "models"
-    transformer_save_dir.mkdir(exist_ok=True)
-    # save the transformer
-    save_transformer(transformer=preprocessor,
-                     save_dir=transformer_save_dir,
-                     transformer_name=transformer_filename)
-    logger.info("Preprocessor saved to location")
-    
+        # split the train and test data
+        X_train, y_train = make_X_and_y(data=train_df,target_column=target_col)
+        X_test, y_test = make_X_and_y(data=test_df, target_column=target_col)
+        logger.info("Data splitting completed")
+        
+        # fit the preprocessor on X_train
+        with profiler.step("fit_preprocessor"):
+            train_preprocessor(preprocessor=preprocessor, data=X_train)
+        logger.info("Preprocessor is trained")
+        
+        # transform the data
+        with profiler.step("transform"):
+            X_train_trans =  perform_transformations(preprocessor=preprocessor, data=X_train)
+            logger.info("Train data is transformed")
+            X_test_trans = perform_transformations(preprocessor=preprocessor, data=X_test)
+            logger.info("Test data is transformed")
+        
+            # join back X and y
+            train_trans_df = join_X_and_y(X_train_trans, y_train)
+            test_trans_df = join_X_and_y(X_test_trans, y_test)
+            logger.info("Datasets joined")
+        
+        # save the transformed data
+        data_subsets = [train_trans_df, test_trans_df]
+        data_paths = [save_train_trans_path,save_test_trans_path]
+        filename_list = [train_trans_filename, test_trans_filename]
+        with profiler.step("save"):
+            for filename , path, data in zip(filename_list, data_paths, data_subsets):
+                save_data(data=data, save_path=path)
+                logger.info(f"{filename.replace(".csv","")} data saved to location")
+                
+            # save the preprocessor to location
+            # transformer name
+            transformer_filename = "preprocessor.joblib"
+            # directory to save transformers
+            transformer_save_dir = root_path / "models"
+            transformer_save_dir.mkdir(exist_ok=True)
+            # save the transformer
+            save_transformer(transformer=preprocessor,
+                             save_dir=transformer_save_dir,
+                             transformer_name=transformer_filename)
+            logger.info("Preprocessor saved to location")
+            # save the preprocessor as a memory mappable array bundle
+            save_artifact(preprocessor, transformer_save_dir / "preprocessor.bundle")
+            logger.info("Preprocessor bundle saved to location")
+            # reference feature profile that live traffic is compared with
+            FeatureSketch.from_reference(X_train).save(transformer_save_dir / "drift_reference.json")
+            logger.info("Drift reference profile saved to location")
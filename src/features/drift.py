@@ -0,0 +1,203 @@
+import json
+import math
+import os
+import threading
+from bisect import bisect_right
+from pathlib import Path
+import numpy as np
+
+# features tracked for drift, as they come out of the cleaning
+NUMERIC_FEATURES = ["age", "ratings", "pickup_time_minutes", "distance"]
+CATEGORICAL_FEATURES = ["weather", "traffic", "type_of_order", "type_of_vehicle", "festival",
+                        "city_type", "is_weekend", "order_time_of_day", "distance_type",
+                        "vehicle_condition", "multiple_deliveries"]
+
+# values past this many distinct ones per column are counted together
+MAX_CATEGORIES = 64
+OTHER = "__other__"
+MISSING = "__missing__"
+# smoothing for empty bins in the population stability index
+PSI_EPSILON = 1e-4
+
+
+def _category(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return MISSING
+    # 2.0 and 2 are the same category
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+class FeatureSketch:
+    """
+    Constant memory summary of the cleaned features: a fixed bin histogram
+    per numeric feature, with an underflow, an overflow and a missing
+    bucket, and a capped frequency counter per categorical feature.
+
+    Sketches with the same bin edges add up, so the ones kept by several
+    workers can be merged into one, and a reference sketch built from the
+    training data gives the bin edges to every live one.
+    """
+
+    def __init__(self, bin_edges: dict):
+        self.bin_edges = {name: [float(edge) for edge in edges]
+                          for name, edges in bin_edges.items()}
+        # underflow, one count per bin, overflow, missing
+        self.histograms = {name: [0] * (len(edges) + 2) for name, edges in self.bin_edges.items()}
+        self.counters = {name: {} for name in CATEGORICAL_FEATURES}
+        self.n = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_reference(cls, data, n_bins: int = 20) -> "FeatureSketch":
+        # bins span the training range of every numeric feature
+        bin_edges = {}
+        for name in NUMERIC_FEATURES:
+            values = data[name].dropna().to_numpy(dtype=float)
+            low, high = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+            bin_edges[name] = np.linspace(low, high, n_bins + 1).tolist()
+        sketch = cls(bin_edges)
+        sketch.update_frame(data)
+        return sketch
+
+    def update_row(self, row: dict) -> None:
+        """
+        Add one cleaned row given as a dict. This is the per request path,
+        plain python on a handful of scalars.
+        """
+        with self._lock:
+            self.n += 1
+            for name, edges in self.bin_edges.items():
+                value = row.get(name)
+                histogram = self.histograms[name]
+                if value is None or value != value:
+                    histogram[-1] += 1
+                elif value == edges[-1]:
+                    # the last bin is closed on the right
+                    histogram[-3] += 1
+                else:
+                    histogram[bisect_right(edges, value)] += 1
+            for name, counter in self.counters.items():
+                key = _category(row.get(name))
+                if key not in counter and len(counter) >= MAX_CATEGORIES:
+                    key = OTHER
+                counter[key] = counter.get(key, 0) + 1
+
+    def update_frame(self, data) -> None:
+        # vectorised update for whole datasets
+        with self._lock:
+            self.n += len(data)
+            for name, edges in self.bin_edges.items():
+                values = data[name].to_numpy(dtype=float)
+                missing = np.isnan(values)
+                present = values[~missing]
+                index = np.searchsorted(edges, present, side="right")
+                index[present == edges[-1]] = len(edges) - 1
+                counts = np.bincount(index, minlength=len(edges) + 1)
+                histogram = self.histograms[name]
+                for i, count in enumerate(counts):
+                    histogram[i] += int(count)
+                histogram[-1] += int(missing.sum())
+            for name, counter in self.counters.items():
+                for value, count in data[name].value_counts(dropna=False).items():
+                    key = _category(value)
+                    if key not in counter and len(counter) >= MAX_CATEGORIES:
+                        key = OTHER
+                    counter[key] = counter.get(key, 0) + int(count)
+
+    def merge(self, other: "FeatureSketch") -> None:
+        if other.bin_edges != self.bin_edges:
+            raise ValueError("Only sketches with the same bin edges can be merged")
+        with self._lock:
+            self.n += other.n
+            for name, histogram in other.histograms.items():
+                self.histograms[name] = [a + b for a, b in zip(self.histograms[name], histogram)]
+            for name, counter in other.counters.items():
+                own = self.counters[name]
+                for key, count in counter.items():
+                    if key not in own and len(own) >= MAX_CATEGORIES:
+                        key = OTHER
+                    own[key] = own.get(key, 0) + count
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"n": self.n,
+                    "bin_edges": self.bin_edges,
+                    "histograms": {name: list(counts) for name, counts in self.histograms.items()},
+                    "counters": {name: dict(counter) for name, counter in self.counters.items()}}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureSketch":
+        sketch = cls(data["bin_edges"])
+        sketch.n = data["n"]
+        sketch.histograms = {name: list(counts) for name, counts in data["histograms"].items()}
+        sketch.counters = {name: dict(counter) for name, counter in data["counters"].items()}
+        return sketch
+
+    def save(self, file_path: Path) -> None:
+        # write then rename so a merging reader never sees half a sketch
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: Path) -> "FeatureSketch":
+        with open(file_path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _proportions(counts) -> np.ndarray:
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum()
+    return counts / total if total else counts
+
+
+def population_stability_index(reference_counts, live_counts) -> float:
+    expected = np.clip(_proportions(reference_counts), PSI_EPSILON, None)
+    actual = np.clip(_proportions(live_counts), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks_statistic(reference_counts, live_counts) -> float:
+    # largest gap between the two cumulative distributions at the bin edges
+    reference_cdf = np.cumsum(_proportions(reference_counts))
+    live_cdf = np.cumsum(_proportions(live_counts))
+    return float(np.abs(reference_cdf - live_cdf).max())
+
+
+def drift_report(reference: FeatureSketch, live: FeatureSketch, psi_threshold: float = 0.2) -> dict:
+    """
+    PSI and binned KS per numeric feature, PSI per categorical feature plus
+    the live values never seen in training.
+    """
+    features = {}
+    for name in reference.bin_edges:
+        # the missing bucket is not part of the ordered distribution
+        reference_counts = reference.histograms[name][:-1]
+        live_counts = live.histograms[name][:-1]
+        features[name] = {
+            "psi": population_stability_index(reference_counts, live_counts),
+            "ks": binned_ks_statistic(reference_counts, live_counts),
+            "missing_rate": live.histograms[name][-1] / live.n if live.n else 0.0
+        }
+    for name, reference_counter in reference.counters.items():
+        live_counter = live.counters.get(name, {})
+        keys = sorted(set(reference_counter) | set(live_counter))
+        features[name] = {
+            "psi": population_stability_index([reference_counter.get(key, 0) for key in keys],
+                                              [live_counter.get(key, 0) for key in keys]),
+            "unseen_values": sorted(key for key in live_counter if key not in reference_counter)
+        }
+
+    return {
+        "n_reference": reference.n,
+        "n_live": live.n,
+        "psi_threshold": psi_threshold,
+        "drifted_features": sorted(name for name, scores in features.items()
+                                   if scores["psi"] >= psi_threshold),
+        "features": features
+    }
@@ -0,0 +1,101 @@
+import argparse
+import numpy as np
+import pandas as pd
+import logging
+from pathlib import Path
+from src.profiling import StageProfiler
+from src.data.data_cleaning import (
+    load_data, change_column_names, data_cleaning, clean_lat_long, calculate_haversine_distance
+)
+from src.features.rider_store import DAY_ORIGIN, STATS, RiderFeatureTable, normalise_rider_id
+
+# create logger
+logger = logging.getLogger("rider_features")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+def clean_with_rider_id(data: pd.DataFrame) -> pd.DataFrame:
+    # the cleaning of data_cleaning.py up to the distance, before rider_id is dropped
+    return (
+        data
+        .pipe(change_column_names)
+        .pipe(data_cleaning)
+        .pipe(clean_lat_long)
+        .pipe(calculate_haversine_distance)
+    )
+
+
+def compute_rider_stats(data: pd.DataFrame) -> tuple:
+    """
+    Additive statistics per rider from cleaned rows, in the order of
+    rider_store.STATS. Only features known at order time are used, never
+    the time taken, so the table can sit next to the model inputs.
+    """
+    day = ((data["order_date"].to_numpy(dtype="datetime64[D]") - DAY_ORIGIN)
+           .astype(np.float64))
+    rated = data["ratings"].notna()
+    ratings = data["ratings"].fillna(0)
+    columns = pd.DataFrame({
+        "rider_id": data["rider_id"].map(normalise_rider_id),
+        "orders": 1.0,
+        "pickup_n": data["pickup_time_minutes"].notna().astype(float),
+        "pickup_sum": data["pickup_time_minutes"].fillna(0),
+        "distance_n": data["distance"].notna().astype(float),
+        "distance_sum": data["distance"].fillna(0),
+        "ratings_n": rated.astype(float),
+        "day_sum": np.where(rated, day, 0),
+        "ratings_sum": ratings,
+        "day_sq_sum": np.where(rated, day ** 2, 0),
+        "day_ratings_sum": np.where(rated, day * ratings, 0),
+        "multiple_n": data["multiple_deliveries"].notna().astype(float),
+        "multiple_sum": data["multiple_deliveries"].fillna(0),
+    })
+    grouped = columns.groupby("rider_id", sort=True)[STATS].sum()
+    return grouped.index.tolist(), grouped.to_numpy(dtype=np.float64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the rider feature table")
+    parser.add_argument("--update", default=None,
+                        help="raw csv with only new orders to fold into the existing table")
+    args = parser.parse_args()
+
+    # root path
+    root_path = Path(__file__).parent.parent.parent
+    # raw data, the new orders when refreshing
+    data_path = Path(args.update) if args.update else root_path / "data" / "raw" / "swiggy.csv"
+    # table save path
+    table_path = root_path / "models" / "rider_features.bundle"
+
+    with StageProfiler("rider_features") as profiler:
+        # load and clean the raw orders keeping the rider id
+        with profiler.step("clean"):
+            cleaned = clean_with_rider_id(load_data(data_path))
+        logger.info(f"{len(cleaned)} cleaned orders from {data_path}")
+
+        # aggregate per rider
+        with profiler.step("aggregate"):
+            rider_ids, stats = compute_rider_stats(cleaned)
+            if args.update:
+                # new statistics add to the existing ones
+                table = RiderFeatureTable.load(table_path, mmap_mode=None).update(rider_ids, stats)
+            else:
+                table = RiderFeatureTable(rider_ids, stats)
+
+        # save the table
+        with profiler.step("save"):
+            table.save(table_path)
+        logger.info(f"Rider feature table version {table.version} with "
+                    f"{len(table.rider_ids)} riders saved to {table_path}")
@@ -0,0 +1,181 @@
+import os
+import time
+import numpy as np
+from pathlib import Path
+
+# additive per rider statistics, sums of a value go with the count of rows
+# where it was present so that missing values do not bias the averages
+STATS = ["orders",
+         "pickup_n", "pickup_sum",
+         "distance_n", "distance_sum",
+         "ratings_n", "day_sum", "ratings_sum", "day_sq_sum", "day_ratings_sum",
+         "multiple_n", "multiple_sum"]
+
+# features served per rider, derived from the statistics
+FEATURES = ["rider_orders",
+            "rider_avg_pickup_minutes",
+            "rider_avg_distance",
+            "rider_avg_ratings",
+            "rider_ratings_trend",
+            "rider_avg_multiple_deliveries"]
+
+# order dates are counted in days from here for the ratings trend
+DAY_ORIGIN = np.datetime64("2022-01-01")
+
+_STAT = {name: i for i, name in enumerate(STATS)}
+
+
+def normalise_rider_id(rider_id) -> str:
+    return str(rider_id).strip().upper()
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+
+def features_from_stats(stats: np.ndarray) -> np.ndarray:
+    # one feature row per statistics row, vectorised over riders
+    column = lambda name: stats[:, _STAT[name]]
+    ratings_n = column("ratings_n")
+    # least squares slope of the ratings over the order day, in rating per day
+    slope_numerator = ratings_n * column("day_ratings_sum") - column("day_sum") * column("ratings_sum")
+    slope_denominator = ratings_n * column("day_sq_sum") - column("day_sum") ** 2
+    trend = _ratio(slope_numerator, np.where(np.abs(slope_denominator) > 1e-9, slope_denominator, 0))
+    features = np.column_stack([
+        column("orders"),
+        _ratio(column("pickup_sum"), column("pickup_n")),
+        _ratio(column("distance_sum"), column("distance_n")),
+        _ratio(column("ratings_sum"), ratings_n),
+        np.nan_to_num(trend, nan=0.0),
+        _ratio(column("multiple_sum"), column("multiple_n")),
+    ])
+    return features.astype(np.float32)
+
+
+class RiderFeatureTable:
+    """
+    Compact per rider feature table. Rider IDs are encoded as row numbers,
+    row 0 is the default row for riders never seen, and rider i sits in row
+    i + 1 of ``features``.
+
+    ``stats`` keeps the additive statistics behind the features, so new
+    data is folded in with ``update`` without going back to the full
+    history.
+    """
+
+    def __init__(self, rider_ids: list, stats: np.ndarray, version: int = 1):
+        self.rider_ids = np.asarray(rider_ids, dtype=object)
+        self.stats = np.asarray(stats, dtype=np.float64)
+        self.version = version
+        self.features = self._build_features()
+
+    def _build_features(self) -> np.ndarray:
+        # population averages as the default row, with no orders or trend of its own
+        default = features_from_stats(self.stats.sum(axis=0, keepdims=True))
+        default[:, FEATURES.index("rider_orders")] = 0
+        default[:, FEATURES.index("rider_ratings_trend")] = 0
+        return np.vstack([default, features_from_stats(self.stats)])
+
+    def update(self, rider_ids: list, stats: np.ndarray) -> "RiderFeatureTable":
+        # add the statistics of new data, riders not in the table get new rows
+        index = {rider_id: i for i, rider_id in enumerate(self.rider_ids)}
+        merged = self.stats.copy()
+        new_ids, new_rows = [], []
+        for rider_id, row in zip(rider_ids, np.asarray(stats, dtype=np.float64)):
+            if rider_id in index:
+                merged[index[rider_id]] += row
+            else:
+                index[rider_id] = len(self.rider_ids) + len(new_ids)
+                new_ids.append(rider_id)
+                new_rows.append(row)
+        if new_rows:
+            merged = np.vstack([merged, np.asarray(new_rows)])
+        return RiderFeatureTable(list(self.rider_ids) + new_ids, merged, version=self.version + 1)
+
+    def save(self, save_path: Path) -> None:
+        from src.models.artifacts import save_artifact
+
+        # write then rename so a serving process never maps half a table
+        save_path = Path(save_path)
+        tmp_path = save_path.with_name(f"{save_path.name}.{os.getpid()}.tmp")
+        save_artifact({"version": self.version,
+                       "feature_names": FEATURES,
+                       "stats_names": STATS,
+                       "rider_ids": list(self.rider_ids),
+                       "stats": self.stats,
+                       "features": self.features}, tmp_path)
+        os.replace(tmp_path, save_path)
+
+    @classmethod
+    def load(cls, load_path: Path, mmap_mode: str = "r") -> "RiderFeatureTable":
+        from src.models.artifacts import load_artifact
+
+        data = load_artifact(load_path, mmap_mode=mmap_mode)
+        if data["feature_names"] != FEATURES or data["stats_names"] != STATS:
+            raise ValueError(f"{load_path} was built with other rider features")
+        table = cls.__new__(cls)
+        table.rider_ids = np.asarray(data["rider_ids"], dtype=object)
+        table.stats = data["stats"]
+        # a view on the mapped file, shared between the serving workers
+        table.features = data["features"]
+        table.version = data["version"]
+        return table
+
+
+class RiderFeatureStore:
+    """
+    Serving side of the rider table: the feature rows are memory mapped and
+    a dict maps each rider ID to its row, so a lookup is one dict access
+    and one row read. The file is checked for a newer table at most every
+    ``check_interval`` seconds, on lookup, and swapped in as one reference.
+    """
+
+    def __init__(self, table_path: Path, check_interval: float = 30.0):
+        self.table_path = Path(table_path)
+        self.check_interval = check_interval
+        self._state = None
+        self._mtime_ns = None
+        self._next_check = 0.0
+        self.refresh()
+
+    def refresh(self) -> bool:
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            mtime_ns = self.table_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime_ns == self._mtime_ns:
+            return False
+        table = RiderFeatureTable.load(self.table_path)
+        index = {rider_id: i + 1 for i, rider_id in enumerate(table.rider_ids)}
+        self._state = (table, index)
+        self._mtime_ns = mtime_ns
+        return True
+
+    @property
+    def version(self):
+        return self._state[0].version if self._state is not None else None
+
+    def lookup(self, rider_id: str) -> tuple:
+        """
+        Return the feature row of ``rider_id`` and whether the rider is
+        known. Unseen riders get the default row.
+        """
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        if self._state is None:
+            raise LookupError(f"No rider feature table at {self.table_path}")
+        table, index = self._state
+        row = index.get(normalise_rider_id(rider_id), 0)
+        return table.features[row], row != 0
+
+    def lookup_dict(self, rider_id: str) -> dict:
+        row, known = self.lookup(rider_id)
+        features = {name: (None if np.isnan(value) else float(value))
+                    for name, value in zip(FEATURES, row)}
+        return {"rider_id": normalise_rider_id(rider_id),
+                "known": known,
+                "version": self.version,
+                "features": features}
@@ -0,0 +1,180 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import mmap
+import pickle
+import struct
+import numpy as np
+from pathlib import Path
+
+# file layout
+# [array data, every block page aligned][pickle stream][json header][footer]
+# the footer holds the header offset, the header length and the magic bytes
+MAGIC = b"SWGBNDL1"
+FOOTER = struct.Struct("<QQ8s")
+FORMAT_VERSION = 1
+
+# arrays and strings smaller than this stay inside the pickle stream
+MIN_EXTERNAL_NBYTES = 1024
+
+COMPRESSORS = {
+    "gzip": (gzip.compress, gzip.decompress, b"\x1f\x8b"),
+    "bz2": (bz2.compress, bz2.decompress, b"BZh"),
+    "lzma": (lzma.compress, lzma.decompress, b"\xfd7zXZ\x00"),
+}
+
+
+class _BundlePickler(pickle.Pickler):
+    # moves large numpy arrays and strings (lightgbm model text) out of the pickle
+    def __init__(self, file, block_file, min_nbytes: int, alignment: int):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file = block_file
+        self._min_nbytes = min_nbytes
+        self._alignment = alignment
+        self.blocks = []
+        # keeps shared arrays shared, the object is held so its id stays unique
+        self._seen = {}
+
+    def _write_block(self, data: memoryview) -> int:
+        offset = -(-self._file.tell() // self._alignment) * self._alignment
+        self._file.seek(offset)
+        self._file.write(data)
+        return offset
+
+    def persistent_id(self, obj):
+        if id(obj) in self._seen:
+            return self._seen[id(obj)][0]
+        if (type(obj) is np.ndarray and not obj.dtype.hasobject
+                and obj.nbytes >= self._min_nbytes):
+            array = np.ascontiguousarray(obj)
+            offset = self._write_block(memoryview(array).cast("B"))
+            self.blocks.append({"kind": "ndarray",
+                                "offset": offset,
+                                "nbytes": array.nbytes,
+                                "descr": np.lib.format.dtype_to_descr(array.dtype),
+                                "shape": list(array.shape)})
+            return self._remember(obj)
+        if type(obj) is str and len(obj) >= self._min_nbytes:
+            encoded = obj.encode("utf-8")
+            offset = self._write_block(memoryview(encoded))
+            self.blocks.append({"kind": "str",
+                                "offset": offset,
+                                "nbytes": len(encoded)})
+            return self._remember(obj)
+        return None
+
+    def _remember(self, obj) -> int:
+        pid = len(self.blocks) - 1
+        self._seen[id(obj)] = (pid, obj)
+        return pid
+
+
+class _BundleUnpickler(pickle.Unpickler):
+    def __init__(self, file, buffer, blocks: list):
+        super().__init__(file)
+        self._buffer = buffer
+        self._blocks = blocks
+
+    def persistent_load(self, pid):
+        block = self._blocks[pid]
+        if block["kind"] == "str":
+            start = block["offset"]
+            return bytes(self._buffer[start:start + block["nbytes"]]).decode("utf-8")
+        dtype = np.lib.format.descr_to_dtype(block["descr"])
+        count = block["nbytes"] // dtype.itemsize if dtype.itemsize else 0
+        array = np.frombuffer(self._buffer, dtype=dtype, count=count,
+                              offset=block["offset"])
+        return array.reshape(block["shape"])
+
+
+def _write_bundle(obj, file, min_nbytes: int, alignment: int) -> None:
+    # array blocks are written first, starting on the first aligned offset
+    file.write(MAGIC)
+    # the stripped pickle stays in memory while the blocks stream to the file
+    pickle_stream = io.BytesIO()
+    pickler = _BundlePickler(pickle_stream, file, min_nbytes=min_nbytes, alignment=alignment)
+    pickler.dump(obj)
+
+    pickle_offset = file.seek(0, io.SEEK_END)
+    file.write(pickle_stream.getbuffer())
+    header = json.dumps({"format_version": FORMAT_VERSION,
+                         "alignment": alignment,
+                         "pickle_offset": pickle_offset,
+                         "pickle_nbytes": pickle_stream.getbuffer().nbytes,
+                         "blocks": pickler.blocks}).encode("utf-8")
+    header_offset = file.tell()
+    file.write(header)
+    file.write(FOOTER.pack(header_offset, len(header), MAGIC))
+
+
+def save_artifact(obj, save_path: Path, compress: str = None,
+                  min_nbytes: int = MIN_EXTERNAL_NBYTES,
+                  alignment: int = mmap.PAGESIZE) -> Path:
+    """
+    Save ``obj`` in the array bundle format.
+
+    Large numpy arrays (tree node and value arrays, scaler statistics,
+    encoder categories) and long strings (the LightGBM model text) are stored
+    raw and page aligned after the pickle stream is stripped of them, so an
+    uncompressed bundle can be loaded with ``mmap_mode``. ``compress`` takes
+    one of ``gzip``, ``bz2`` or ``lzma`` for a smaller transport copy that is
+    decompressed into memory on load.
+    """
+    save_path = Path(save_path)
+    if compress is None:
+        with open(save_path, "wb") as f:
+            _write_bundle(obj, f, min_nbytes=min_nbytes, alignment=alignment)
+        return save_path
+
+    if compress not in COMPRESSORS:
+        raise ValueError(f"Unknown compression {compress}, expected one of {list(COMPRESSORS)}")
+    buffer = io.BytesIO()
+    _write_bundle(obj, buffer, min_nbytes=min_nbytes, alignment=alignment)
+    compressor = COMPRESSORS[compress][0]
+    with open(save_path, "wb") as f:
+        f.write(compressor(buffer.getbuffer()))
+    return save_path
+
+
+def _read_buffer(load_path: Path, mmap_mode: str):
+    with open(load_path, "rb") as f:
+        prefix = f.read(len(MAGIC))
+
+    for _, decompressor, magic in COMPRESSORS.values():
+        if prefix.startswith(magic):
+            with open(load_path, "rb") as f:
+                return decompressor(f.read())
+
+    if prefix != MAGIC:
+        raise ValueError(f"{load_path} is not an array bundle")
+    if mmap_mode is None:
+        with open(load_path, "rb") as f:
+            return f.read()
+    return np.memmap(load_path, dtype=np.uint8, mode=mmap_mode)
+
+
+def load_artifact(load_path: Path, mmap_mode: str = "r"):
+    """
+    Load an object saved with ``save_artifact``.
+
+    With ``mmap_mode`` set the stored arrays are views on the memory mapped
+    file and are shared between processes through the page cache. Objects
+    that copy their arrays on unpickling (sklearn trees) still get a private
+    copy, but skip the parsing cost. Compressed bundles are always loaded
+    into memory.
+    """
+    buffer = _read_buffer(Path(load_path), mmap_mode)
+    view = memoryview(buffer).cast("B") if isinstance(buffer, np.ndarray) else memoryview(buffer)
+
+    header_offset, header_nbytes, magic = FOOTER.unpack(view[-FOOTER.size:])
+    if magic != MAGIC:
+        raise ValueError(f"{load_path} has a corrupted footer")
+    header = json.loads(bytes(view[header_offset:header_offset + header_nbytes]))
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle version {header['format_version']}")
+
+    pickle_start = header["pickle_offset"]
+    pickle_stream = io.BytesIO(view[pickle_start:pickle_start + header["pickle_nbytes"]])
+    return _BundleUnpickler(pickle_stream, view, header["blocks"]).load()
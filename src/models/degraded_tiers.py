@@ -0,0 +1,127 @@
+import time
+import joblib
+import logging
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import cross_val_predict
+from src.profiling import StageProfiler
+from src.models.artifacts import save_artifact
+from src.models.lgbm_tier import LightGBMTier
+from src.models.prune_forest import (
+    build_pruned_model, load_data, make_X_and_y, measure_latency, out_of_bag_mask,
+    per_tree_predictions, prefix_means, rank_trees, read_params, save_json
+)
+
+TARGET = "time_taken"
+
+# create logger
+logger = logging.getLogger("degraded_tiers")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+def batch_latency(model, X: pd.DataFrame, repeats: int) -> float:
+    # median latency in milliseconds of the whole test split as one batch
+    model.predict(X)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+if __name__ == "__main__":
+    # root path
+    root_path = Path(__file__).parent.parent.parent
+    # data load paths
+    train_data_path = root_path / "data" / "processed" / "train_trans.csv"
+    test_data_path = root_path / "data" / "processed" / "test_trans.csv"
+    # model paths
+    model_path = root_path / "models" / "model.joblib"
+    preprocessor_path = root_path / "models" / "preprocessor.joblib"
+    # parameters file
+    params_file_path = root_path / "params.yaml"
+    # tiers and reports directories
+    tier_dir = root_path / "models" / "tiers"
+    tier_dir.mkdir(exist_ok=True, parents=True)
+    report_dir = root_path / "reports" / "tiers"
+    report_dir.mkdir(exist_ok=True, parents=True)
+
+    with StageProfiler("degraded_tiers") as profiler:
+        # read the parameters
+        tier_params = read_params(params_file_path)["Tiers"]
+
+        # load the data and the models
+        with profiler.step("load"):
+            X_train, y_train = make_X_and_y(load_data(train_data_path), TARGET)
+            X_test, y_test = make_X_and_y(load_data(test_data_path), TARGET)
+            model = joblib.load(model_path)
+            preprocessor = joblib.load(preprocessor_path)
+
+        stacking_model = model.regressor_
+        forest, lgbm = stacking_model.estimators_
+        transformer = model.transformer_
+        y_train_trans = transformer.transform(y_train.to_numpy().reshape(-1, 1)).ravel()
+        n_trees = min(tier_params["forest_trees"], len(forest.estimators_))
+
+        # out-of-fold light gbm predictions, as the meta model saw them
+        with profiler.step("lgbm_out_of_fold"):
+            lgbm_oof = cross_val_predict(clone(lgbm), X_train, y_train_trans,
+                                         cv=stacking_model.cv, n_jobs=-1)
+
+        # tier 0, light gbm calibrated on its own
+        tier_0 = LightGBMTier(lgbm, LinearRegression().fit(lgbm_oof.reshape(-1, 1), y_train_trans),
+                              transformer)
+
+        # tier 1, light gbm and the best out-of-bag trees with a re-fit meta model
+        with profiler.step("forest_subset"):
+            train_tree_preds = per_tree_predictions(forest, X_train.to_numpy(dtype=np.float32))
+            oob_mask = out_of_bag_mask(forest, len(X_train))
+            tree_order = rank_trees(train_tree_preds, oob_mask, y_train_trans)
+            oob_prefix, oob_valid = prefix_means(train_tree_preds, tree_order, oob_mask)
+            valid = oob_valid[n_trees - 1]
+            meta_model = LinearRegression().fit(
+                np.column_stack([oob_prefix[n_trees - 1, valid], lgbm_oof[valid]]), y_train_trans[valid])
+            del train_tree_preds, oob_prefix
+            tier_1 = build_pruned_model(model, tree_order[:n_trees], meta_model)
+        logger.info(f"Tier 1 keeps {n_trees} of {len(forest.estimators_)} trees")
+
+        # offline accuracy and latency of every tier, tier 2 is the full stack
+        with profiler.step("evaluate"):
+            tiers = {}
+            for tier, tier_model in enumerate([tier_0, tier_1, model]):
+                tiers[str(tier)] = {
+                    "test_mae": round(float(mean_absolute_error(y_test, tier_model.predict(X_test))), 4),
+                    "latency_ms": round(measure_latency(tier_model, X_test, tier_params["latency_repeats"]), 3),
+                    "batch_latency_ms": round(batch_latency(tier_model, X_test, tier_params["latency_repeats"]), 3)
+                }
+                logger.info(f"Tier {tier}: {tiers[str(tier)]}")
+
+        # save the degraded tiers with the preprocessor, the full stack is the served model
+        with profiler.step("save"):
+            for tier, tier_model in enumerate([tier_0, tier_1]):
+                file_name = f"tier_{tier}.bundle"
+                save_artifact({"model": tier_model, "preprocessor": preprocessor, "tier": tier},
+                              tier_dir / file_name)
+                tiers[str(tier)]["file"] = file_name
+            tiers["1"]["n_trees"] = n_trees
+            save_json({"tiers": tiers}, tier_dir / "manifest.json")
+            save_json({f"tier_{tier}_{key}": value for tier, metrics in tiers.items()
+                       for key, value in metrics.items() if key != "file"}, report_dir / "metrics.json")
+        logger.info(f"Degraded tiers saved to {tier_dir}")
@@ -7,6 +7,10 @@ from pathlib import Path
 from sklearn.model_selection import cross_val_score
 from sklearn.metrics import mean_absolute_error, r2_score
 import json
+import yaml
+import numpy as np
+from src.profiling import StageProfiler
+from src.models.streaming_metrics import evaluate_in_chunks
 
 
 # initialize dagshub
@@ -57,6 +61,13 @@ def load_model(model_path: Path):
     return model
 
 
+def read_params(file_path):
+    with open(file_path,"r") as f:
+        params_file = yaml.safe_load(f)
+    
+    return params_file
+
+
 def save_model_info(save_json_path,run_id, artifact_path, model_name):
     info_dict = {
         "run_id": run_id,
@@ -73,112 +84,166 @@ if __name__ == "__main__":
     # train data load path
     train_data_path = root_path / "data" / "processed" / "train_trans.csv"
     test_data_path = root_path / "data" / "processed" / "test_trans.csv"
+    # untransformed test data streamed in the chunked evaluation mode
+    test_raw_data_path = root_path / "data" / "interim" / "test.csv"
     # model path
     model_path = root_path / "models" / "model.joblib"
-    
-    
-    # load the training data
-    train_data = load_data(train_data_path)
-    logger.info("Train data loaded successfully")
-    # load the test data
-    test_data = load_data(test_data_path)
-    logger.info("Test data loaded successfully")
-    
-    # split the train and test data
-    X_train, y_train = make_X_and_y(train_data,TARGET)
-    X_test, y_test = make_X_and_y(test_data,TARGET)
-    logger.info("Data split completed")
-    
-    # load the model
-    model = load_model(model_path)
-    logger.info("Model Loaded successfully")
-    
-    
-    # get the predictions
-    y_train_pred = model.predict(X_train)
-    y_test_pred = model.predict(X_test)
-    logger.info("prediction on data complete")
-    
-    # calculate the train and test mae
-    train_mae = mean_absolute_error(y_train,y_train_pred)
-    test_mae = mean_absolute_error(y_test,y_test_pred)
-    logger.info("error calculated")
-    
-    # calculate the r2 scores
-    train_r2 = r2_score(y_train,y_train_pred)
-    test_r2 = r2_score(y_test,y_test_pred)
-    logger.info("r2 score calculated")
-    
-    # calculate cross val scores
-    cv_scores = cross_val_score(model,
-                                X_train,
-                                y_train,
-                                cv=5,
-                                scoring="neg_mean_absolute_error",
-                                n_jobs=-1)
-    logger.info("cross validation complete")
-    
-    # mean cross val score
-    mean_cv_score = -(cv_scores.mean())
-    
-    # log with mlflow
-    with mlflow.start_run() as run:
-        # set tags
-        mlflow.set_tag("model","Food Delivery Time Regressor")
-
-        # log parameters
-        mlflow.log_params(model.get_params())
-
-        # log metrics
-        mlflow.log_metric("train_mae",train_mae)
-        mlflow.log_metric("test_mae",test_mae)
-        mlflow.log_metric("train_r2",train_r2)
-        mlflow.log_metric("test_r2",test_r2)
-        mlflow.log_metric("mean_cv_score",-(cv_scores.mean()))
-
-        # log individual cv scores
-        mlflow.log_metrics({f"CV {num}": score for num, score in enumerate(-cv_scores)})
+    preprocessor_path = root_path / "models" / "preprocessor.joblib"
+    # parameters file
+    params_file_path = root_path / "params.yaml"
+    # test metrics report
+    test_metrics_path = root_path / "reports" / "evaluation" / "test_metrics.json"
+    test_metrics_path.parent.mkdir(exist_ok=True, parents=True)
+    
+    
+    with StageProfiler("evaluation") as profiler:
+        # read the parameters
+        eval_params = read_params(params_file_path)['Evaluation']
+        streaming = eval_params['streaming']
+        logger.info("parameters read successfully")
+    
+        # load the training data
+        with profiler.step("load"):
+            train_data = load_data(train_data_path)
+            logger.info("Train data loaded successfully")
+            # load the test data, the streaming mode reads it chunk by chunk instead
+            if not streaming:
+                test_data = load_data(test_data_path)
+                logger.info("Test data loaded successfully")
+    
+        # split the train and test data
+        X_train, y_train = make_X_and_y(train_data,TARGET)
+        if not streaming:
+            X_test, y_test = make_X_and_y(test_data,TARGET)
+        logger.info("Data split completed")
+    
+        # load the model
+        with profiler.step("load_model"):
+            model = load_model(model_path)
+        logger.info("Model Loaded successfully")
+    
+    
+        # get the predictions
+        with profiler.step("predict"):
+            y_train_pred = model.predict(X_train)
+            if not streaming:
+                y_test_pred = model.predict(X_test)
+        logger.info("prediction on data complete")
+    
+        # evaluate the test data in chunks with bootstrap intervals and group breakdowns
+        if streaming:
+            with profiler.step("streaming_test_evaluation"):
+                preprocessor = load_model(preprocessor_path).set_output(transform="pandas")
+                test_metrics = evaluate_in_chunks(model=model,
+                                                  preprocessor=preprocessor,
+                                                  data_path=test_raw_data_path,
+                                                  target_column=TARGET,
+                                                  group_columns=eval_params['group_columns'],
+                                                  chunksize=eval_params['chunksize'],
+                                                  residual_bins=np.linspace(*eval_params['residual_range'],
+                                                                            eval_params['residual_bins'] + 1),
+                                                  n_bootstrap=eval_params['n_bootstrap'],
+                                                  confidence=eval_params['confidence'])
+            with open(test_metrics_path,"w") as f:
+                json.dump(test_metrics,f,indent=4)
+            logger.info(f"Streaming evaluation on {test_metrics['n_rows']} test rows complete")
+    
+        # calculate the train and test mae
+        train_mae = mean_absolute_error(y_train,y_train_pred)
+        test_mae = test_metrics['mae'] if streaming else mean_absolute_error(y_test,y_test_pred)
+        logger.info("error calculated")
+    
+        # calculate the r2 scores
+        train_r2 = r2_score(y_train,y_train_pred)
+        test_r2 = test_metrics['r2'] if streaming else r2_score(y_test,y_test_pred)
+        logger.info("r2 score calculated")
+    
+        # calculate cross val scores
+        with profiler.step("cross_validation"):
+            cv_scores = cross_val_score(model,
+                                        X_train,
+                                        y_train,
+                                        cv=5,
+                                        scoring="neg_mean_absolute_error",
+                                        n_jobs=-1)
+        logger.info("cross validation complete")
+    
+        # mean cross val score
+        mean_cv_score = -(cv_scores.mean())
+    
+        # log with mlflow
+        with profiler.step("mlflow_logging"):
+            with mlflow.start_run() as run:
+                # set tags
+                mlflow.set_tag("model","Food Delivery Time Regressor")
+
+                # log parameters
+                mlflow.log_params(model.get_params())
+
+                # log metrics
+                mlflow.log_metric("train_mae",train_mae)
+                mlflow.log_metric("test_mae",test_mae)
+                mlflow.log_metric("train_r2",train_r2)
+                mlflow.log_metric("test_r2",test_r2)
+                mlflow.log_metric("mean_cv_score",-(cv_scores.mean()))
+
+                # log individual cv scores
+                mlflow.log_metrics({f"CV {num}": score for num, score in enumerate(-cv_scores)})
+        
+                # log the confidence intervals and group breakdowns of the streaming mode
+                if streaming:
+                    if eval_params['n_bootstrap']:
+                        mlflow.log_metrics({"test_mae_ci_low": test_metrics['mae_ci'][0],
+                                            "test_mae_ci_high": test_metrics['mae_ci'][1],
+                                            "test_r2_ci_low": test_metrics['r2_ci'][0],
+                                            "test_r2_ci_high": test_metrics['r2_ci'][1]})
+                    mlflow.log_dict(test_metrics,"test_metrics.json")
         
-        # mlflow dataset input datatype
-        train_data_input = mlflow.data.from_pandas(train_data,targets=TARGET)
-        test_data_input = mlflow.data.from_pandas(test_data,targets=TARGET)
+                # mlflow dataset input datatype
+                train_data_input = mlflow.data.from_pandas(train_data,targets=TARGET)
         
-        # log input
-        mlflow.log_input(dataset=train_data_input,context="training")
-        mlflow.log_input(dataset=test_data_input,context="validation")
+                # log input
+                mlflow.log_input(dataset=train_data_input,context="training")
+                if not streaming:
+                    test_data_input = mlflow.data.from_pandas(test_data,targets=TARGET)
+                    mlflow.log_input(dataset=test_data_input,context="validation")
         
-        # model signature
-        model_signature = mlflow.models.infer_signature(model_input=X_train.sample(20,random_state=42),
-                                    model_output=model.predict(X_train.sample(20,random_state=42)))
+                # model signature
+                model_signature = mlflow.models.infer_signature(model_input=X_train.sample(20,random_state=42),
+                                            model_output=model.predict(X_train.sample(20,random_state=42)))
         
-        # log the final model
-        mlflow.sklearn.log_model(model,"delivery_time_pred_model",signature=model_signature)
+                # log the final model
+                mlflow.sklearn.log_model(model,"delivery_time_pred_model",signature=model_signature)
 
-        # log stacking regressor
-        mlflow.log_artifact(root_path / "models" / "stacking_regressor.joblib")
+                # log stacking regressor
+                mlflow.log_artifact(root_path / "models" / "stacking_regressor.joblib")
+        
+                # log the power transformer
+                mlflow.log_artifact(root_path / "models" / "power_transformer.joblib")
         
-        # log the power transformer
-        mlflow.log_artifact(root_path / "models" / "power_transformer.joblib")
+                # log the preprocessor
+                mlflow.log_artifact(root_path / "models" / "preprocessor.joblib")
         
-        # log the preprocessor
-        mlflow.log_artifact(root_path / "models" / "preprocessor.joblib")
+                # log the array bundles used for fast loading
+                mlflow.log_artifact(root_path / "models" / "model.bundle")
+                mlflow.log_artifact(root_path / "models" / "preprocessor.bundle")
         
-        # get the current run artifact uri
-        artifact_uri = mlflow.get_artifact_uri()
+                # get the current run artifact uri
+                artifact_uri = mlflow.get_artifact_uri()
         
-        logger.info("Mlflow logging complete and model logged")
+                logger.info("Mlflow logging complete and model logged")
         
-    # get the run id 
-    run_id = run.info.run_id
-    model_name = "delivery_time_pred_model"
-    
-    # save the model info
-    save_json_path = root_path / "run_information.json"
-    save_model_info(save_json_path=save_json_path,
-                    run_id=run_id,
-                    artifact_path=artifact_uri,
-                    model_name=model_name)
-    logger.info("Model Information saved")
+        # get the run id 
+        run_id = run.info.run_id
+        model_name = "delivery_time_pred_model"
+    
+        # save the model info
+        save_json_path = root_path / "run_information.json"
+        save_model_info(save_json_path=save_json_path,
+                        run_id=run_id,
+                        artifact_path=artifact_uri,
+                        model_name=model_name)
+        logger.info("Model Information saved")
     
     
     
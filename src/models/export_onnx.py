@@ -0,0 +1,231 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+import joblib
+import logging
+from pathlib import Path
+from lightgbm import LGBMRegressor
+from onnxmltools.convert.lightgbm.operator_converters.LightGbm import convert_lightgbm
+from skl2onnx import to_onnx, update_registered_converter
+from skl2onnx.algebra.onnx_operator import OnnxSubEstimator
+from skl2onnx.algebra.onnx_ops import OnnxAdd, OnnxLess, OnnxMul, OnnxPow, OnnxSub, OnnxWhere
+from skl2onnx.common.data_types import (
+    FloatTensorType, Int64TensorType, StringTensorType, guess_numpy_type
+)
+from skl2onnx.common.shape_calculator import calculate_linear_regressor_output_shapes
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.pipeline import Pipeline
+from src.profiling import StageProfiler
+from src.serving.onnx_backend import OnnxPipeline
+
+TARGET = "time_taken"
+
+# default onnx domain and the ml domain with the tree ensembles
+TARGET_OPSET = {"": 17, "ai.onnx.ml": 3}
+
+# create logger
+logger = logging.getLogger("export_onnx")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+def load_data(data_path: Path) -> pd.DataFrame:
+    try:
+        df = pd.read_csv(data_path)
+
+    except FileNotFoundError:
+        logger.error("The file to load does not exist")
+
+    return df
+
+
+def make_X_and_y(data: pd.DataFrame, target_column: str):
+    X = data.drop(columns=[target_column])
+    y = data[target_column]
+    return X, y
+
+
+def _yeo_johnson_inverse(z, lmbda: float, dtype, op_version: int):
+    # inverse of the yeo-johnson transform for one lambda, as onnx nodes
+    def const(value):
+        return np.array([value], dtype=dtype)
+
+    if abs(lmbda) < 1e-8:
+        from skl2onnx.algebra.onnx_ops import OnnxExp
+        positive = OnnxSub(OnnxExp(z, op_version=op_version), const(1), op_version=op_version)
+    else:
+        positive = OnnxSub(
+            OnnxPow(OnnxAdd(OnnxMul(z, const(lmbda), op_version=op_version), const(1),
+                            op_version=op_version),
+                    const(1 / lmbda), op_version=op_version),
+            const(1), op_version=op_version)
+
+    if abs(lmbda - 2) < 1e-8:
+        from skl2onnx.algebra.onnx_ops import OnnxExp, OnnxNeg
+        negative = OnnxSub(const(1), OnnxExp(OnnxNeg(z, op_version=op_version), op_version=op_version),
+                           op_version=op_version)
+    else:
+        negative = OnnxSub(
+            const(1),
+            OnnxPow(OnnxAdd(OnnxMul(z, const(lmbda - 2), op_version=op_version), const(1),
+                            op_version=op_version),
+                    const(1 / (2 - lmbda)), op_version=op_version),
+            op_version=op_version)
+
+    return positive, negative
+
+
+def convert_transformed_target_regressor(scope, operator, container):
+    """
+    skl2onnx has no converter for TransformedTargetRegressor. The wrapped
+    regressor is converted as is and the fitted yeo-johnson PowerTransformer
+    is inverted with elementwise nodes: undo the standardisation, then pick
+    the positive or negative branch per value.
+    """
+    model = operator.raw_operator
+    op_version = container.target_opset
+    X = operator.inputs[0]
+    dtype = guess_numpy_type(X.type)
+
+    transformer = model.transformer_
+    if transformer.method != "yeo-johnson" or len(transformer.lambdas_) != 1:
+        raise NotImplementedError("Only a single column yeo-johnson target transform is supported")
+
+    y = OnnxSubEstimator(model.regressor_, X, op_version=op_version)
+    z = y
+    if transformer.standardize:
+        z = OnnxAdd(OnnxMul(y, transformer._scaler.scale_.astype(dtype), op_version=op_version),
+                    transformer._scaler.mean_.astype(dtype), op_version=op_version)
+
+    positive, negative = _yeo_johnson_inverse(z, float(transformer.lambdas_[0]), dtype, op_version)
+    result = OnnxWhere(OnnxLess(z, np.array([0], dtype=dtype), op_version=op_version),
+                       negative, positive, op_version=op_version,
+                       output_names=operator.outputs[:1])
+    result.add_to(scope, container)
+
+
+def register_converters() -> None:
+    update_registered_converter(LGBMRegressor, "LightGbmLGBMRegressor",
+                                calculate_linear_regressor_output_shapes, convert_lightgbm,
+                                options={"split": None})
+    update_registered_converter(TransformedTargetRegressor, "SklearnTransformedTargetRegressor",
+                                calculate_linear_regressor_output_shapes,
+                                convert_transformed_target_regressor)
+
+
+def input_types(X: pd.DataFrame) -> list:
+    # one graph input per cleaned column, strings for the categories
+    types = []
+    for column in X.columns:
+        if X[column].dtype == object:
+            types.append((column, StringTensorType([None, 1])))
+        elif X[column].dtype.kind in "iu":
+            types.append((column, Int64TensorType([None, 1])))
+        else:
+            types.append((column, FloatTensorType([None, 1])))
+    return types
+
+
+def export_onnx(preprocessor, model, X: pd.DataFrame):
+    register_converters()
+    pipeline = Pipeline(steps=[
+        ('preprocess', preprocessor),
+        ("regressor", model)
+    ])
+    X = X[list(preprocessor.feature_names_in_)]
+    return to_onnx(pipeline, initial_types=input_types(X), target_opset=TARGET_OPSET)
+
+
+def latency_ms(predict, X: pd.DataFrame, repeats: int) -> dict:
+    # single row predictions like the api makes them
+    timings = []
+    for i in range(repeats):
+        row = X.iloc[[i % len(X)]]
+        start = time.perf_counter()
+        predict(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"p50": float(np.percentile(timings, 50)),
+            "p99": float(np.percentile(timings, 99))}
+
+
+def throughput_rows_per_s(predict, X: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    predict(X)
+    return len(X) / (time.perf_counter() - start)
+
+
+def compare_backends(sklearn_pipeline, onnx_pipeline, X: pd.DataFrame, y: pd.Series,
+                     repeats: int = 200) -> dict:
+    expected = sklearn_pipeline.predict(X)
+    actual = onnx_pipeline.predict(X)
+    difference = np.abs(actual - expected)
+    return {
+        "n_rows": len(X),
+        "max_abs_diff": float(difference.max()),
+        "mean_abs_diff": float(difference.mean()),
+        "sklearn_mae": float(np.abs(expected - y).mean()),
+        "onnx_mae": float(np.abs(actual - y).mean()),
+        "sklearn_latency_ms": latency_ms(sklearn_pipeline.predict, X, repeats),
+        "onnx_latency_ms": latency_ms(onnx_pipeline.predict, X, repeats),
+        "sklearn_rows_per_s": throughput_rows_per_s(sklearn_pipeline.predict, X),
+        "onnx_rows_per_s": throughput_rows_per_s(onnx_pipeline.predict, X),
+    }
+
+
+if __name__ == "__main__":
+    # root path
+    root_path = Path(__file__).parent.parent.parent
+    # data load path
+    test_data_path = root_path / "data" / "interim" / "test.csv"
+    # model paths
+    model_path = root_path / "models" / "model.joblib"
+    preprocessor_path = root_path / "models" / "preprocessor.joblib"
+    onnx_path = root_path / "models" / "model.onnx"
+    # reports directory
+    report_dir = root_path / "reports" / "onnx"
+    report_dir.mkdir(exist_ok=True, parents=True)
+
+    with StageProfiler("export_onnx") as profiler:
+        # load the untransformed test split and the fitted objects
+        with profiler.step("load"):
+            X_test, y_test = make_X_and_y(load_data(test_data_path).dropna(), TARGET)
+            model = joblib.load(model_path)
+            preprocessor = joblib.load(preprocessor_path)
+        logger.info("Data, preprocessor and model loaded successfully")
+
+        # convert the preprocessor and the model into one graph
+        with profiler.step("export"):
+            onnx_model = export_onnx(preprocessor, model, X_test)
+            onnx_path.write_bytes(onnx_model.SerializeToString())
+        logger.info(f"ONNX graph saved to {onnx_path}")
+
+        # parity, latency and throughput against the sklearn pipeline
+        with profiler.step("compare"):
+            from sklearn import set_config
+
+            # the pipeline as it is served
+            set_config(transform_output='pandas')
+            sklearn_pipeline = Pipeline(steps=[
+                ('preprocess', preprocessor),
+                ("regressor", model)
+            ])
+            metrics = compare_backends(sklearn_pipeline, OnnxPipeline(onnx_path), X_test, y_test)
+            metrics["model_mb"] = onnx_path.stat().st_size / (1024 * 1024)
+
+        with open(report_dir / "metrics.json", "w") as f:
+            json.dump(metrics, f, indent=4)
+        logger.info(f"Max abs difference {metrics['max_abs_diff']:.4f}, single row p50 "
+                    f"{metrics['sklearn_latency_ms']['p50']:.2f}ms with sklearn and "
+                    f"{metrics['onnx_latency_ms']['p50']:.2f}ms with onnxruntime")
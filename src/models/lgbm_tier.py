@@ -0,0 +1,18 @@
+import numpy as np
+
+
+class LightGBMTier:
+    """
+    The LightGBM base learner of the stack alone, its output mapped to the
+    transformed target by a one feature meta model and brought back to
+    minutes through the inverse of the target ``PowerTransformer``.
+    """
+
+    def __init__(self, lgbm, meta_model, transformer):
+        self.lgbm = lgbm
+        self.meta_model = meta_model
+        self.transformer = transformer
+
+    def predict(self, X) -> np.ndarray:
+        stack_pred = self.meta_model.predict(self.lgbm.predict(X).reshape(-1, 1))
+        return self.transformer.inverse_transform(stack_pred.reshape(-1, 1)).ravel()
@@ -0,0 +1,305 @@
+import copy
+import json
+import time
+import numpy as np
+import pandas as pd
+import yaml
+import joblib
+import logging
+from pathlib import Path
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import cross_val_predict
+from sklearn.tree._tree import NODE_DTYPE
+from src.profiling import StageProfiler
+
+TARGET = "time_taken"
+
+# create logger
+logger = logging.getLogger("prune_forest")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+def load_data(data_path: Path) -> pd.DataFrame:
+    try:
+        df = pd.read_csv(data_path)
+
+    except FileNotFoundError:
+        logger.error("The file to load does not exist")
+
+    return df
+
+
+def read_params(file_path):
+    with open(file_path,"r") as f:
+        params_file = yaml.safe_load(f)
+
+    return params_file
+
+
+def make_X_and_y(data:pd.DataFrame, target_column: str):
+    X = data.drop(columns=[target_column])
+    y = data[target_column]
+    return X, y
+
+
+def load_model(model_path: Path):
+    model = joblib.load(model_path)
+    return model
+
+
+def save_model(model, save_dir: Path, model_name: str):
+    # form the save location
+    save_location = save_dir / model_name
+    # save the model
+    joblib.dump(value=model,filename=save_location)
+
+
+def per_tree_predictions(forest, X: np.ndarray) -> np.ndarray:
+    # one row of predictions per tree, float32 keeps the matrix small
+    return np.vstack([tree.predict(X).astype(np.float32) for tree in forest.estimators_])
+
+
+def out_of_bag_mask(forest, n_samples: int) -> np.ndarray:
+    # True where the row was not drawn in the bootstrap sample of the tree
+    mask = np.ones((len(forest.estimators_), n_samples), dtype=bool)
+    for tree_idx, sample_idx in enumerate(forest.estimators_samples_):
+        mask[tree_idx, sample_idx] = False
+    return mask
+
+
+def ranking_fold(n_samples: int, random_state: int = 42) -> np.ndarray:
+    # True for the half of the rows the trees are ranked on, the other half
+    # chooses the size of the sub-forest
+    rows = np.random.default_rng(random_state).permutation(n_samples)
+    mask = np.zeros(n_samples, dtype=bool)
+    mask[rows[:n_samples // 2]] = True
+    return mask
+
+
+def rank_trees(oob_preds: np.ndarray, oob_mask: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # rank the trees by their own out-of-bag error, best tree first
+    abs_err = np.abs(oob_preds - y.astype(np.float32)) * oob_mask
+    tree_mae = abs_err.sum(axis=1) / np.maximum(oob_mask.sum(axis=1), 1)
+    return np.argsort(tree_mae, kind="stable")
+
+
+def prefix_means(preds: np.ndarray, order: np.ndarray, mask: np.ndarray = None):
+    # running mean over the ranked trees, row k holds the sub-forest of size k + 1
+    ordered = preds[order]
+    if mask is None:
+        counts = np.arange(1, len(order) + 1, dtype=np.float32)[:, None]
+        return np.cumsum(ordered, axis=0) / counts, None
+    ordered_mask = mask[order]
+    sums = np.cumsum(ordered * ordered_mask, axis=0)
+    counts = np.cumsum(ordered_mask, axis=0, dtype=np.int32)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts, counts > 0
+
+
+def oob_abs_errors(meta_model: LinearRegression, prefix: np.ndarray, lgbm_oof: np.ndarray,
+                   valid: np.ndarray, transformer, y: np.ndarray) -> np.ndarray:
+    # absolute errors in minutes of a sub-forest stack on its out-of-bag rows
+    stack_pred = meta_model.predict(np.column_stack([prefix[valid], lgbm_oof[valid]]))
+    y_pred = transformer.inverse_transform(stack_pred.reshape(-1, 1)).ravel()
+    return np.abs(y[valid] - y_pred)
+
+
+def held_out_errors(prefix: np.ndarray, lgbm_oof: np.ndarray, valid: np.ndarray, fit_rows: np.ndarray,
+                    transformer, y_trans: np.ndarray, y: np.ndarray) -> tuple:
+    # meta model fit on the out-of-bag rows in fit_rows, the other out-of-bag
+    # rows and its absolute errors on them
+    fitted = valid & fit_rows
+    scored = valid & ~fit_rows
+    meta_model = LinearRegression().fit(np.column_stack([prefix[fitted], lgbm_oof[fitted]]), y_trans[fitted])
+    return scored, oob_abs_errors(meta_model, prefix, lgbm_oof, scored, transformer, y)
+
+
+def forest_nbytes(trees) -> int:
+    # size of the node and value arrays held by the trees
+    return int(sum(tree.tree_.node_count * NODE_DTYPE.itemsize + tree.tree_.value.nbytes
+                   for tree in trees))
+
+
+def build_pruned_model(model, tree_indices: np.ndarray, meta_model: LinearRegression):
+    # deep copy so the original fitted model stays untouched
+    pruned_model = copy.deepcopy(model)
+    stacking_model = pruned_model.regressor_
+    forest = stacking_model.estimators_[0]
+    forest.estimators_ = [forest.estimators_[idx] for idx in tree_indices]
+    forest.n_estimators = len(forest.estimators_)
+    stacking_model.final_estimator_ = meta_model
+    return pruned_model
+
+
+def measure_latency(model, X: pd.DataFrame, repeats: int) -> float:
+    # median single row latency in milliseconds
+    row = X.iloc[[0]]
+    model.predict(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def save_json(data, save_path: Path) -> None:
+    with open(save_path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+if __name__ == "__main__":
+    # root path
+    root_path = Path(__file__).parent.parent.parent
+    # data load paths
+    train_data_path = root_path / "data" / "processed" / "train_trans.csv"
+    test_data_path = root_path / "data" / "processed" / "test_trans.csv"
+    # model path
+    model_path = root_path / "models" / "model.joblib"
+    # parameters file
+    params_file_path = root_path / "params.yaml"
+    # reports directory
+    report_dir = root_path / "reports" / "pruning"
+    report_dir.mkdir(exist_ok=True, parents=True)
+
+    with StageProfiler("prune_forest") as profiler:
+        # read the parameters
+        prune_params = read_params(params_file_path)['Prune']
+        max_mae_delta = prune_params['max_mae_delta']
+        curve_step = prune_params['curve_step']
+        latency_repeats = prune_params['latency_repeats']
+        logger.info("parameters read successfully")
+
+        # load the data and the model
+        with profiler.step("load"):
+            X_train, y_train = make_X_and_y(load_data(train_data_path), TARGET)
+            X_test, y_test = make_X_and_y(load_data(test_data_path), TARGET)
+            model = load_model(model_path)
+        logger.info("Data and model loaded successfully")
+
+        stacking_model = model.regressor_
+        forest, lgbm = stacking_model.estimators_
+        transformer = model.transformer_
+        n_trees = len(forest.estimators_)
+
+        # the stack is fit on the power transformed target
+        y_train_trans = transformer.transform(y_train.to_numpy().reshape(-1, 1)).ravel()
+
+        # per tree predictions on the train and test split
+        with profiler.step("tree_predictions"):
+            train_tree_preds = per_tree_predictions(forest, X_train.to_numpy(dtype=np.float32))
+            test_tree_preds = per_tree_predictions(forest, X_test.to_numpy(dtype=np.float32))
+            oob_mask = out_of_bag_mask(forest, len(X_train))
+        logger.info("Per tree predictions computed")
+
+        # rank trees by out-of-bag contribution on one half of the rows, the
+        # size is chosen on the other half so neither choice sees its own rows
+        ranking_rows = ranking_fold(len(X_train))
+        tree_order = rank_trees(train_tree_preds[:, ranking_rows], oob_mask[:, ranking_rows],
+                                y_train_trans[ranking_rows])
+
+        # out-of-fold light gbm predictions, as seen by the meta model during stacking
+        with profiler.step("lgbm_out_of_fold"):
+            lgbm_oof = cross_val_predict(clone(lgbm), X_train, y_train_trans,
+                                         cv=stacking_model.cv, n_jobs=-1)
+            lgbm_test = lgbm.predict(X_test)
+        logger.info("Light GBM out of fold predictions computed")
+
+        # accuracy of every sub-forest size with a re-fit meta model
+        with profiler.step("accuracy_curve"):
+            oob_prefix, oob_valid = prefix_means(train_tree_preds, tree_order, oob_mask)
+            test_prefix, _ = prefix_means(test_tree_preds, tree_order)
+            del train_tree_preds, test_tree_preds
+
+            baseline_mae = mean_absolute_error(y_test, model.predict(X_test))
+            y_train_values = y_train.to_numpy()
+            # the full forest on the held out rows it has out-of-bag predictions for
+            full_rows, errors = held_out_errors(oob_prefix[n_trees - 1], lgbm_oof, oob_valid[n_trees - 1],
+                                                ranking_rows, transformer, y_train_trans, y_train_values)
+            full_errors = np.full(len(y_train_values), np.nan)
+            full_errors[full_rows] = errors
+            meta_models = []
+            oob_maes = []
+            baseline_oob_maes = []
+            test_maes = []
+            for k in range(n_trees):
+                # held out error of the sub-forest next to the full forest on the same rows
+                scored_rows, errors = held_out_errors(oob_prefix[k], lgbm_oof, oob_valid[k],
+                                                      ranking_rows, transformer, y_train_trans, y_train_values)
+                oob_maes.append(float(errors.mean()))
+                baseline_oob_maes.append(float(np.nanmean(full_errors[scored_rows])))
+                # the meta model kept for the test split and the saved model
+                # is fit on every out-of-bag row
+                valid = oob_valid[k]
+                meta_model = LinearRegression().fit(
+                    np.column_stack([oob_prefix[k, valid], lgbm_oof[valid]]),
+                    y_train_trans[valid])
+                stack_pred = meta_model.predict(np.column_stack([test_prefix[k], lgbm_test]))
+                y_pred = transformer.inverse_transform(stack_pred.reshape(-1, 1)).ravel()
+                meta_models.append(meta_model)
+                test_maes.append(mean_absolute_error(y_test, y_pred))
+        logger.info(f"Accuracy curve computed, full model held out mae is {baseline_oob_maes[-1]:.4f} "
+                    f"and test mae is {baseline_mae:.4f}")
+
+        # smallest sub-forest within the accuracy budget on the held out
+        # out-of-bag rows, the test split is only reported
+        within_budget = np.flatnonzero(np.array(oob_maes) <= np.array(baseline_oob_maes) + max_mae_delta)
+        selected = int(within_budget[0]) + 1 if len(within_budget) else n_trees
+        logger.info(f"Selected {selected} of {n_trees} trees")
+
+        # latency and memory along the curve
+        with profiler.step("latency_curve"):
+            curve_sizes = sorted(set(range(curve_step, n_trees + 1, curve_step)) | {1, selected, n_trees})
+            lgbm_nbytes = len(lgbm.booster_.model_to_string())
+            curve = []
+            for size in curve_sizes:
+                pruned_model = build_pruned_model(model, tree_order[:size], meta_models[size - 1])
+                curve.append({
+                    "n_trees": size,
+                    "oob_mae": round(oob_maes[size - 1], 4),
+                    # the full forest on the same held out rows
+                    "baseline_oob_mae": round(baseline_oob_maes[size - 1], 4),
+                    "test_mae": round(test_maes[size - 1], 4),
+                    "latency_ms": round(measure_latency(pruned_model, X_test, latency_repeats), 3),
+                    "model_mb": round((forest_nbytes(pruned_model.regressor_.estimators_[0].estimators_)
+                                       + lgbm_nbytes) / (1024 * 1024), 2)
+                })
+        logger.info("Latency and memory curve computed")
+
+        # save the pruned model
+        with profiler.step("save"):
+            pruned_model = build_pruned_model(model, tree_order[:selected], meta_models[selected - 1])
+            save_model(model=pruned_model,
+                       save_dir=root_path / "models",
+                       model_name="pruned_model.joblib")
+            logger.info("Pruned model saved to location")
+
+            selected_point = next(point for point in curve if point["n_trees"] == selected)
+            full_point = curve[-1]
+            save_json({
+                "n_trees": selected,
+                "baseline_oob_mae": selected_point["baseline_oob_mae"],
+                "pruned_oob_mae": selected_point["oob_mae"],
+                "baseline_test_mae": round(baseline_mae, 4),
+                "pruned_test_mae": selected_point["test_mae"],
+                "baseline_latency_ms": full_point["latency_ms"],
+                "pruned_latency_ms": selected_point["latency_ms"],
+                "baseline_model_mb": full_point["model_mb"],
+                "pruned_model_mb": selected_point["model_mb"]
+            }, report_dir / "metrics.json")
+            save_json(curve, report_dir / "curve.json")
+            logger.info("Pruning report saved to location")
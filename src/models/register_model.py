@@ -1,9 +1,8 @@
-import mlflow
-import dagshub
 import json
 from pathlib import Path
-from mlflow import MlflowClient
 import logging
+from src.profiling import StageProfiler
+from src.models.registry import get_registry
 
 
 # create logger
@@ -21,12 +20,6 @@ logger.addHandler(handler)
 formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 # add formatter to handler
 handler.setFormatter(formatter)
-import mlflow.client
-# initialize dagshub
-import dagshub
-dagshub.init(repo_owner='speedyskill', repo_name='swiggy-delivery-time-prediction', mlflow=True)
-# set the mlflow tracking server
-mlflow.set_tracking_uri("https://dagshub.com/speedyskill/swiggy-delivery-time-prediction.mlflow")
 
 
 def load_model_information(file_path):
@@ -40,37 +33,40 @@ if __name__ == "__main__":
     # root path
     root_path = Path(__file__).parent.parent.parent
     
-    # run information file path
-    run_info_path = root_path / "run_information.json"
+    with StageProfiler("register_model") as profiler:
+        # run information file path
+        run_info_path = root_path / "run_information.json"
     
-    # register the model
-    run_info = load_model_information(run_info_path)
+        # register the model
+        run_info = load_model_information(run_info_path)
     
-    # get the run id
-    run_id = run_info["run_id"]
-    model_name = run_info["model_name"]
+        # get the run id
+        run_id = run_info["run_id"]
+        model_name = run_info["model_name"]
     
-    # model to register path
-    model_registry_path = f"runs:/{run_id}/{model_name}"
+        # artifacts kept with the version by the local registry
+        artifact_paths = {
+            "model.joblib": root_path / "models" / "model.joblib",
+            "preprocessor.joblib": root_path / "models" / "preprocessor.joblib"
+        }
     
+        # model registry selected by MODEL_REGISTRY_BACKEND
+        registry = get_registry()
     
-    # register the model
-    model_version = mlflow.register_model(model_uri=model_registry_path,
-                                          name=model_name)
+        # register the model
+        with profiler.step("register"):
+            registered_model_version = registry.register_model(model_name=model_name,
+                                                               run_id=run_id,
+                                                               artifact_paths=artifact_paths)
     
     
-    # get the model version
-    registered_model_version = model_version.version
-    registered_model_name = model_version.name
-    logger.info(f"The latest model version in model registry is {registered_model_version}")
+        # get the model version
+        logger.info(f"The latest model version in model registry is {registered_model_version}")
     
-    # update the stage of the model to staging
-    client = MlflowClient()
-    client.transition_model_version_stage(
-        name=registered_model_name,
-        version=registered_model_version,
-        stage="Staging"
-    )
+        # update the stage of the model to staging
+        with profiler.step("transition_stage"):
+            registry.transition_stage(model_name=model_name,
+                                      version=registered_model_version,
+                                      stage="Staging")
     
-    logger.info("Model pushed to Staging stage")
-    
\ No newline at end of file
+        logger.info("Model pushed to Staging stage")
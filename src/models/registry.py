@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import joblib
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("model_registry")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+root_path = Path(__file__).parent.parent.parent
+
+# backend selection and storage locations, shared by every entry point
+BACKEND_ENV_VAR = "MODEL_REGISTRY_BACKEND"
+REGISTRY_DIR_ENV_VAR = "MODEL_REGISTRY_DIR"
+CACHE_DIR_ENV_VAR = "ARTIFACT_CACHE_DIR"
+default_registry_dir = root_path / "registry"
+
+STAGES = ("None", "Staging", "Production", "Archived")
+
+
+class ArtifactCache:
+    """
+    Content addressed file store. Blobs live under ``objects/`` keyed by
+    their sha256 digest and ``refs/`` maps readable keys such as
+    ``<model>/<version>/<artifact>`` to digests.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.cache_dir / "objects" / digest[:2] / digest[2:]
+
+    def _ref_path(self, key: str) -> Path:
+        return self.cache_dir / "refs" / key
+
+    def put(self, file_path: Path) -> str:
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            # copy then rename so readers never see a partial blob
+            tmp_path = object_path.with_name(f"{object_path.name}.{os.getpid()}.tmp")
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return digest
+
+    def get(self, digest: str) -> Path:
+        object_path = self._object_path(digest)
+        if not object_path.exists():
+            raise FileNotFoundError(f"Artifact {digest} is not in the cache")
+        return object_path
+
+    def set_ref(self, key: str, digest: str) -> None:
+        ref_path = self._ref_path(key)
+        ref_path.parent.mkdir(parents=True, exist_ok=True)
+        ref_path.write_text(digest)
+
+    def get_ref(self, key: str):
+        ref_path = self._ref_path(key)
+        return ref_path.read_text().strip() if ref_path.exists() else None
+
+
+def _read_json(file_path: Path):
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def _write_json(data, file_path: Path) -> None:
+    # write then rename so that concurrent readers see old or new, never half
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, file_path)
+
+
+class ModelRegistry(ABC):
+    """
+    Interface shared by the registry backends.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache = ArtifactCache(cache_dir)
+
+    @abstractmethod
+    def register_model(self, model_name: str, run_id: str, artifact_paths: dict) -> str:
+        pass
+
+    @abstractmethod
+    def get_latest_version(self, model_name: str, stage: str):
+        pass
+
+    @abstractmethod
+    def transition_stage(self, model_name: str, version: str, stage: str,
+                         archive_existing_versions: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    def get_artifact_path(self, model_name: str, version: str, artifact_name: str) -> Path:
+        pass
+
+    def load_model(self, model_name: str, version: str):
+        return self.load_artifact(model_name, version, "model.joblib")
+
+    def load_artifact(self, model_name: str, version: str, artifact_name: str):
+        # every call loads its own copy, callers keep what they use alive
+        return joblib.load(self.get_artifact_path(model_name, version, artifact_name))
+
+
+class LocalModelRegistry(ModelRegistry):
+    """
+    Registry kept on the local filesystem.
+
+    ``models/<name>/versions/<version>.json`` holds the version metadata and
+    the digests of its artifacts, ``models/<name>/stages.json`` points every
+    stage to a version and the artifacts themselves live in the content
+    addressed cache.
+    """
+
+    def __init__(self, registry_dir: Path, cache_dir: Path = None):
+        self.registry_dir = Path(registry_dir)
+        super().__init__(cache_dir or self.registry_dir / "cache")
+        self._stage_cache = {}
+
+    def _model_dir(self, model_name: str) -> Path:
+        return self.registry_dir / "models" / model_name
+
+    def _version_path(self, model_name: str, version: str) -> Path:
+        return self._model_dir(model_name) / "versions" / f"{version}.json"
+
+    def _read_stages(self, model_name: str) -> dict:
+        # re-read only when the pointer file changed on disk
+        stages_path = self._model_dir(model_name) / "stages.json"
+        try:
+            mtime = stages_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        cached = self._stage_cache.get(model_name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, _read_json(stages_path))
+            self._stage_cache[model_name] = cached
+        return cached[1]
+
+    def _write_stages(self, model_name: str, stages: dict) -> None:
+        _write_json(stages, self._model_dir(model_name) / "stages.json")
+
+    def get_version_info(self, model_name: str, version: str) -> dict:
+        return _read_json(self._version_path(model_name, version))
+
+    def register_model(self, model_name: str, run_id: str, artifact_paths: dict) -> str:
+        versions_dir = self._model_dir(model_name) / "versions"
+        versions_dir.mkdir(parents=True, exist_ok=True)
+        existing = [int(path.stem) for path in versions_dir.glob("*.json")]
+        version = str(max(existing, default=0) + 1)
+
+        artifacts = {}
+        for artifact_name, artifact_path in artifact_paths.items():
+            digest = self.cache.put(artifact_path)
+            self.cache.set_ref(f"{model_name}/{version}/{artifact_name}", digest)
+            artifacts[artifact_name] = digest
+
+        _write_json({"name": model_name,
+                     "version": version,
+                     "run_id": run_id,
+                     "stage": "None",
+                     "created_at": time.time(),
+                     "artifacts": artifacts},
+                    self._version_path(model_name, version))
+        return version
+
+    def get_latest_version(self, model_name: str, stage: str):
+        return self._read_stages(model_name).get(stage)
+
+    def transition_stage(self, model_name: str, version: str, stage: str,
+                         archive_existing_versions: bool = False) -> None:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage}, expected one of {STAGES}")
+        version = str(version)
+        stages = dict(self._read_stages(model_name))
+
+        previous = stages.get(stage)
+        if archive_existing_versions and previous and previous != version:
+            self._set_version_stage(model_name, previous, "Archived")
+        # a version sits in one stage at a time
+        stages = {name: ver for name, ver in stages.items() if ver != version}
+        if stage not in ("None", "Archived"):
+            stages[stage] = version
+        self._set_version_stage(model_name, version, stage)
+        self._write_stages(model_name, stages)
+
+    def _set_version_stage(self, model_name: str, version: str, stage: str) -> None:
+        info = self.get_version_info(model_name, version)
+        info["stage"] = stage
+        _write_json(info, self._version_path(model_name, version))
+
+    def get_artifact_path(self, model_name: str, version: str, artifact_name: str) -> Path:
+        digest = self.cache.get_ref(f"{model_name}/{version}/{artifact_name}")
+        if digest is None:
+            digest = self.get_version_info(model_name, version)["artifacts"][artifact_name]
+        return self.cache.get(digest)
+
+
+class MlflowModelRegistry(ModelRegistry):
+    """
+    Registry backed by the DagsHub hosted MLflow server. mlflow and dagshub
+    are only imported on the first registry call, so creating this backend
+    costs nothing at import time, and downloaded artifacts are kept in the
+    shared cache, so a version is pulled once per machine.
+    """
+
+    tracking_uri = "https://dagshub.com/speedyskill/swiggy-delivery-time-prediction.mlflow"
+
+    def __init__(self, cache_dir: Path):
+        super().__init__(cache_dir)
+        self._mlflow = None
+        self._client = None
+
+    def _connect(self) -> None:
+        import dagshub
+        import mlflow
+        from mlflow import MlflowClient
+
+        dagshub.init(repo_owner='speedyskill', repo_name='swiggy-delivery-time-prediction', mlflow=True)
+        mlflow.set_tracking_uri(self.tracking_uri)
+        self._mlflow = mlflow
+        self._client = MlflowClient()
+
+    @property
+    def mlflow(self):
+        if self._mlflow is None:
+            self._connect()
+        return self._mlflow
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._connect()
+        return self._client
+
+    def register_model(self, model_name: str, run_id: str, artifact_paths: dict = None) -> str:
+        # the artifacts were logged to the run by the evaluation stage
+        model_version = self.mlflow.register_model(model_uri=f"runs:/{run_id}/{model_name}",
+                                                    name=model_name)
+        return str(model_version.version)
+
+    def get_latest_version(self, model_name: str, stage: str):
+        latest_versions = self.client.get_latest_versions(name=model_name, stages=[stage])
+        return str(latest_versions[0].version) if latest_versions else None
+
+    def transition_stage(self, model_name: str, version: str, stage: str,
+                         archive_existing_versions: bool = False) -> None:
+        self.client.transition_model_version_stage(
+            name=model_name,
+            version=version,
+            stage=stage,
+            archive_existing_versions=archive_existing_versions
+        )
+
+    def get_artifact_path(self, model_name: str, version: str, artifact_name: str) -> Path:
+        ref_key = f"{model_name}/{version}/{artifact_name}"
+        digest = self.cache.get_ref(ref_key)
+        if digest is not None:
+            return self.cache.get(digest)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if artifact_name == "model.joblib":
+                # the registered model is an mlflow sklearn model directory
+                model_dir = self.mlflow.artifacts.download_artifacts(
+                    artifact_uri=f"models:/{model_name}/{version}", dst_path=tmp_dir)
+                with open(Path(model_dir) / "model.pkl", "rb") as f:
+                    model = pickle.load(f)
+                local_path = Path(tmp_dir) / artifact_name
+                joblib.dump(model, local_path)
+            else:
+                run_id = self.client.get_model_version(model_name, version).run_id
+                local_path = self.mlflow.artifacts.download_artifacts(
+                    run_id=run_id, artifact_path=artifact_name, dst_path=tmp_dir)
+            digest = self.cache.put(local_path)
+
+        self.cache.set_ref(ref_key, digest)
+        logger.info(f"Cached {ref_key} as {digest}")
+        return self.cache.get(digest)
+
+
+def get_registry(backend: str = None) -> ModelRegistry:
+    """
+    Build the registry selected by ``MODEL_REGISTRY_BACKEND`` (``mlflow`` or
+    ``local``). The local registry lives in ``MODEL_REGISTRY_DIR`` and both
+    backends share the artifact cache in ``ARTIFACT_CACHE_DIR``.
+    """
+    backend = backend or os.environ.get(BACKEND_ENV_VAR, "mlflow")
+    registry_dir = Path(os.environ.get(REGISTRY_DIR_ENV_VAR, default_registry_dir))
+    cache_dir = Path(os.environ.get(CACHE_DIR_ENV_VAR, registry_dir / "cache"))
+
+    if backend == "local":
+        return LocalModelRegistry(registry_dir=registry_dir, cache_dir=cache_dir)
+    if backend == "mlflow":
+        return MlflowModelRegistry(cache_dir=cache_dir)
+    raise ValueError(f"Unknown registry backend {backend}, expected 'local' or 'mlflow'")
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# keeps the bootstrap weight matrix (replicates x rows) to a few tens of MB
+MAX_BOOTSTRAP_CELLS = 5_000_000
+
+
+class StreamingRegressionMetrics:
+    """
+    Accumulates MAE, R², a residual histogram and bootstrap confidence
+    intervals over chunks of predictions in constant memory.
+
+    The bootstrap is the Poisson variant: every row gets an independent
+    Poisson(1) weight per replicate, drawn as one vectorised matrix per
+    chunk. This matches resampling row indices with replacement without
+    having to keep the residuals around.
+    """
+
+    def __init__(self, residual_bins: np.ndarray, n_bootstrap: int = 0,
+                 random_state: int = 42):
+        self.residual_bins = np.asarray(residual_bins, dtype=float)
+        self.n_bootstrap = n_bootstrap
+        self._rng = np.random.default_rng(random_state)
+        self.n = 0
+        self._sums = np.zeros(4)
+        # residuals outside the bins land in the first or last extra bucket
+        self.residual_counts = np.zeros(len(self.residual_bins) + 1, dtype=np.int64)
+        # weight, abs error, squared error, y, y squared per replicate
+        self._boot_sums = np.zeros((5, n_bootstrap))
+
+    def update(self, y_true, y_pred) -> None:
+        y_true = np.asarray(y_true, dtype=float)
+        residuals = y_true - np.asarray(y_pred, dtype=float)
+        stats = np.vstack([np.abs(residuals), residuals ** 2, y_true, y_true ** 2])
+
+        self.n += len(y_true)
+        self._sums += stats.sum(axis=1)
+        self.residual_counts += np.bincount(np.searchsorted(self.residual_bins, residuals),
+                                            minlength=len(self.residual_counts))
+
+        if self.n_bootstrap:
+            block = max(1, MAX_BOOTSTRAP_CELLS // self.n_bootstrap)
+            for start in range(0, len(y_true), block):
+                block_stats = stats[:, start:start + block]
+                weights = self._rng.poisson(1.0, size=(self.n_bootstrap, block_stats.shape[1]))
+                self._boot_sums[0] += weights.sum(axis=1)
+                self._boot_sums[1:] += block_stats @ weights.T
+
+    @staticmethod
+    def _mae_and_r2(weight, abs_err, sq_err, y_sum, y_sq_sum):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mae = abs_err / weight
+            total_ss = y_sq_sum - y_sum ** 2 / weight
+            r2 = 1 - sq_err / total_ss
+        return mae, r2
+
+    def result(self, confidence: float = 0.95) -> dict:
+        mae, r2 = self._mae_and_r2(self.n, *self._sums)
+        metrics = {"n_rows": int(self.n), "mae": float(mae), "r2": float(r2)}
+
+        if self.n_bootstrap:
+            boot_mae, boot_r2 = self._mae_and_r2(*self._boot_sums)
+            tails = [(1 - confidence) / 2 * 100, (1 + confidence) / 2 * 100]
+            metrics["mae_ci"] = np.nanpercentile(boot_mae, tails).tolist()
+            metrics["r2_ci"] = np.nanpercentile(boot_r2, tails).tolist()
+
+        metrics["residual_histogram"] = {
+            "bin_edges": self.residual_bins.tolist(),
+            "counts": self.residual_counts.tolist()
+        }
+        return metrics
+
+
+def evaluate_in_chunks(model, preprocessor, data_path: Path, target_column: str,
+                       group_columns: list, chunksize: int, residual_bins: np.ndarray,
+                       n_bootstrap: int, confidence: float = 0.95,
+                       random_state: int = 42) -> dict:
+    """
+    Stream the untransformed split from ``data_path``, predict each chunk
+    once and return overall metrics plus a breakdown per value of every
+    column in ``group_columns``.
+    """
+    overall = StreamingRegressionMetrics(residual_bins, n_bootstrap=n_bootstrap,
+                                         random_state=random_state)
+    by_group = {column: {} for column in group_columns}
+
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        # same missing value handling as the preprocessing stage
+        chunk = chunk.dropna()
+        if chunk.empty:
+            continue
+        X = chunk.drop(columns=[target_column])
+        y = chunk[target_column].to_numpy()
+        y_pred = model.predict(preprocessor.transform(X))
+        overall.update(y, y_pred)
+
+        for column in group_columns:
+            values = chunk[column].to_numpy()
+            for value in pd.unique(values):
+                mask = values == value
+                group_metrics = by_group[column].setdefault(
+                    value, StreamingRegressionMetrics(residual_bins))
+                group_metrics.update(y[mask], y_pred[mask])
+
+    metrics = overall.result(confidence)
+    metrics["groups"] = {
+        column: {str(value): {key: val for key, val in group.result().items()
+                              if key != "residual_histogram"}
+                 for value, group in groups.items()}
+        for column, groups in by_group.items()
+    }
+    return metrics
@@ -9,6 +9,8 @@ from lightgbm import LGBMRegressor
 from sklearn.linear_model import LinearRegression
 from pathlib import Path
 from sklearn.ensemble import StackingRegressor
+from src.profiling import StageProfiler
+from src.models.artifacts import save_artifact
 
 TARGET = "time_taken"
 
@@ -65,95 +67,103 @@ def train_model(model, X_train: pd.DataFrame, y_train):
     return model
 
 
-def make_X_and_y(data:pd.DataFrame, target_column: str):
-    X = data.drop(columns=[target_column])
-    y = data[target_column]
-    return X, y
-
-
-
-if __name__ == "__main__":
-    # root path
-    root_path = Path(__file__).parent.parent.parent
-    # train data load path
-    data_path = root_path / "data" / "processed" / "train_trans.csv"
-    # parameters file
-    params_file_path = root_path / "params.yaml"
-    
-    # load the training data
-    training_data = load_data(data_path)
-    logger.info("Training Data read successfully")
-    
-    # split the data into X and y
-    X_train, y_train = make_X_and_y(training_data, TARGET)
-    logger.info("Dataset splitting completed")
-    
-    # model parameters
-    model_params = read_params(params_file_path)['Train']
-    
-    # rf_params
-    rf_params = model_params['Random_Forest']
-    logger.info("random forest parameters read")
-    
+def build_model(model_params: dict) -> TransformedTargetRegressor:
     # build random forest model
-    rf = RandomForestRegressor(**rf_params)
+    rf = RandomForestRegressor(**model_params['Random_Forest'])
     logger.info("built random forest model")
-    
-    # light gbm params
-    lgbm_params = model_params["LightGBM"]
-    logger.info("Light GBM parameters read")
-    lgbm = LGBMRegressor(**lgbm_params)
+
+    # light gbm model
+    lgbm = LGBMRegressor(**model_params["LightGBM"])
     logger.info("built Light GBM model")
-    
+
     # meta model
     lr = LinearRegression()
     logger.info("Meta model built")
-    
+
     # power transformer
     power_transform = PowerTransformer()
     logger.info("Target Transformer built")
-    
+
     # form the stacking regressor
     stacking_reg = StackingRegressor(estimators=[("rf_model",rf),
                                                  ("lgbm_model",lgbm)],
                                      final_estimator=lr,
                                      cv=5,n_jobs=-1)
     logger.info("Stacking regressor built")
-    
+
     # make the model wrapper
-    model = TransformedTargetRegressor(regressor=stacking_reg,
-                                       transformer=power_transform)
-    logger.info("Models wrapped inside wrapper")
-    
-    # fit the model on training data
-    train_model(model,X_train,y_train)
-    logger.info("Model training completed")
-    
-    # model name
-    model_filename = "model.joblib"
-    # directory to save model
-    model_save_dir = root_path / "models"
-    model_save_dir.mkdir(exist_ok=True)
-    
-    # extract the model from wrapper
-    stacking_model = model.regressor_
-    transformer = model.transformer_
+    return TransformedTargetRegressor(regressor=stacking_reg,
+                                      transformer=power_transform)
 
-    # save the model
-    save_model(model=model,
-            save_dir=model_save_dir,
-            model_name=model_filename)
-    logger.info("Trained model saved to location")
-    
-    # save the stacking model
-    stacking_filename = "stacking_regressor.joblib"
-    save_model(model=stacking_model,
-            save_dir=model_save_dir,
-            model_name=stacking_filename)
-    logger.info("Trained model saved to location")
+
+def make_X_and_y(data:pd.DataFrame, target_column: str):
+    X = data.drop(columns=[target_column])
+    y = data[target_column]
+    return X, y
+
+
+
+if __name__ == "__main__":
+    # root path
+    root_path = Path(__file__).parent.parent.parent
+    # train data load path
+    data_path = root_path / "data" / "processed" / "train_trans.csv"
+    # parameters file
+    params_file_path = root_path / "params.yaml"
     
-    # save the transformer
-    transformer_filename = "power_transformer.joblib"
-    transformer_save_dir = model_save_dir
-    save_transformer(transformer, transformer_save_dir, transformer_filename)
-    logger.info("Transformer saved to location")
+    with StageProfiler("train") as profiler:
+        # load the training data
+        with profiler.step("load"):
+            training_data = load_data(data_path)
+        logger.info("Training Data read successfully")
+    
+        # split the data into X and y
+        X_train, y_train = make_X_and_y(training_data, TARGET)
+        logger.info("Dataset splitting completed")
+    
+        # model parameters
+        model_params = read_params(params_file_path)['Train']
+    
+        # stacking regressor of random forest and light gbm inside the target transform wrapper
+        model = build_model(model_params)
+        logger.info("Models wrapped inside wrapper")
+    
+        # fit the model on training data
+        # random forest and light gbm are fit together inside the stacking regressor
+        with profiler.step("fit_model"):
+            train_model(model,X_train,y_train)
+        logger.info("Model training completed")
+    
+        with profiler.step("save"):
+            # model name
+            model_filename = "model.joblib"
+            # directory to save model
+            model_save_dir = root_path / "models"
+            model_save_dir.mkdir(exist_ok=True)
+    
+            # extract the model from wrapper
+            stacking_model = model.regressor_
+            transformer = model.transformer_
+
+            # save the model
+            save_model(model=model,
+                    save_dir=model_save_dir,
+                    model_name=model_filename)
+            logger.info("Trained model saved to location")
+    
+            # save the stacking model
+            stacking_filename = "stacking_regressor.joblib"
+            save_model(model=stacking_model,
+                    save_dir=model_save_dir,
+                    model_name=stacking_filename)
+            logger.info("Trained model saved to location")
+    
+            # save the transformer
+            transformer_filename = "power_transformer.joblib"
+            transformer_save_dir = model_save_dir
+            save_transformer(transformer, transformer_save_dir, transformer_filename)
+            logger.info("Transformer saved to location")
+    
+            # save the model as a memory mappable array bundle
+            save_artifact(model, model_save_dir / "model.bundle")
+            logger.info("Model bundle saved to location")
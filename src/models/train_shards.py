@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import joblib
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold, cross_val_predict
+from src.profiling import StageProfiler
+from src.models.artifacts import save_artifact
+from src.models.train import build_model, read_params
+from src.features.data_preprocessing import drop_missing_values, make_X_and_y
+
+TARGET = "time_taken"
+
+# create logger
+logger = logging.getLogger("train_shards")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+def shard_file_name(value: str) -> str:
+    # partition values such as semi-urban become file names
+    return re.sub(r"[^a-z0-9]+", "_", str(value).strip().lower()).strip("_") + ".bundle"
+
+
+def partition(data: pd.DataFrame, column: str, min_rows: int) -> dict:
+    # the rows of every partition large enough for its own model
+    groups = {value: group for value, group in data.groupby(column)}
+    for value, group in groups.items():
+        if len(group) < min_rows:
+            logger.info(f"{column}={value} has {len(group)} rows, less than {min_rows}, "
+                        f"it stays on the global model")
+    return {value: group for value, group in groups.items() if len(group) >= min_rows}
+
+
+def single_core_model(model_params: dict):
+    # runs in a worker process, the pool already uses every core so the
+    # stack is fit on a single one
+    model = build_model(model_params)
+    return model.set_params(regressor__n_jobs=1,
+                            regressor__rf_model__n_jobs=1,
+                            regressor__rf_model__verbose=0,
+                            regressor__lgbm_model__n_jobs=1,
+                            regressor__lgbm_model__verbose=-1)
+
+
+def fit_shard(value: str, X_train: pd.DataFrame, y_train: pd.Series, model_params: dict):
+    return value, single_core_model(model_params).fit(X_train, y_train)
+
+
+def out_of_fold(value, X_train: pd.DataFrame, y_train: pd.Series, model_params: dict, cv_folds: int):
+    # predictions of every training row by a model that did not see it
+    cv = KFold(n_splits=cv_folds, shuffle=True, random_state=42)
+    return value, cross_val_predict(single_core_model(model_params), X_train, y_train, cv=cv)
+
+
+def train_shards(train_data: pd.DataFrame, preprocessor, column: str, min_rows: int,
+                 model_params: dict, n_workers: int = None) -> dict:
+    """
+    Fit one model per value of ``column`` on the preprocessed rows of that
+    value, in a process pool. The shards share the fitted global
+    preprocessor, only the stacked regressor is specific to a partition.
+    """
+    partitions = partition(drop_missing_values(train_data), column, min_rows)
+    jobs = {}
+    for value, rows in partitions.items():
+        X, y = make_X_and_y(rows, TARGET)
+        jobs[value] = (preprocessor.transform(X), y)
+
+    models = {}
+    with ProcessPoolExecutor(max_workers=n_workers or min(len(jobs), os.cpu_count())) as executor:
+        futures = [executor.submit(fit_shard, value, X, y, model_params) for value, (X, y) in jobs.items()]
+        for future in futures:
+            value, model = future.result()
+            models[value] = model
+            logger.info(f"Shard {column}={value} fit on {len(jobs[value][1])} rows")
+    return models
+
+
+def cross_validated_metrics(train_data: pd.DataFrame, preprocessor, column: str, values: list,
+                            model_params: dict, cv_folds: int, n_workers: int = None) -> dict:
+    """
+    Out of fold error of a shard model and of a global model on the training
+    rows of each partition. The router decides on these, the test split of
+    a small partition is too few rows to choose on and only reports.
+    """
+    train_data = drop_missing_values(train_data)
+    X, y = make_X_and_y(train_data, TARGET)
+    X_trans = preprocessor.transform(X)
+    # the global model on every row, keyed None, and one shard model per partition
+    jobs = {None: (X_trans, y)}
+    for value in values:
+        rows = (train_data[column] == value).to_numpy()
+        jobs[value] = (X_trans.loc[rows], y.loc[rows])
+
+    predictions = {}
+    with ProcessPoolExecutor(max_workers=n_workers or min(len(jobs), os.cpu_count())) as executor:
+        futures = [executor.submit(out_of_fold, value, X_part, y_part, model_params, cv_folds)
+                   for value, (X_part, y_part) in jobs.items()]
+        for future in futures:
+            value, predicted = future.result()
+            predictions[value] = pd.Series(predicted, index=jobs[value][1].index)
+
+    metrics = {}
+    for value in values:
+        y_part = jobs[value][1]
+        metrics[value] = {"train_rows": len(y_part),
+                          "cv_shard_mae": float(mean_absolute_error(y_part, predictions[value])),
+                          "cv_global_mae": float(mean_absolute_error(y_part, predictions[None].loc[y_part.index]))}
+    return metrics
+
+
+def shard_metrics(test_data: pd.DataFrame, preprocessor, column: str, models: dict, global_model) -> dict:
+    # test error of every shard next to the global model on the same rows, reported only
+    test_data = drop_missing_values(test_data)
+    metrics = {}
+    for value, model in models.items():
+        X, y = make_X_and_y(test_data.loc[test_data[column] == value], TARGET)
+        X_trans = preprocessor.transform(X)
+        metrics[value] = {"test_rows": len(y),
+                          "shard_mae": float(mean_absolute_error(y, model.predict(X_trans))),
+                          "global_mae": float(mean_absolute_error(y, global_model.predict(X_trans)))}
+    return metrics
+
+
+if __name__ == "__main__":
+    # root path
+    root_path = Path(__file__).parent.parent.parent
+    # cleaned splits with the partition column still readable
+    train_data_path = root_path / "data" / "interim" / "train.csv"
+    test_data_path = root_path / "data" / "interim" / "test.csv"
+    # fitted preprocessor and global model
+    preprocessor_path = root_path / "models" / "preprocessor.joblib"
+    model_path = root_path / "models" / "model.joblib"
+    # parameters file
+    params_file_path = root_path / "params.yaml"
+    # shards directory
+    shard_dir = root_path / "models" / "shards"
+    shard_dir.mkdir(exist_ok=True, parents=True)
+
+    with StageProfiler("train_shards") as profiler:
+        # read the parameters
+        params = read_params(params_file_path)
+        shard_params = params["Shards"]
+        column = shard_params["column"]
+
+        # load the data, the preprocessor and the global model
+        with profiler.step("load"):
+            train_data = pd.read_csv(train_data_path)
+            test_data = pd.read_csv(test_data_path)
+            preprocessor = joblib.load(preprocessor_path)
+            global_model = joblib.load(model_path)
+
+        # one model per partition, in parallel
+        with profiler.step("fit_shards"):
+            models = train_shards(train_data, preprocessor, column, shard_params["min_rows"],
+                                  params["Train"], n_workers=shard_params["n_workers"])
+
+        # compare with the global model, out of fold on the training rows
+        with profiler.step("cross_validate"):
+            cv_metrics = cross_validated_metrics(train_data, preprocessor, column, list(models),
+                                                 params["Train"], cv_folds=shard_params["cv_folds"],
+                                                 n_workers=shard_params["n_workers"])
+        with profiler.step("evaluate"):
+            test_metrics = shard_metrics(test_data, preprocessor, column, models, global_model)
+        metrics = {value: {**cv_metrics[value], **test_metrics[value]} for value in models}
+        for value, values in metrics.items():
+            # the router only sends a partition to a shard that beats the global model
+            routed = "routed" if values["cv_shard_mae"] < values["cv_global_mae"] else "not routed"
+            logger.info(f"{column}={value}: cv shard mae {values['cv_shard_mae']:.3f}, "
+                        f"cv global mae {values['cv_global_mae']:.3f} on {values['train_rows']} rows, {routed}; "
+                        f"test shard mae {values['shard_mae']:.3f}, "
+                        f"global mae {values['global_mae']:.3f} on {values['test_rows']} rows")
+
+        # save every shard with its preprocessor as a memory mappable bundle
+        with profiler.step("save"):
+            shards = {}
+            for value, model in models.items():
+                file_name = shard_file_name(value)
+                save_artifact({"model": model, "preprocessor": preprocessor,
+                               "column": column, "value": value}, shard_dir / file_name)
+                shards[value] = {"file": file_name,
+                                 "size_mb": round((shard_dir / file_name).stat().st_size / 1024 ** 2, 3),
+                                 **metrics[value]}
+            with open(shard_dir / "manifest.json", "w") as f:
+                json.dump({"column": column, "shards": shards}, f, indent=4)
+        logger.info(f"{len(shards)} shards saved to {shard_dir}")
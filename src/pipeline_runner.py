@@ -0,0 +1,286 @@
+import copy
+import hashlib
+import json
+import time
+import logging
+import pandas as pd
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("pipeline_runner")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+root_path = Path(__file__).parent.parent
+
+TARGET = "time_taken"
+
+
+@dataclass
+class Stage:
+    # one node of the in process DAG, mirrors a stage of dvc.yaml
+    name: str
+    func: object
+    inputs: list = field(default_factory=list)
+    params: list = field(default_factory=list)
+    code: list = field(default_factory=list)
+    files: list = field(default_factory=list)
+    # cached outputs kept for this stage, None keeps every one
+    keep: int = None
+
+
+def file_digest(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def params_section(params: dict, dotted_key: str):
+    value = params
+    for key in dotted_key.split("."):
+        value = value[key]
+    return value
+
+
+def as_loaded(data: pd.DataFrame) -> pd.DataFrame:
+    # what the next dvc stage would read back from the csv: a fresh index
+    # and plain object columns instead of the categoricals of pd.cut
+    categorical = data.select_dtypes("category").columns
+    return data.astype({column: object for column in categorical}).reset_index(drop=True)
+
+
+# stage functions, each takes the outputs of its inputs and the params
+
+def clean_stage(inputs: dict, params: dict) -> pd.DataFrame:
+    from src.data.data_cleaning import clean_data, load_data
+
+    return as_loaded(clean_data(load_data(root_path / "data" / "raw" / "swiggy.csv")))
+
+
+def prepare_stage(inputs: dict, params: dict) -> dict:
+    from src.data.data_preparation import split_data
+
+    parameters = params["Data_Preparation"]
+    train_data, test_data = split_data(inputs["data_cleaning"],
+                                       test_size=parameters["test_size"],
+                                       random_state=parameters["random_state"])
+    return {"train": as_loaded(train_data), "test": as_loaded(test_data)}
+
+
+def preprocess_stage(inputs: dict, params: dict) -> dict:
+    from src.features import data_preprocessing as preprocessing
+    from src.features.drift import FeatureSketch
+
+    split = inputs["data_preparation"]
+    train_df = preprocessing.drop_missing_values(split["train"])
+    test_df = preprocessing.drop_missing_values(split["test"])
+    X_train, y_train = preprocessing.make_X_and_y(train_df, TARGET)
+    X_test, y_test = preprocessing.make_X_and_y(test_df, TARGET)
+
+    preprocessor = preprocessing.train_preprocessor(preprocessing.build_preprocessor(), X_train)
+    train_trans = preprocessing.join_X_and_y(preprocessor.transform(X_train), y_train)
+    test_trans = preprocessing.join_X_and_y(preprocessor.transform(X_test), y_test)
+    return {"preprocessor": preprocessor,
+            # reset like the csv files data_preprocessing.py writes
+            "train_trans": train_trans.reset_index(drop=True),
+            "test_trans": test_trans.reset_index(drop=True),
+            "drift_reference": FeatureSketch.from_reference(X_train)}
+
+
+def train_stage(inputs: dict, params: dict):
+    from src.models.train import build_model, make_X_and_y, train_model
+
+    X_train, y_train = make_X_and_y(inputs["data_preprocessing"]["train_trans"], TARGET)
+    return train_model(build_model(params["Train"]), X_train, y_train)
+
+
+def evaluate_stage(inputs: dict, params: dict) -> dict:
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from sklearn.model_selection import cross_val_score
+
+    # the offline metrics, mlflow logging stays in the evaluation dvc stage
+    model = inputs["train"]
+    metrics = {}
+    for split in ("train", "test"):
+        data = inputs["data_preprocessing"][f"{split}_trans"]
+        y_pred = model.predict(data.drop(columns=[TARGET]))
+        metrics[f"{split}_mae"] = float(mean_absolute_error(data[TARGET], y_pred))
+        metrics[f"{split}_r2"] = float(r2_score(data[TARGET], y_pred))
+    # cross validated error on the train split like evaluation.py, the score a sweep selects on
+    train_data = inputs["data_preprocessing"]["train_trans"]
+    cv_scores = cross_val_score(model, train_data.drop(columns=[TARGET]), train_data[TARGET],
+                                cv=5, scoring="neg_mean_absolute_error", n_jobs=-1)
+    metrics["cv_mae"] = float(-cv_scores.mean())
+    return metrics
+
+
+STAGES = [
+    Stage("data_cleaning", clean_stage,
+          code=["src/data/data_cleaning.py"], files=["data/raw/swiggy.csv"]),
+    Stage("data_preparation", prepare_stage, inputs=["data_cleaning"],
+          params=["Data_Preparation.test_size", "Data_Preparation.random_state"],
+          code=["src/data/data_preparation.py"]),
+    Stage("data_preprocessing", preprocess_stage, inputs=["data_preparation"],
+          code=["src/features/data_preprocessing.py", "src/features/drift.py"]),
+    Stage("train", train_stage, inputs=["data_preprocessing"],
+          params=["Train.Random_Forest", "Train.LightGBM"],
+          code=["src/models/train.py"], keep=1),
+    Stage("evaluate", evaluate_stage, inputs=["data_preprocessing", "train"],
+          code=["src/pipeline_runner.py"]),
+]
+
+
+class PipelineRunner:
+    """
+    Runs the stages of dvc.yaml in this interpreter and hands DataFrames
+    and fitted objects from one stage to the next in memory.
+
+    Every stage output is memoized under a hash of its code files, its
+    params.yaml sections, its input files and the keys of its upstream
+    stages, the same things DVC tracks. Running again with other Train
+    params only reruns train and evaluate, the cleaned and preprocessed
+    data come from the cache.
+    """
+
+    def __init__(self, stages: list = None):
+        self.stages = {stage.name: stage for stage in (stages or STAGES)}
+        self.cache = {}
+        self._cached_keys = {name: [] for name in self.stages}
+        self._file_digests = {}
+
+    def _digest(self, relative_path: str) -> str:
+        # files are hashed once per runner, they do not change during a sweep
+        if relative_path not in self._file_digests:
+            self._file_digests[relative_path] = file_digest(root_path / relative_path)
+        return self._file_digests[relative_path]
+
+    def stage_key(self, stage: Stage, params: dict, upstream_keys: dict) -> str:
+        payload = {
+            "stage": stage.name,
+            "code": {path: self._digest(path) for path in stage.code},
+            "files": {path: self._digest(path) for path in stage.files},
+            "params": {key: params_section(params, key) for key in stage.params},
+            "inputs": {name: upstream_keys[name] for name in stage.inputs},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def run(self, params: dict, targets: list = None) -> tuple:
+        """
+        Run ``targets`` (every stage by default) and their upstream stages.
+        Returns the outputs by stage name and a record per stage with its
+        key, whether it came from the cache and the time it took.
+        """
+        outputs, keys, records = {}, {}, []
+        for name in self._order(targets or list(self.stages)):
+            stage = self.stages[name]
+            key = self.stage_key(stage, params, keys)
+            keys[name] = key
+            start = time.perf_counter()
+            hit = key in self.cache
+            if hit:
+                outputs[name] = self.cache[key]
+            else:
+                outputs[name] = stage.func({upstream: outputs[upstream] for upstream in stage.inputs},
+                                           params)
+                self._remember(stage, key, outputs[name])
+            seconds = time.perf_counter() - start
+            records.append({"stage": name, "key": key[:12], "cached": hit, "seconds": round(seconds, 4)})
+            logger.info(f"{name}: {'cached' if hit else f'ran in {seconds:.2f}s'}")
+        return outputs, records
+
+    def _remember(self, stage: Stage, key: str, output) -> None:
+        # fitted models are large, a sweep only keeps the last few in memory
+        cached_keys = self._cached_keys[stage.name]
+        cached_keys.append(key)
+        self.cache[key] = output
+        if stage.keep is not None:
+            while len(cached_keys) > stage.keep:
+                del self.cache[cached_keys.pop(0)]
+
+    def _order(self, targets: list) -> list:
+        # the targets and everything upstream, in dependency order
+        order = []
+
+        def visit(name):
+            if name in order:
+                return
+            for upstream in self.stages[name].inputs:
+                visit(upstream)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+
+def write_outs(outputs: dict, root: Path = root_path) -> list:
+    """
+    Write the DVC outs of the stages that ran, at the paths dvc.yaml lists,
+    so ``dvc commit`` can record them afterwards.
+    """
+    from src.models.artifacts import save_artifact
+    import joblib
+
+    written = []
+
+    def save_csv(data: pd.DataFrame, relative_path: str):
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data.to_csv(path, index=False)
+        written.append(relative_path)
+
+    def save_object(obj, relative_path: str, bundle: bool = False):
+        path = root / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if bundle:
+            save_artifact(obj, path)
+        else:
+            joblib.dump(obj, path)
+        written.append(relative_path)
+
+    if "data_cleaning" in outputs:
+        save_csv(outputs["data_cleaning"], "data/cleaned/swiggy_cleaned.csv")
+    if "data_preparation" in outputs:
+        save_csv(outputs["data_preparation"]["train"], "data/interim/train.csv")
+        save_csv(outputs["data_preparation"]["test"], "data/interim/test.csv")
+    if "data_preprocessing" in outputs:
+        preprocessed = outputs["data_preprocessing"]
+        save_csv(preprocessed["train_trans"], "data/processed/train_trans.csv")
+        save_csv(preprocessed["test_trans"], "data/processed/test_trans.csv")
+        save_object(preprocessed["preprocessor"], "models/preprocessor.joblib")
+        save_object(preprocessed["preprocessor"], "models/preprocessor.bundle", bundle=True)
+        preprocessed["drift_reference"].save(root / "models" / "drift_reference.json")
+        written.append("models/drift_reference.json")
+    if "train" in outputs:
+        model = outputs["train"]
+        save_object(model, "models/model.joblib")
+        save_object(model.regressor_, "models/stacking_regressor.joblib")
+        save_object(model.transformer_, "models/power_transformer.joblib")
+        save_object(model, "models/model.bundle", bundle=True)
+    return written
+
+
+def with_overrides(params: dict, overrides: dict) -> dict:
+    # dotted keys such as Train.LightGBM.n_estimators set nested values
+    params = copy.deepcopy(params)
+    for dotted_key, value in overrides.items():
+        *parents, last = dotted_key.split(".")
+        section = params
+        for key in parents:
+            section = section[key]
+        section[last] = value
+    return params
@@ -0,0 +1,151 @@
+import cProfile
+import json
+import logging
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("profiling")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+# root of the project and the default location of the metrics files
+root_path = Path(__file__).parent.parent
+profiling_dir = root_path / "reports" / "profiling"
+
+# set PROFILE_STAGES=1 to also dump a cProfile file per stage
+PROFILE_ENV_VAR = "PROFILE_STAGES"
+
+
+def _reset_peak_rss() -> None:
+    # linux lets a process reset its own high water mark (VmHWM)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    # prefer VmHWM as it honours the reset done at the start of a step
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _process_peak_rss_mb()
+
+
+def _process_peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+class StageProfiler:
+    """
+    Records wall time, CPU time and peak RSS of the logical steps of a
+    DVC stage and writes them to ``reports/profiling/<stage>.json`` so that
+    ``dvc metrics diff`` can compare them between commits.
+
+    Peak RSS is per step where the kernel allows resetting the high water
+    mark and the process-wide peak otherwise. CPU time covers all threads of
+    the current process but not worker processes started by joblib.
+    """
+
+    def __init__(self, stage_name: str, save_dir: Path = profiling_dir,
+                 enable_cprofile: bool = None):
+        self.stage_name = stage_name
+        self.save_dir = Path(save_dir)
+        if enable_cprofile is None:
+            enable_cprofile = os.environ.get(PROFILE_ENV_VAR, "0") not in ("", "0")
+        self.enable_cprofile = enable_cprofile
+        self.steps = {}
+        self._profiler = None
+        self._wall_start = None
+        self._cpu_start = None
+
+    @contextmanager
+    def step(self, step_name: str):
+        _reset_peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.steps[step_name] = {
+                "wall_time_s": round(time.perf_counter() - wall_start, 4),
+                "cpu_time_s": round(time.process_time() - cpu_start, 4),
+                "peak_rss_mb": round(_peak_rss_mb(), 2)
+            }
+            logger.info(f"{self.stage_name}.{step_name} took "
+                        f"{self.steps[step_name]['wall_time_s']}s wall, "
+                        f"{self.steps[step_name]['cpu_time_s']}s cpu, "
+                        f"{self.steps[step_name]['peak_rss_mb']} MB peak rss")
+
+    def start(self):
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        if self.enable_cprofile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    def stop(self) -> dict:
+        if self._profiler is not None:
+            self._profiler.disable()
+
+        metrics = {
+            "total": {
+                "wall_time_s": round(time.perf_counter() - self._wall_start, 4),
+                "cpu_time_s": round(time.process_time() - self._cpu_start, 4),
+                "peak_rss_mb": round(_process_peak_rss_mb(), 2)
+            },
+            "steps": self.steps
+        }
+        self.save(metrics)
+        return metrics
+
+    def save(self, metrics: dict) -> Path:
+        self.save_dir.mkdir(exist_ok=True, parents=True)
+        save_path = self.save_dir / f"{self.stage_name}.json"
+        with open(save_path, "w") as f:
+            json.dump(metrics, f, indent=4)
+
+        if self._profiler is not None:
+            prof_path = self.save_dir / f"{self.stage_name}.prof"
+            self._profiler.dump_stats(prof_path)
+            logger.info(f"cProfile stats saved to {prof_path}")
+
+        logger.info(f"Profiling metrics saved to {save_path}")
+        return save_path
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # only write metrics for stages that completed
+        if exc_type is None:
+            self.stop()
+        elif self._profiler is not None:
+            self._profiler.disable()
+        return False
@@ -0,0 +1,147 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+# upper bounds in ms of the queue wait histogram, the last bucket is unbounded
+WAIT_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class Overloaded(Exception):
+    # the request was refused before it was queued, retry_after is in seconds
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    # the request can no longer finish before its deadline, it was never scored
+    pass
+
+
+class AdmissionController:
+    """
+    Bounded queue with deadlines in front of a dedicated inference pool.
+
+    At most ``n_workers`` requests run and ``max_queue`` wait, a request
+    beyond that or one that would not finish before its deadline, after the
+    estimated queue wait and service time, is refused at once with
+    ``Overloaded``. A queued request that can no longer finish in time when
+    a worker picks it up raises ``DeadlineExceeded`` instead of being
+    scored.
+    """
+
+    def __init__(self, n_workers: int = None, max_queue: int = 64, service_ms: float = 50.0,
+                 fastest_answer_ms=None):
+        self.n_workers = n_workers or os.cpu_count()
+        self.max_queue = max_queue
+        # callable giving the fastest answer a request can get, e.g. with a
+        # degraded model tier, the deadline checks use it instead of the
+        # average service time when it is set
+        self.fastest_answer_ms = fastest_answer_ms
+        self._executor = ThreadPoolExecutor(max_workers=self.n_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        # moving average of the time a worker spends on a request, the
+        # starting value only matters until the first requests finish
+        self._service_ms = service_ms
+        self.admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.shed = {"queue_full": 0, "deadline_too_short": 0}
+        self.expired = 0
+        self.cancelled = 0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def expected_wait_ms(self) -> float:
+        # time until a new request reaches a worker with the queue as it is
+        if self._running + self._queued < self.n_workers:
+            return 0.0
+        return (self._queued // self.n_workers + 1) * self._service_ms
+
+    def _answer_ms(self) -> float:
+        return self._service_ms if self.fastest_answer_ms is None else self.fastest_answer_ms()
+
+    def retry_after(self) -> int:
+        # whole seconds until the queue has drained at the current pace
+        return max(1, math.ceil((self._queued + self._running) * self._service_ms / self.n_workers / 1000))
+
+    def _admit(self, deadline: float) -> None:
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.shed["queue_full"] += 1
+                raise Overloaded("queue_full", self.retry_after())
+            if time.monotonic() + (self.expected_wait_ms() + self._answer_ms()) / 1000 > deadline:
+                self.shed["deadline_too_short"] += 1
+                raise Overloaded("deadline_too_short", self.retry_after())
+            self._queued += 1
+            self.admitted += 1
+
+    def _call(self, fn, args, deadline: float, queued_at: float):
+        start = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self.wait_histogram[bisect_left(WAIT_BUCKETS_MS, (start - queued_at) * 1000)] += 1
+            if start + self._answer_ms() / 1000 > deadline:
+                self.expired += 1
+                raise DeadlineExceeded()
+            self._running += 1
+        try:
+            result = fn(*args)
+        except Exception:
+            with self._lock:
+                self._running -= 1
+                self.failed += 1
+            raise
+        # only successful calls count as completed and feed the service time
+        service_ms = (time.monotonic() - start) * 1000
+        with self._lock:
+            self._running -= 1
+            self.completed += 1
+            self._service_ms = 0.9 * self._service_ms + 0.1 * service_ms
+        return result
+
+    async def run(self, fn, *args, deadline: float):
+        """
+        Run ``fn(*args)`` on the inference pool, ``deadline`` is a
+        ``time.monotonic()`` timestamp.
+        """
+        self._admit(deadline)
+        future = self._executor.submit(self._call, fn, args, deadline, time.monotonic())
+        future.add_done_callback(self._release_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def _release_cancelled(self, future) -> None:
+        # a waiter cancelled before a worker picked it up never reaches _call
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self.cancelled += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.n_workers,
+                    "max_queue": self.max_queue,
+                    "queue_depth": self._queued,
+                    "running": self._running,
+                    "admitted": self.admitted,
+                    "completed": self.completed,
+                    "failed": self.failed,
+                    "expired": self.expired,
+                    "cancelled": self.cancelled,
+                    "shed": dict(self.shed),
+                    "avg_service_ms": round(self._service_ms, 3),
+                    "queue_wait_ms": {"buckets": WAIT_BUCKETS_MS + ["inf"],
+                                      "counts": list(self.wait_histogram)}}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi.exceptions import RequestValidationError
+from src.serving.fast_decode import DTYPES, FIELDS
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# the raw Swiggy columns of schema.Data as arrow types
+ORDER_SCHEMA = pa.schema([(name, {np.float64: pa.float64(), np.int64: pa.int64()}.get(dtype, pa.string()))
+                          for name, dtype in DTYPES.items()])
+
+# row errors listed per column, the rest are only counted
+MAX_ERRORS_PER_COLUMN = 100
+
+PREDICTION_SCHEMA = pa.schema([("prediction", pa.float64()), ("distance", pa.float64())])
+
+# column, low, high and the message of the Data validator
+COORDINATE_RANGES = [
+    ("Restaurant_latitude", 8.0, 37.0, "Latitude must be between 8.0 and 37.0 for India"),
+    ("Delivery_location_latitude", 8.0, 37.0, "Latitude must be between 8.0 and 37.0 for India"),
+    ("Restaurant_longitude", 68.0, 97.0, "Longitude must be between 68.0 and 97.0 for India"),
+    ("Delivery_location_longitude", 68.0, 97.0, "Longitude must be between 68.0 and 97.0 for India"),
+]
+
+
+def read_table(body: bytes) -> pa.Table:
+    # the stream is read in place from the request bytes, without a copy
+    try:
+        return pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise RequestValidationError([{"type": "arrow_invalid", "loc": ("body",),
+                                       "msg": f"Invalid Arrow IPC stream: {e}", "input": None}])
+
+
+def error_rows(mask, name: str, errors: list) -> np.ndarray:
+    # the first failing rows of a column, a summary error counts the others
+    rows = np.flatnonzero(mask.to_numpy(zero_copy_only=False))
+    if len(rows) > MAX_ERRORS_PER_COLUMN:
+        errors.append({"type": "too_many_errors", "loc": ("body", name),
+                       "msg": f"{len(rows)} rows are invalid, the first {MAX_ERRORS_PER_COLUMN} are listed",
+                       "input": None, "ctx": {"count": int(len(rows))}})
+    return rows[:MAX_ERRORS_PER_COLUMN]
+
+
+def validate_table(table: pa.Table) -> pa.Table:
+    """
+    Check an order table column by column with the rules of ``Data`` and
+    cast it to ``ORDER_SCHEMA``. Row errors use the locations and messages
+    of a JSON batch, ("body", row, field), a missing or mistyped column is
+    reported once at ("body", column). At most ``MAX_ERRORS_PER_COLUMN``
+    rows are listed per column.
+    """
+    errors = [{"type": "missing", "loc": ("body", name), "msg": "Field required", "input": None}
+              for name in FIELDS if name not in table.column_names]
+    if errors:
+        raise RequestValidationError(errors)
+
+    columns = []
+    for field in ORDER_SCHEMA:
+        column = table.column(field.name)
+        try:
+            # safe casts only, e.g. int32 to int64 or large_string to string
+            column = column.cast(field.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            errors.append({"type": "arrow_type", "loc": ("body", field.name),
+                           "msg": f"Column should have type {field.type}, got {column.type}",
+                           "input": None})
+            continue
+        # every field of Data is required, a null is a missing value
+        for row in error_rows(column.is_null(), field.name, errors):
+            errors.append({"type": "missing", "loc": ("body", int(row), field.name),
+                           "msg": "Field required", "input": None})
+        columns.append(column)
+
+    if not errors:
+        for name, low, high, message in COORDINATE_RANGES:
+            values = columns[FIELDS.index(name)]
+            outside = pc.invert(pc.and_(pc.greater_equal(values, low), pc.less_equal(values, high)))
+            for row in error_rows(outside, name, errors):
+                value = values[int(row)].as_py()
+                errors.append({"type": "value_error", "loc": ("body", int(row), name),
+                               "msg": f"Value error, {message} (got {value})", "input": value,
+                               "ctx": {"error": {}}})
+    if errors:
+        raise RequestValidationError(errors)
+    return pa.Table.from_arrays(columns, schema=ORDER_SCHEMA)
+
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    # column by column, numeric columns are not copied into one block and
+    # strings become the object columns of /predict
+    return table.to_pandas(split_blocks=True)
+
+
+def write_predictions(predictions: np.ndarray, distances: np.ndarray) -> bytes:
+    # one record batch, rows dropped by the cleaning are null
+    batch = pa.record_batch([pa.array(predictions, mask=np.isnan(predictions)),
+                             pa.array(distances, mask=np.isnan(distances))],
+                            schema=PREDICTION_SCHEMA)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, PREDICTION_SCHEMA) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
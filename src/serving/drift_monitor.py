@@ -0,0 +1,158 @@
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+from collections import deque
+from pathlib import Path
+from src.features.drift import FeatureSketch, drift_report
+
+# create logger
+logger = logging.getLogger("drift_monitor")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+class DriftMonitor:
+    """
+    Keeps a live FeatureSketch of the cleaned features served by this
+    worker and compares it with the training reference.
+
+    ``observe`` only appends the cleaned frame to a deque, which costs a
+    couple of microseconds. A one row frame holds about 37 KB, so the deque is
+    bounded by frames as well as rows and the background thread is woken
+    early once it is half full. That thread folds the frames into the
+    sketch and, every ``interval`` seconds, saves it as
+    ``<hostname>-<pid>-<uuid>.json`` in ``snapshot_dir`` so that ``report``
+    can merge the sketches of every live worker. A snapshot not rewritten
+    for ``stale_intervals`` intervals belongs to a worker that is gone, it
+    is left out of the report and pruned.
+    """
+
+    def __init__(self, reference_path: Path, snapshot_dir: Path,
+                 interval: float = 10.0, max_pending_frames: int = 256, max_pending_rows: int = 50000,
+                 stale_intervals: int = 3):
+        self.reference = FeatureSketch.load(reference_path)
+        self.live = FeatureSketch(self.reference.bin_edges)
+        self.snapshot_dir = Path(snapshot_dir)
+        # pids repeat across containers and restarts, the uuid does not
+        self.snapshot_path = self.snapshot_dir / f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        self.interval = interval
+        self.max_age = stale_intervals * interval
+        self.max_pending_frames = max_pending_frames
+        self.max_pending_rows = max_pending_rows
+        self._pending = deque()
+        self._pending_rows = 0
+        self.dropped_rows = 0
+        self._pending_lock = threading.Lock()
+        # one drain at a time, the /drift request and the background thread
+        self._drain_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+    def observe(self, cleaned_data) -> None:
+        with self._pending_lock:
+            self._pending.append(cleaned_data)
+            self._pending_rows += len(cleaned_data)
+            # oldest frames are dropped when the folding thread falls behind
+            while len(self._pending) > 1 and (len(self._pending) > self.max_pending_frames
+                                              or self._pending_rows > self.max_pending_rows):
+                dropped = self._pending.popleft()
+                self._pending_rows -= len(dropped)
+                self.dropped_rows += len(dropped)
+            if not self._wake_event.is_set() and (len(self._pending) * 2 >= self.max_pending_frames
+                                                  or self._pending_rows * 2 >= self.max_pending_rows):
+                self._wake_event.set()
+
+    def _drain(self) -> None:
+        with self._pending_lock:
+            frames, self._pending = self._pending, deque()
+            self._pending_rows = 0
+        for frame in frames:
+            if len(frame) > 1:
+                self.live.update_frame(frame)
+                continue
+            for values in frame.to_numpy():
+                self.live.update_row(dict(zip(frame.columns, values)))
+
+    def _snapshots(self):
+        # the snapshots of the other workers still alive, stale ones are yielded as None
+        now = time.time()
+        for snapshot_path in self.snapshot_dir.glob("*.json"):
+            if snapshot_path == self.snapshot_path:
+                continue
+            try:
+                stale = now - snapshot_path.stat().st_mtime > self.max_age
+            except FileNotFoundError:
+                continue
+            yield snapshot_path, stale
+
+    def _prune(self) -> None:
+        for snapshot_path, stale in self._snapshots():
+            if stale:
+                snapshot_path.unlink(missing_ok=True)
+                logger.info(f"Pruned stale drift snapshot {snapshot_path}")
+
+    def _run(self) -> None:
+        saved_at = time.monotonic()
+        while True:
+            # woken early by a half full queue, the snapshot still waits for the interval
+            self._wake_event.wait(max(0.0, saved_at + self.interval - time.monotonic()))
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                return
+            try:
+                with self._drain_lock:
+                    self._drain()
+                    if time.monotonic() - saved_at < self.interval:
+                        continue
+                    self.live.save(self.snapshot_path)
+                saved_at = time.monotonic()
+                self._prune()
+            except Exception:
+                logger.exception("Updating the drift sketch failed")
+
+    def merged(self) -> FeatureSketch:
+        # this worker's sketch plus the latest snapshots of the other live workers
+        with self._drain_lock:
+            self._drain()
+            merged = FeatureSketch.from_dict(self.live.to_dict())
+        for snapshot_path, stale in self._snapshots():
+            if stale:
+                continue
+            try:
+                merged.merge(FeatureSketch.load(snapshot_path))
+            except (OSError, ValueError) as error:
+                logger.warning(f"Skipping drift snapshot {snapshot_path}: {error}")
+        return merged
+
+    def report(self, psi_threshold: float = 0.2) -> dict:
+        report = drift_report(self.reference, self.merged(), psi_threshold=psi_threshold)
+        report["dropped_rows"] = self.dropped_rows
+        return report
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+        with self._drain_lock:
+            self._drain()
+            self.live.save(self.snapshot_path)
@@ -0,0 +1,154 @@
+import json
+import msgspec
+import numpy as np
+import pandas as pd
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import TypeAdapter, ValidationError
+
+
+class Order(msgspec.Struct):
+    # the fields of schema.Data, in the order of the raw Swiggy columns
+    ID: str
+    Delivery_person_ID: str
+    Delivery_person_Age: str
+    Delivery_person_Ratings: str
+    Restaurant_latitude: float
+    Restaurant_longitude: float
+    Delivery_location_latitude: float
+    Delivery_location_longitude: float
+    Order_Date: str
+    Time_Orderd: str
+    Time_Order_picked: str
+    Weatherconditions: str
+    Road_traffic_density: str
+    Vehicle_condition: int
+    Type_of_order: str
+    Type_of_vehicle: str
+    multiple_deliveries: str
+    Festival: str
+    City: str
+
+
+FIELDS = list(Order.__struct_fields__)
+
+# numpy dtype of each column, what pandas infers for the /predict frame
+DTYPES = {name: {float: np.float64, int: np.int64}.get(annotation, object)
+          for name, annotation in Order.__annotations__.items()}
+
+
+def in_india(order: Order) -> bool:
+    # the ranges of the Data latitude and longitude validators
+    return (8.0 <= order.Restaurant_latitude <= 37.0
+            and 8.0 <= order.Delivery_location_latitude <= 37.0
+            and 68.0 <= order.Restaurant_longitude <= 97.0
+            and 68.0 <= order.Delivery_location_longitude <= 97.0)
+
+
+def to_frame(orders: list) -> pd.DataFrame:
+    # typed column arrays handed to pandas without a copy or dtype inference
+    columns = zip(*[msgspec.structs.astuple(order) for order in orders]) if orders else [()] * len(FIELDS)
+    return pd.DataFrame({name: np.array(values, dtype=DTYPES[name])
+                         for name, values in zip(FIELDS, columns)}, copy=False)
+
+
+class LineTooLong(ValueError):
+    # a line of a newline delimited body went over the length limit
+    pass
+
+
+async def iter_lines(chunks, max_line_bytes: int = None):
+    # newline delimited bodies arrive in arbitrary chunks, blank lines are
+    # skipped, only the unfinished line is kept between chunks
+    pending = bytearray()
+    async for chunk in chunks:
+        start, end = 0, chunk.find(b"\n")
+        while end >= 0:
+            pending += chunk[start:end]
+            start = end + 1
+            if max_line_bytes is not None and len(pending) > max_line_bytes:
+                raise LineTooLong(f"A line is longer than {max_line_bytes} bytes")
+            if pending.strip():
+                yield bytes(pending)
+            pending.clear()
+            end = chunk.find(b"\n", start)
+        pending += chunk[start:]
+        if max_line_bytes is not None and len(pending) > max_line_bytes:
+            raise LineTooLong(f"A line is longer than {max_line_bytes} bytes")
+    if pending.strip():
+        yield bytes(pending)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for a body iterator that still reads the request.
+    Starlette listens for the disconnect on ``receive`` next to older ASGI
+    servers, which would take the request chunks from the iterator, so
+    only the iterator reads here and a disconnect ends the request stream.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+class RequestDecoder:
+    """
+    Decodes JSON bodies with msgspec straight into ``Order`` structs, no
+    pydantic model is built for a valid body.
+
+    msgspec only accepts the exact JSON types, a subset of what pydantic
+    coerces. Anything it rejects, and orders outside the coordinate ranges,
+    go through ``model`` the way FastAPI validates a body, so the accepted
+    bodies, the 422 errors and their messages are those of ``/predict``.
+    """
+
+    def __init__(self, model):
+        self._single = msgspec.json.Decoder(Order)
+        self._batch = msgspec.json.Decoder(list[Order])
+        self._single_adapter = TypeAdapter(model)
+        self._batch_adapter = TypeAdapter(list[model])
+
+    def decode(self, body: bytes, loc: tuple = ("body",)) -> Order:
+        try:
+            order = self._single.decode(body)
+            if in_india(order):
+                return order
+        except (msgspec.ValidationError, msgspec.DecodeError):
+            pass
+        return self._validate(body, self._single_adapter, loc)
+
+    def decode_batch(self, body: bytes, loc: tuple = ("body",)) -> list:
+        try:
+            orders = self._batch.decode(body)
+            if all(in_india(order) for order in orders):
+                return orders
+        except (msgspec.ValidationError, msgspec.DecodeError):
+            pass
+        return self._validate(body, self._batch_adapter, loc)
+
+    def _validate(self, body: bytes, adapter: TypeAdapter, loc: tuple):
+        # the slow path, the errors FastAPI builds for a pydantic body
+        if not body:
+            raise RequestValidationError([{"type": "missing", "loc": loc,
+                                           "msg": "Field required", "input": None}])
+        try:
+            value = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise RequestValidationError([{"type": "json_invalid", "loc": (*loc, e.pos),
+                                           "msg": "JSON decode error", "input": {},
+                                           "ctx": {"error": e.msg}}], body=e.doc)
+        try:
+            validated = adapter.validate_python(value, from_attributes=True)
+        except ValidationError as e:
+            raise RequestValidationError([{**error, "loc": (*loc, *error["loc"])}
+                                          for error in e.errors(include_url=False)], body=value)
+        # pydantic coerced what msgspec would not, e.g. "2" for Vehicle_condition
+        if isinstance(validated, list):
+            return [Order(**item.model_dump()) for item in validated]
+        return Order(**validated.model_dump())
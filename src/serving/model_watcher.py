@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+import logging
+import pandas as pd
+from dataclasses import dataclass
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("model_watcher")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    # everything a request needs, swapped as one reference
+    pipeline: object
+    version: str
+    source: str
+    loaded_at: float
+    warmup_seconds: float
+
+
+class RegistrySource:
+    # follows the version that a registry stage points to
+    def __init__(self, registry, model_name: str, stage: str):
+        self.registry = registry
+        self.model_name = model_name
+        self.stage = stage
+
+    def describe(self) -> str:
+        return f"registry:{self.model_name}/{self.stage}"
+
+    def current_version(self):
+        return self.registry.get_latest_version(model_name=self.model_name, stage=self.stage)
+
+    def load(self, version: str):
+        model = self.registry.load_model(model_name=self.model_name, version=version)
+        preprocessor = self.registry.load_artifact(model_name=self.model_name, version=version,
+                                                   artifact_name="preprocessor.joblib")
+        return model, preprocessor
+
+
+class BundleDirectorySource:
+    # follows model.bundle and preprocessor.bundle in a directory
+    def __init__(self, bundle_dir: Path):
+        self.bundle_dir = Path(bundle_dir)
+
+    def describe(self) -> str:
+        return f"bundle:{self.bundle_dir}"
+
+    def current_version(self):
+        # an explicit VERSION file wins, otherwise the bundle modification times
+        version_path = self.bundle_dir / "VERSION"
+        if version_path.exists():
+            return version_path.read_text().strip()
+        try:
+            stats = [(self.bundle_dir / name).stat()
+                     for name in ("model.bundle", "preprocessor.bundle")]
+        except FileNotFoundError:
+            return None
+        return "-".join(str(stat.st_mtime_ns) for stat in stats)
+
+    def load(self, version: str):
+        from src.models.artifacts import load_artifact
+
+        model = load_artifact(self.bundle_dir / "model.bundle")
+        preprocessor = load_artifact(self.bundle_dir / "preprocessor.bundle")
+        return model, preprocessor
+
+
+def load_warmup_payloads(file_path: Path, required_fields: list) -> list:
+    # keep only lines that look like prediction requests
+    payloads = []
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return payloads
+    with open(file_path) as f:
+        for line in f:
+            try:
+                payload = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(payload, dict) and all(field in payload for field in required_fields):
+                payloads.append({field: payload[field] for field in required_fields})
+    return payloads
+
+
+class ModelWatcher:
+    """
+    Polls a model source in a background thread and hot swaps the served
+    model when a new version shows up.
+
+    The new model and preprocessor are loaded and warmed up on sample
+    payloads off the request path, then published by replacing a single
+    reference. Requests read ``current`` once, so the ones already running
+    finish on the model they started with.
+    """
+
+    def __init__(self, source, clean_fn, warmup_payloads: list = None,
+                 poll_interval: float = 30.0, warmup_single_rows: int = 0,
+                 compile_preprocessor: bool = False):
+        self.source = source
+        self.clean_fn = clean_fn
+        self.warmup_payloads = warmup_payloads or []
+        self.poll_interval = poll_interval
+        self.warmup_single_rows = warmup_single_rows
+        self.compile_preprocessor = compile_preprocessor
+        self.current = None
+        # set once the first model is loaded and warmed up
+        self.ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        # serialises reloads triggered by the poller and by hand
+        self._reload_lock = threading.Lock()
+
+    def _build(self, version: str) -> LoadedModel:
+        if hasattr(self.source, "load_pipeline"):
+            # sources such as the onnx graph come as one ready pipeline
+            pipeline = self.source.load_pipeline(version)
+        elif self.compile_preprocessor:
+            from src.features.compiled_preprocessor import CompiledPipeline
+
+            # the fitted preprocessor as a static plan writing float32 features
+            model, preprocessor = self.source.load(version)
+            pipeline = CompiledPipeline(preprocessor, model)
+        else:
+            # sklearn is first needed here, not when the api is imported
+            from sklearn.pipeline import Pipeline
+
+            model, preprocessor = self.source.load(version)
+            pipeline = Pipeline(steps=[
+                ('preprocess',preprocessor),
+                ("regressor",model)
+            ])
+
+        # warm up the new pipeline before it takes traffic, first as one
+        # batch and then one row at a time like /predict does
+        start = time.perf_counter()
+        if self.warmup_payloads:
+            pipeline.predict(self.clean_fn(pd.DataFrame(self.warmup_payloads)))
+        batch_seconds = time.perf_counter() - start
+        for i in range(self.warmup_single_rows if self.warmup_payloads else 0):
+            payload = self.warmup_payloads[i % len(self.warmup_payloads)]
+            cleaned = self.clean_fn(pd.DataFrame(payload, index=[0]))
+            # a lone row with a missing category cannot be encoded, skip it
+            if len(cleaned) and not cleaned.isna().any(axis=None):
+                pipeline.predict(cleaned)
+        warmup_seconds = time.perf_counter() - start
+        logger.info(f"Warm up of version {version}: {len(self.warmup_payloads)} payloads "
+                    f"as a batch in {batch_seconds:.4f}s, {self.warmup_single_rows} single rows "
+                    f"in {warmup_seconds - batch_seconds:.4f}s")
+
+        return LoadedModel(pipeline=pipeline, version=str(version),
+                           source=self.source.describe(), loaded_at=time.time(),
+                           warmup_seconds=round(warmup_seconds, 4))
+
+    def reload(self, force: bool = False) -> bool:
+        with self._reload_lock:
+            version = self.source.current_version()
+            if version is None:
+                logger.warning(f"No model version found at {self.source.describe()}")
+                return False
+            if not force and self.current is not None and self.current.version == str(version):
+                return False
+
+            loaded = self._build(version)
+            previous = self.current
+            self.current = loaded
+            self.ready.set()
+            logger.info(f"Serving model version {loaded.version} "
+                        f"(was {previous.version if previous else None}), "
+                        f"warm up took {loaded.warmup_seconds}s")
+            return True
+
+    def _poll(self) -> None:
+        # the first load happens right away when start did not wait for it
+        wait = self.poll_interval if self.current is not None else 0
+        while not self._stop_event.wait(wait):
+            try:
+                self.reload()
+            except Exception:
+                # keep serving the old model when a new one fails to load
+                logger.exception("Model reload failed")
+            wait = self.poll_interval
+
+    def start(self, wait: bool = True) -> None:
+        # without waiting the first model loads in the background and
+        # ``ready`` tells when it can take traffic
+        if wait and self.current is None:
+            self.reload()
+        self._thread = threading.Thread(target=self._poll, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval)
@@ -0,0 +1,54 @@
+from pathlib import Path
+import numpy as np
+
+# onnx input element types and the numpy types fed to them
+ONNX_INPUT_DTYPES = {"tensor(float)": np.float32,
+                     "tensor(double)": np.float64,
+                     "tensor(int64)": np.int64,
+                     "tensor(string)": object}
+
+
+class OnnxPipeline:
+    """
+    Runs the exported preprocessor and model graph with onnxruntime. Takes
+    the cleaned DataFrame like the sklearn pipeline does and feeds every
+    graph input from the column of the same name.
+    """
+
+    def __init__(self, model_path: Path, intra_op_threads: int = 0):
+        # onnxruntime is only needed when this backend is chosen
+        import onnxruntime as rt
+
+        options = rt.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        self.session = rt.InferenceSession(str(model_path), sess_options=options,
+                                           providers=["CPUExecutionProvider"])
+        self.inputs = [(graph_input.name, ONNX_INPUT_DTYPES[graph_input.type])
+                       for graph_input in self.session.get_inputs()]
+
+    def predict(self, data) -> np.ndarray:
+        feeds = {}
+        for name, dtype in self.inputs:
+            values = data[name].to_numpy().reshape(-1, 1)
+            # strings go in as str objects, missing values become "nan"
+            feeds[name] = values.astype(str).astype(object) if dtype is object else values.astype(dtype)
+        return self.session.run(None, feeds)[0].ravel().astype(np.float64)
+
+
+class OnnxFileSource:
+    # follows an exported onnx graph on disk
+    def __init__(self, model_path: Path, intra_op_threads: int = 0):
+        self.model_path = Path(model_path)
+        self.intra_op_threads = intra_op_threads
+
+    def describe(self) -> str:
+        return f"onnx:{self.model_path}"
+
+    def current_version(self):
+        try:
+            return str(self.model_path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def load_pipeline(self, version: str) -> OnnxPipeline:
+        return OnnxPipeline(self.model_path, intra_op_threads=self.intra_op_threads)
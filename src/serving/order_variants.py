@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from scripts.data_clean_utils import create_distance_type, time_of_day
+
+EARTH_RADIUS_KM = 6371
+
+
+def clean_order(raw: dict, clean_fn) -> pd.DataFrame:
+    # the one cleaned row every variant of the order starts from
+    cleaned = clean_fn(pd.DataFrame(raw, index=[0]))
+    if len(cleaned) == 0:
+        raise ValueError("The order is dropped by the cleaning, the rider is under 18 or rated 6 stars")
+    return cleaned.reset_index(drop=True)
+
+
+def repeat_order(cleaned: pd.DataFrame, n_rows: int) -> pd.DataFrame:
+    # n copies of a cleaned row, dtypes and categories kept
+    return cleaned.iloc[np.zeros(n_rows, dtype=np.intp)].reset_index(drop=True)
+
+
+def with_distances(frame: pd.DataFrame, distances: np.ndarray) -> pd.DataFrame:
+    # a new distance and the distance type the cleaning derives from it
+    return create_distance_type(frame.assign(distance=distances))
+
+
+def haversine_matrix(restaurants: np.ndarray, deliveries: np.ndarray) -> np.ndarray:
+    """
+    Distances in km between every restaurant and every delivery point, the
+    formula of the cleaning broadcast to an (n_restaurants, n_deliveries)
+    matrix. Both inputs are (n, 2) arrays of latitude and longitude.
+    """
+    lat1, lon1 = np.radians(np.abs(restaurants)).T[:, :, None]
+    lat2, lon2 = np.radians(np.abs(deliveries)).T[:, None, :]
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2.0) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2.0) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+
+def eta_matrix(cleaned: pd.DataFrame, restaurants: np.ndarray, deliveries: np.ndarray, predict,
+               resolution_km: float = 0.01, chunk_rows: int = 8192) -> np.ndarray:
+    """
+    Predicted time for every restaurant and delivery point pair of one
+    order context. Only the distance and its type differ between the
+    pairs, so each distinct distance, rounded to ``resolution_km`` (0 keeps
+    them exact), is scored once, in chunks of ``chunk_rows``, and the
+    predictions are spread back over the matrix.
+    """
+    distances = haversine_matrix(restaurants, deliveries)
+    if resolution_km > 0:
+        steps, inverse = np.unique(np.rint(distances / resolution_km), return_inverse=True)
+        unique_distances = steps * resolution_km
+    else:
+        unique_distances, inverse = np.unique(distances, return_inverse=True)
+
+    predictions = np.empty(len(unique_distances), dtype=np.float64)
+    for start in range(0, len(unique_distances), chunk_rows):
+        chunk = unique_distances[start:start + chunk_rows]
+        predictions[start:start + len(chunk)] = predict(with_distances(repeat_order(cleaned, len(chunk)), chunk))
+    return predictions[inverse.reshape(-1)].reshape(distances.shape)
+
+
+# fields of a raw order that belong to the rider, the rest is shared by every candidate
+RIDER_FIELDS = ["Delivery_person_ID", "Delivery_person_Age", "Delivery_person_Ratings",
+                "Type_of_vehicle", "Vehicle_condition", "Time_Order_picked"]
+
+
+def excluded_riders(candidates: pd.DataFrame) -> np.ndarray:
+    # the riders the cleaning drops, under 18 or rated 6 stars
+    return ((candidates["Delivery_person_Age"].astype(float) < 18)
+            | (candidates["Delivery_person_Ratings"] == "6")).to_numpy()
+
+
+def with_riders(cleaned: pd.DataFrame, order_time: str, candidates: pd.DataFrame) -> pd.DataFrame:
+    """
+    The cleaned order once per candidate, with the rider columns of the raw
+    ``candidates`` cleaned the way ``data_cleaning`` does. The pickup time
+    is counted from ``order_time``, the raw ``Time_Orderd`` of the order.
+    """
+    raw = candidates.replace("NaN ", np.nan)
+    times = pd.to_datetime(pd.concat([pd.Series([order_time]), candidates["Time_Order_picked"]],
+                                     ignore_index=True).replace("NaN ", np.nan), format="mixed")
+    return repeat_order(cleaned, len(candidates)).assign(
+        age=raw["Delivery_person_Age"].astype(float).to_numpy(),
+        ratings=raw["Delivery_person_Ratings"].astype(float).to_numpy(),
+        type_of_vehicle=raw["Type_of_vehicle"].str.rstrip().str.lower().to_numpy(),
+        vehicle_condition=raw["Vehicle_condition"].to_numpy(),
+        pickup_time_minutes=((times.iloc[1:] - times.iloc[0]).dt.seconds / 60).to_numpy())
+
+
+def rider_etas(raw_order: dict, candidates: pd.DataFrame, clean_fn, predict) -> np.ndarray:
+    """
+    Predicted time of ``raw_order`` delivered by each candidate rider, NaN
+    for the riders the cleaning drops. ``raw_order`` has every field of an
+    order in their usual order, its rider fields are replaced by the first
+    kept rider to clean the order once, then every candidate is scored in
+    one call.
+    """
+    etas = np.full(len(candidates), np.nan)
+    kept = np.flatnonzero(~excluded_riders(candidates))
+    if len(kept) == 0:
+        return etas
+    riders = candidates.iloc[kept].reset_index(drop=True)
+    cleaned = clean_order({**raw_order, **riders.iloc[0][RIDER_FIELDS].to_dict()}, clean_fn)
+    etas[kept] = predict(with_riders(cleaned, raw_order["Time_Orderd"], riders))
+    return etas
+
+
+# each what-if axis maps its raw values to the cleaned column they change,
+# the way data_cleaning does
+def delay_pickup(cleaned: pd.DataFrame, delays: list) -> tuple:
+    # minutes added to the pickup, wrapped over the day like the cleaning's dt.seconds
+    minutes = (cleaned["pickup_time_minutes"].iloc[0] + np.asarray(delays, dtype=np.float64)) % (24 * 60)
+    return "pickup_time_minutes", pd.Series(minutes)
+
+
+def change_traffic(cleaned: pd.DataFrame, values: list) -> tuple:
+    return "traffic", pd.Series(values, dtype=object).replace("NaN ", np.nan).str.rstrip().str.lower()
+
+
+def change_weather(cleaned: pd.DataFrame, values: list) -> tuple:
+    weather = pd.Series(values, dtype=object).replace("NaN ", np.nan)
+    return "weather", weather.str.replace("conditions ", "").str.lower().replace("nan", np.nan)
+
+
+def change_order_hour(cleaned: pd.DataFrame, hours: list) -> tuple:
+    # the pickup moves with the order, only the time of day changes
+    return "order_time_of_day", time_of_day(pd.Series(hours))
+
+
+WHAT_IF_AXES = {"pickup_delay_minutes": delay_pickup,
+                "Road_traffic_density": change_traffic,
+                "Weatherconditions": change_weather,
+                "order_hour": change_order_hour}
+
+
+def what_if_grid(cleaned: pd.DataFrame, axes: dict) -> pd.DataFrame:
+    """
+    The cleaned order once per combination of the ``axes`` values, in the
+    order of ``np.indices``, the last axis varying fastest. ``axes`` maps
+    names of ``WHAT_IF_AXES`` to their raw values, only the columns they
+    change are rebuilt.
+    """
+    shape = [len(values) for values in axes.values()]
+    positions = np.indices(shape).reshape(len(shape), -1)
+    columns = {}
+    for (name, values), position in zip(axes.items(), positions):
+        column, cleaned_values = WHAT_IF_AXES[name](cleaned, values)
+        # the dtype of the cleaned column, e.g. str columns under pandas string inference
+        columns[column] = cleaned_values.iloc[position].reset_index(drop=True).astype(cleaned[column].dtype)
+    return repeat_order(cleaned, positions.shape[1]).assign(**columns)
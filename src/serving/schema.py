@@ -0,0 +1,147 @@
+from typing import List, Optional
+from pydantic import BaseModel, validator, Field
+
+
+class Data(BaseModel):  
+    ID: str
+    Delivery_person_ID: str
+    Delivery_person_Age: str
+    Delivery_person_Ratings: str
+    Restaurant_latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
+    Restaurant_longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
+    Delivery_location_latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
+    Delivery_location_longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
+    Order_Date: str
+    Time_Orderd: str
+    Time_Order_picked: str
+    Weatherconditions: str
+    Road_traffic_density: str
+    Vehicle_condition: int
+    Type_of_order: str
+    Type_of_vehicle: str
+    multiple_deliveries: str
+    Festival: str
+    City: str
+
+    @validator('Restaurant_latitude', 'Delivery_location_latitude')
+    def validate_latitude(cls, v):
+        if not (8.0 <= v <= 37.0):
+            raise ValueError(f"Latitude must be between 8.0 and 37.0 for India (got {v})")
+        return v
+
+    @validator('Restaurant_longitude', 'Delivery_location_longitude')
+    def validate_longitude(cls, v):
+        if not (68.0 <= v <= 97.0):
+            raise ValueError(f"Longitude must be between 68.0 and 97.0 for India (got {v})")
+        return v
+
+
+class Location(BaseModel):
+    latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
+    longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
+
+    @validator('latitude')
+    def validate_latitude(cls, v):
+        if not (8.0 <= v <= 37.0):
+            raise ValueError(f"Latitude must be between 8.0 and 37.0 for India (got {v})")
+        return v
+
+    @validator('longitude')
+    def validate_longitude(cls, v):
+        if not (68.0 <= v <= 97.0):
+            raise ValueError(f"Longitude must be between 68.0 and 97.0 for India (got {v})")
+        return v
+
+
+class OrderContext(BaseModel):
+    # the fields of Data shared by every pair of an ETA matrix
+    ID: str = "eta_matrix"
+    Delivery_person_ID: str
+    Delivery_person_Age: str
+    Delivery_person_Ratings: str
+    Order_Date: str
+    Time_Orderd: str
+    Time_Order_picked: str
+    Weatherconditions: str
+    Road_traffic_density: str
+    Vehicle_condition: int
+    Type_of_order: str
+    Type_of_vehicle: str
+    multiple_deliveries: str
+    Festival: str
+    City: str
+
+
+class EtaMatrixRequest(BaseModel):
+    context: OrderContext
+    restaurants: List[Location] = Field(..., min_length=1)
+    deliveries: List[Location] = Field(..., min_length=1)
+    distance_resolution_km: float = Field(0.01, ge=0, description="Distances are rounded to this before "
+                                                                  "scoring, 0 scores every distance exactly")
+
+
+class RiderCandidate(BaseModel):
+    # the fields of Data that change with the rider
+    Delivery_person_ID: str
+    Delivery_person_Age: str
+    Delivery_person_Ratings: str
+    Type_of_vehicle: str
+    Vehicle_condition: int
+    Time_Order_picked: str
+
+
+class AssignmentOrder(BaseModel):
+    # the fields of Data shared by every candidate rider
+    ID: str
+    Restaurant_latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
+    Restaurant_longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
+    Delivery_location_latitude: float = Field(..., description="Must be between 8.0 and 37.0 (India)")
+    Delivery_location_longitude: float = Field(..., description="Must be between 68.0 and 97.0 (India)")
+    Order_Date: str
+    Time_Orderd: str
+    Weatherconditions: str
+    Road_traffic_density: str
+    Type_of_order: str
+    multiple_deliveries: str
+    Festival: str
+    City: str
+
+    @validator('Restaurant_latitude', 'Delivery_location_latitude')
+    def validate_latitude(cls, v):
+        if not (8.0 <= v <= 37.0):
+            raise ValueError(f"Latitude must be between 8.0 and 37.0 for India (got {v})")
+        return v
+
+    @validator('Restaurant_longitude', 'Delivery_location_longitude')
+    def validate_longitude(cls, v):
+        if not (68.0 <= v <= 97.0):
+            raise ValueError(f"Longitude must be between 68.0 and 97.0 for India (got {v})")
+        return v
+
+
+class RiderRankingRequest(BaseModel):
+    order: AssignmentOrder
+    candidates: List[RiderCandidate] = Field(..., min_length=1)
+    top_k: Optional[int] = Field(None, ge=1, description="Only the fastest riders, all of them by default")
+
+
+class WhatIfRequest(BaseModel):
+    # the order and the values each swept axis takes, the surface has one
+    # dimension per axis given, in this order
+    order: Data
+    pickup_delay_minutes: Optional[List[int]] = Field(None, min_length=1,
+                                                      description="Minutes added to the pickup time")
+    Road_traffic_density: Optional[List[str]] = Field(None, min_length=1)
+    Weatherconditions: Optional[List[str]] = Field(None, min_length=1)
+    order_hour: Optional[List[int]] = Field(None, min_length=1, description="Hours of the day, 0 to 23")
+
+    @validator('order_hour')
+    def validate_hours(cls, v):
+        if v is not None and not all(0 <= hour <= 23 for hour in v):
+            raise ValueError(f"Hours must be between 0 and 23 (got {v})")
+        return v
+
+    def axes(self) -> dict:
+        axes = {name: getattr(self, name)
+                for name in ["pickup_delay_minutes", "Road_traffic_density", "Weatherconditions", "order_hour"]}
+        return {name: values for name, values in axes.items() if values is not None}
@@ -0,0 +1,183 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import logging
+import numpy as np
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("shadow_scoring")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+# timestamp, primary prediction, challenger prediction, primary latency ms,
+# challenger latency ms, primary version id, challenger version id
+RECORD = struct.Struct("<dffffHH")
+RECORD_DTYPE = np.dtype([("timestamp", "<f8"),
+                         ("primary_pred", "<f4"),
+                         ("challenger_pred", "<f4"),
+                         ("primary_ms", "<f4"),
+                         ("challenger_ms", "<f4"),
+                         ("primary_version", "<u2"),
+                         ("challenger_version", "<u2")])
+
+LOG_FILENAME = "shadow.bin"
+VERSIONS_FILENAME = "versions.json"
+
+
+class ShadowLog:
+    """
+    Append only log of fixed size binary records, with version strings kept
+    once in a small side file.
+    """
+
+    def __init__(self, log_dir: Path):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        versions_path = self.log_dir / VERSIONS_FILENAME
+        self._versions = json.loads(versions_path.read_text()) if versions_path.exists() else []
+        self._file = open(self.log_dir / LOG_FILENAME, "ab", buffering=64 * 1024)
+
+    def _version_id(self, version: str) -> int:
+        if version not in self._versions:
+            self._versions.append(version)
+            (self.log_dir / VERSIONS_FILENAME).write_text(json.dumps(self._versions))
+        return self._versions.index(version)
+
+    def write(self, timestamp: float, primary_pred: float, challenger_pred: float,
+              primary_ms: float, challenger_ms: float,
+              primary_version: str, challenger_version: str) -> None:
+        self._file.write(RECORD.pack(timestamp, primary_pred, challenger_pred,
+                                     primary_ms, challenger_ms,
+                                     self._version_id(primary_version),
+                                     self._version_id(challenger_version)))
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_shadow_log(log_dir: Path):
+    # records as a structured array plus the version strings they refer to
+    log_dir = Path(log_dir)
+    records = np.fromfile(log_dir / LOG_FILENAME, dtype=RECORD_DTYPE)
+    versions = json.loads((log_dir / VERSIONS_FILENAME).read_text())
+    return records, versions
+
+
+class ShadowScorer:
+    """
+    Scores a challenger model on live traffic off the request path.
+
+    ``submit`` only does a non blocking put into a bounded queue and drops
+    the item when the queue is full, so a slow challenger sheds work instead
+    of backing up into ``/predict``. A single low priority worker thread
+    scores the already cleaned features and writes both predictions to the
+    shadow log.
+    """
+
+    def __init__(self, challenger_watcher, log_dir: Path, max_queue: int = 256,
+                 flush_interval: float = 1.0):
+        self.challenger_watcher = challenger_watcher
+        self.log = ShadowLog(log_dir)
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self.submitted = 0
+        self.shed = 0
+        self.scored = 0
+        self.failed = 0
+
+    def submit(self, cleaned_data, primary_pred: float, primary_ms: float,
+               primary_version: str) -> bool:
+        try:
+            self._queue.put_nowait((time.time(), cleaned_data, primary_pred,
+                                    primary_ms, primary_version))
+        except queue.Full:
+            self.shed += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _score(self, item) -> None:
+        timestamp, cleaned_data, primary_pred, primary_ms, primary_version = item
+        challenger = self.challenger_watcher.current
+        if challenger is None:
+            return
+        start = time.perf_counter()
+        challenger_pred = float(challenger.pipeline.predict(cleaned_data)[0])
+        challenger_ms = (time.perf_counter() - start) * 1000
+        self.log.write(timestamp, primary_pred, challenger_pred, primary_ms,
+                       challenger_ms, primary_version, challenger.version)
+        self.scored += 1
+
+    def _run(self) -> None:
+        # lowest scheduling priority for this thread where the os allows it
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is StopIteration:
+                break
+            if item is not None:
+                try:
+                    self._score(item)
+                except Exception:
+                    self.failed += 1
+                    logger.exception("Shadow scoring failed")
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self.log.flush()
+                last_flush = time.monotonic()
+        self.log.flush()
+
+    def stats(self) -> dict:
+        return {
+            "challenger_version": getattr(self.challenger_watcher.current, "version", None),
+            "queue_depth": self._queue.qsize(),
+            "submitted": self.submitted,
+            "shed": self.shed,
+            "scored": self.scored,
+            "failed": self.failed
+        }
+
+    def start(self) -> None:
+        # the challenger loads in the background, it must not hold up serving
+        self.challenger_watcher.start(wait=False)
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.challenger_watcher.stop()
+        if self._thread is not None:
+            # the sentinel must get in even when the queue is full
+            while True:
+                try:
+                    self._queue.put(StopIteration, timeout=self.flush_interval)
+                    break
+                except queue.Full:
+                    continue
+            self._thread.join()
+        self.log.close()
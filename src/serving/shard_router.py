@@ -0,0 +1,193 @@
+import json
+import threading
+import time
+import logging
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("shard_router")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+
+def beats_global(shard: dict) -> bool:
+    # decided on the cross validated error on the training rows, the test
+    # error in the manifest only reports, shards without it are trusted
+    if "cv_shard_mae" not in shard or "cv_global_mae" not in shard:
+        return True
+    return shard["cv_shard_mae"] < shard["cv_global_mae"]
+
+
+def read_rss_mb():
+    # resident set size of this process, None off linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        return None
+    return None
+
+
+class ShardRouter:
+    """
+    Routes cleaned rows to the model trained on their partition, e.g. their
+    ``city_type``, and the rest to the global model.
+
+    Shards listed in the manifest are loaded on first use and at most
+    ``max_loaded`` stay in memory, the least recently used one is dropped
+    first. A partition without a shard, a missing value, a shard that fails
+    to load or one whose cross validated error does not beat the global
+    model on its partition falls back to the global pipeline passed to
+    ``predict``.
+    """
+
+    def __init__(self, manifest_path: Path, max_loaded: int = 2):
+        manifest_path = Path(manifest_path)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        self.column = manifest["column"]
+        self.skipped = sorted(value for value, shard in manifest["shards"].items() if not beats_global(shard))
+        self.shard_files = {value: manifest_path.parent / shard["file"]
+                            for value, shard in manifest["shards"].items() if value not in self.skipped}
+        for value in self.skipped:
+            logger.info(f"Shard {self.column}={value} does not beat the global model, not routed")
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # one lock per shard, a cold shard loads without blocking the others
+        self._load_locks = {value: threading.Lock() for value in self.shard_files}
+        self.stats_by_shard = {value: {"requests": 0, "rows": 0, "loads": 0, "evictions": 0,
+                                       "load_ms": None, "rss_delta_mb": None,
+                                       "file_mb": round(path.stat().st_size / 1024 ** 2, 3)}
+                               for value, path in self.shard_files.items()}
+        self.fallback_rows = 0
+        self.failed = set()
+        self._route_seconds = 0.0
+        self._load_seconds = 0.0
+        self._routed = 0
+
+    def _load(self, value: str):
+        from sklearn.pipeline import Pipeline
+        from src.models.artifacts import load_artifact
+
+        rss_before = read_rss_mb()
+        start = time.perf_counter()
+        shard = load_artifact(self.shard_files[value])
+        pipeline = Pipeline(steps=[
+            ('preprocess', shard["preprocessor"]),
+            ("regressor", shard["model"])
+        ])
+        load_seconds = time.perf_counter() - start
+        rss_after = read_rss_mb()
+        with self._lock:
+            stats = self.stats_by_shard[value]
+            stats["loads"] += 1
+            self._load_seconds += load_seconds
+            stats["load_ms"] = round(load_seconds * 1000, 2)
+            if rss_before is not None and rss_after is not None:
+                stats["rss_delta_mb"] = round(rss_after - rss_before, 2)
+        logger.info(f"Loaded shard {self.column}={value} in {stats['load_ms']}ms")
+        return pipeline, load_seconds
+
+    def _get(self, value):
+        # the shard pipeline of a partition, None when the global model serves
+        # it, and the seconds spent loading it in this call
+        if value not in self.shard_files or value in self.failed:
+            return None, 0.0
+        with self._lock:
+            pipeline = self._loaded.get(value)
+            if pipeline is not None:
+                self._loaded.move_to_end(value)
+                return pipeline, 0.0
+        # a cold shard loads under its own lock, the loaded ones keep serving
+        with self._load_locks[value]:
+            with self._lock:
+                pipeline = self._loaded.get(value)
+                if pipeline is not None or value in self.failed:
+                    return pipeline, 0.0
+            try:
+                pipeline, load_seconds = self._load(value)
+            except Exception:
+                logger.exception(f"Shard {self.column}={value} failed to load, using the global model")
+                with self._lock:
+                    self.failed.add(value)
+                return None, 0.0
+            with self._lock:
+                self._loaded[value] = pipeline
+                while len(self._loaded) > self.max_loaded:
+                    evicted, _ = self._loaded.popitem(last=False)
+                    self.stats_by_shard[evicted]["evictions"] += 1
+                    logger.info(f"Evicted shard {self.column}={evicted}")
+            return pipeline, load_seconds
+
+    def get(self, value):
+        return self._get(value)[0]
+
+    def predict(self, cleaned_data, fallback) -> np.ndarray:
+        """
+        Predictions for the rows of ``cleaned_data`` in their order, each
+        group of rows scored by its shard or by ``fallback``.
+        """
+        start = time.perf_counter()
+        load_seconds = 0.0
+        n_rows = len(cleaned_data)
+        if n_rows == 1:
+            # the single row of /predict skips the grouping
+            groups = [(cleaned_data[self.column].iloc[0], None)]
+        else:
+            # missing values get code -1 and go to the global model
+            codes, uniques = pd.factorize(cleaned_data[self.column])
+            groups = [(uniques[code] if code >= 0 else None, np.flatnonzero(codes == code))
+                      for code in np.unique(codes)]
+        routes = []
+        counts = []
+        for value, rows in groups:
+            pipeline, seconds = self._get(value)
+            load_seconds += seconds
+            counts.append((None if pipeline is None else value, n_rows if rows is None else len(rows)))
+            routes.append((fallback if pipeline is None else pipeline, rows))
+        with self._lock:
+            for value, count in counts:
+                if value is None:
+                    self.fallback_rows += count
+                else:
+                    stats = self.stats_by_shard[value]
+                    stats["requests"] += 1
+                    stats["rows"] += count
+            # the overhead of routing, without the shards loaded on the way
+            self._route_seconds += time.perf_counter() - start - load_seconds
+            self._routed += 1
+
+        if len(routes) == 1:
+            return np.asarray(routes[0][0].predict(cleaned_data), dtype=np.float64)
+        predictions = np.empty(n_rows, dtype=np.float64)
+        for pipeline, rows in routes:
+            predictions[rows] = pipeline.predict(cleaned_data.iloc[rows])
+        return predictions
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"column": self.column,
+                    "max_loaded": self.max_loaded,
+                    "loaded": list(self._loaded),
+                    "failed": sorted(self.failed),
+                    "skipped": self.skipped,
+                    "fallback_rows": self.fallback_rows,
+                    "avg_route_us": round(self._route_seconds / self._routed * 1e6, 2) if self._routed else None,
+                    "shards": {value: dict(stats) for value, stats in self.stats_by_shard.items()}}
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+import logging
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("tiers")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+# the served model, the full stack
+FULL_TIER = 2
+
+
+class TierSelector:
+    """
+    Picks for each request the most complete model tier that answers
+    within its remaining time budget.
+
+    Tier 0 is LightGBM alone, tier 1 LightGBM with a subset of the forest,
+    both built offline by ``src/models/degraded_tiers.py``, and tier 2 is
+    the served stack. The time a tier takes starts from its offline single
+    row latency and follows the live predictions, the rest of a request,
+    cleaning and all, is followed apart. Every ``saturated_queue`` requests
+    waiting in the queue take one more tier off the top.
+    """
+
+    def __init__(self, manifest_path: Path, saturated_queue: int = 16, safety: float = 1.5):
+        manifest_path = Path(manifest_path)
+        with open(manifest_path) as f:
+            self.offline = json.load(f)["tiers"]
+        self.tier_files = {int(tier): manifest_path.parent / metrics["file"]
+                           for tier, metrics in self.offline.items() if "file" in metrics}
+        self.saturated_queue = saturated_queue
+        self.safety = safety
+        self._pipelines = {}
+        self._lock = threading.Lock()
+        self._service_ms = {int(tier): metrics["latency_ms"] for tier, metrics in self.offline.items()}
+        self._overhead_ms = 0.0
+        self.counts = {tier: 0 for tier in self._service_ms}
+
+    def load(self) -> None:
+        from sklearn.pipeline import Pipeline
+        from src.models.artifacts import load_artifact
+
+        for tier, path in self.tier_files.items():
+            start = time.perf_counter()
+            bundle = load_artifact(path)
+            self._pipelines[tier] = Pipeline(steps=[
+                ('preprocess', bundle["preprocessor"]),
+                ("regressor", bundle["model"])
+            ])
+            logger.info(f"Loaded tier {tier} in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+    def fastest_ms(self) -> float:
+        # the quickest a request can be answered, the fastest tier and the rest of the request
+        return self._overhead_ms + min(self._service_ms.values())
+
+    def choose(self, remaining_ms: float, queue_depth: int = 0) -> int:
+        # the highest tier allowed by the queue that fits in the budget, else the fastest
+        top = max(0, FULL_TIER - queue_depth // self.saturated_queue)
+        for tier in range(top, -1, -1):
+            if (tier == FULL_TIER or tier in self._pipelines) and \
+                    self._service_ms[tier] * self.safety <= remaining_ms:
+                return tier
+        return min(self._pipelines, default=FULL_TIER)
+
+    def pipeline(self, tier: int):
+        # the pipeline of a degraded tier, the full tier is the served model
+        return self._pipelines[tier]
+
+    def observe(self, tier: int, predict_ms: float, total_ms: float = None) -> None:
+        with self._lock:
+            self.counts[tier] += 1
+            self._service_ms[tier] = 0.9 * self._service_ms[tier] + 0.1 * predict_ms
+            if total_ms is not None:
+                self._overhead_ms = 0.9 * self._overhead_ms + 0.1 * (total_ms - predict_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"saturated_queue": self.saturated_queue,
+                    "safety": self.safety,
+                    "loaded": sorted(self._pipelines),
+                    "requests": {str(tier): count for tier, count in self.counts.items()},
+                    "service_ms": {str(tier): round(ms, 3) for tier, ms in self._service_ms.items()},
+                    "overhead_ms": round(self._overhead_ms, 3),
+                    "offline": self.offline}
@@ -0,0 +1,164 @@
+import json
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+import logging
+from pathlib import Path
+
+# create logger
+logger = logging.getLogger("request_tracing")
+logger.setLevel(logging.INFO)
+
+# console handler
+handler = logging.StreamHandler()
+handler.setLevel(logging.INFO)
+
+# add handler to logger
+logger.addHandler(handler)
+
+# create a fomratter
+formatter = logging.Formatter(fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# add formatter to handler
+handler.setFormatter(formatter)
+
+MAGIC = b"SWGTRACE"
+# magic, slot size, number of slots
+FILE_HEADER = struct.Struct("<8sII")
+# sequence number (0 marks an empty slot), timestamp, payload length
+SLOT_HEADER = struct.Struct("<QdI")
+
+
+def _json_default(obj):
+    # numpy scalars and timestamps in the cleaned row
+    if hasattr(obj, "item"):
+        return obj.item()
+    return str(obj)
+
+
+class TraceRingBuffer:
+    """
+    Fixed size file of ``n_slots`` slots mapped into memory. Record ``n``
+    goes to slot ``n % n_slots``, so the file keeps the latest records and
+    never grows. A slot's sequence number is written last, after its
+    payload, so a reader never takes a half written slot for a new one.
+    """
+
+    def __init__(self, path: Path, n_slots: int = 4096, slot_size: int = 4096):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = FILE_HEADER.size + n_slots * slot_size
+
+        # an existing ring with the same geometry is appended to
+        reuse = False
+        if self.path.exists() and self.path.stat().st_size == size:
+            with open(self.path, "rb") as f:
+                reuse = FILE_HEADER.unpack(f.read(FILE_HEADER.size)) == (MAGIC, slot_size, n_slots)
+        if not reuse:
+            with open(self.path, "wb") as f:
+                f.truncate(size)
+                f.write(FILE_HEADER.pack(MAGIC, slot_size, n_slots))
+
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+        self._seq = max((seq for seq, _, _ in self._slot_headers()), default=0)
+
+    def _slot_offset(self, slot: int) -> int:
+        return FILE_HEADER.size + slot * self.slot_size
+
+    def _slot_headers(self):
+        for slot in range(self.n_slots):
+            yield SLOT_HEADER.unpack_from(self._map, self._slot_offset(slot))
+
+    def write(self, payload: bytes) -> None:
+        max_payload = self.slot_size - SLOT_HEADER.size
+        if len(payload) > max_payload:
+            payload = payload[:max_payload]
+        with self._lock:
+            self._seq += 1
+            offset = self._slot_offset((self._seq - 1) % self.n_slots)
+            # invalidate, fill, then publish the sequence number
+            SLOT_HEADER.pack_into(self._map, offset, 0, 0.0, 0)
+            self._map[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + len(payload)] = payload
+            SLOT_HEADER.pack_into(self._map, offset, self._seq, time.time(), len(payload))
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        os.close(self._fd)
+
+
+def read_traces(path: Path) -> list:
+    """
+    Decode every filled slot of a ring file, oldest first. Records cut at
+    the slot size are returned with ``truncated`` set and the raw text.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, slot_size, n_slots = FILE_HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a trace ring buffer")
+
+    records = []
+    for slot in range(n_slots):
+        offset = FILE_HEADER.size + slot * slot_size
+        seq, timestamp, length = SLOT_HEADER.unpack_from(data, offset)
+        if seq == 0:
+            continue
+        raw = data[offset + SLOT_HEADER.size:offset + SLOT_HEADER.size + length]
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError:
+            record = {"truncated": True, "raw": raw.decode("utf-8", errors="replace")}
+        record["seq"] = seq
+        record["timestamp"] = timestamp
+        records.append(record)
+    return sorted(records, key=lambda record: record["seq"])
+
+
+class RequestTracer:
+    """
+    Keeps a trace of a request when it is sampled at ``sample_rate`` or
+    when it took at least ``latency_threshold_ms``. Unsampled fast requests
+    only pay for the timers and one comparison, nothing is serialised.
+    """
+
+    def __init__(self, path: Path, sample_rate: float = 0.01,
+                 latency_threshold_ms: float = None, n_slots: int = 4096,
+                 slot_size: int = 4096):
+        self.sample_rate = sample_rate
+        self.latency_threshold_ms = latency_threshold_ms
+        self.ring = TraceRingBuffer(path, n_slots=n_slots, slot_size=slot_size)
+        self.recorded = 0
+
+    def reason(self, total_ms: float):
+        # why a request is kept, None when it is not
+        if self.latency_threshold_ms is not None and total_ms >= self.latency_threshold_ms:
+            return "slow"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def record(self, reason: str, payload: dict, cleaned_data, timings_ms: dict,
+               model_version: str, prediction) -> None:
+        try:
+            features = cleaned_data.to_dict(orient="records")
+            record = {"reason": reason,
+                      "model_version": model_version,
+                      "prediction": prediction,
+                      "timings_ms": {name: round(ms, 3) for name, ms in timings_ms.items()},
+                      "payload": payload,
+                      "features": features[0] if len(features) == 1 else features}
+            self.ring.write(json.dumps(record, default=_json_default).encode())
+            self.recorded += 1
+        except Exception:
+            # tracing must never fail a request
+            logger.exception("Writing a request trace failed")
+
+    def close(self) -> None:
+        self.ring.close()
@@ -0,0 +1,80 @@
+from itertools import product
+
+# a request that survives the cleaning, used when no sample request is given
+DEFAULT_TEMPLATE = {
+    "ID": "0xwarmup",
+    "Delivery_person_ID": "BANGRES19DEL01",
+    "Delivery_person_Age": "29",
+    "Delivery_person_Ratings": "4.6",
+    "Restaurant_latitude": 12.914264,
+    "Restaurant_longitude": 77.6784,
+    "Delivery_location_latitude": 12.924264,
+    "Delivery_location_longitude": 77.6884,
+    "Order_Date": "19-03-2022",
+    "Time_Orderd": "19:45:00",
+    "Time_Order_picked": "19:55:00",
+    "Weatherconditions": "conditions Sunny",
+    "Road_traffic_density": "Jam ",
+    "Vehicle_condition": 2,
+    "Type_of_order": "Snack ",
+    "Type_of_vehicle": "motorcycle ",
+    "multiple_deliveries": "1",
+    "Festival": "No ",
+    "City": "Metropolitian "
+}
+
+# raw values in the format of the dataset, one per category after cleaning
+TRAFFIC = ["Low ", "Medium ", "High ", "Jam "]
+# km north of the restaurant, one per distance_type bin
+DISTANCE_KM = {"short": 2.0, "medium": 7.0, "long": 12.0, "very_long": 20.0}
+# order time, one per order_time_of_day bin
+ORDER_TIMES = {"after_midnight": "03:00:00", "morning": "09:30:00", "afternoon": "14:30:00",
+               "evening": "18:30:00", "night": "22:30:00"}
+
+# the remaining categorical columns are cycled through the grid
+WEATHER = ["conditions Sunny", "conditions Stormy", "conditions Sandstorms",
+           "conditions Cloudy", "conditions Fog", "conditions Windy"]
+ORDER_TYPES = ["Snack ", "Meal ", "Drinks ", "Buffet "]
+VEHICLES = ["motorcycle ", "scooter ", "electric_scooter ", "bicycle "]
+CITY_TYPES = ["Metropolitian ", "Urban ", "Semi-Urban "]
+FESTIVAL = ["No ", "Yes "]
+# a saturday and a wednesday for is_weekend
+ORDER_DATES = ["19-03-2022", "16-03-2022"]
+
+KM_PER_DEGREE_LATITUDE = 111.19
+
+
+def _add_minutes(clock: str, minutes: int) -> str:
+    hours, mins, secs = (int(part) for part in clock.split(":"))
+    total = (hours * 60 + mins + minutes) % (24 * 60)
+    return f"{total // 60:02d}:{total % 60:02d}:{secs:02d}"
+
+
+def coverage_payloads(template: dict = None) -> list:
+    """
+    One request per ``traffic`` x ``distance_type`` x ``order_time_of_day``
+    combination, built from ``template``, with the other categorical
+    columns cycled so that every encoder category shows up at least once.
+    """
+    template = template or DEFAULT_TEMPLATE
+    payloads = []
+    grid = product(TRAFFIC, DISTANCE_KM.items(), ORDER_TIMES.values())
+    for i, (traffic, (_, km), order_time) in enumerate(grid):
+        payload = dict(template)
+        payload.update({
+            "ID": f"{template['ID']}-{i}",
+            "Road_traffic_density": traffic,
+            "Delivery_location_latitude": template["Restaurant_latitude"] + km / KM_PER_DEGREE_LATITUDE,
+            "Delivery_location_longitude": template["Restaurant_longitude"],
+            "Time_Orderd": order_time,
+            "Time_Order_picked": _add_minutes(order_time, 10),
+            "Weatherconditions": WEATHER[i % len(WEATHER)],
+            "Type_of_order": ORDER_TYPES[i % len(ORDER_TYPES)],
+            "Type_of_vehicle": VEHICLES[i % len(VEHICLES)],
+            "City": CITY_TYPES[i % len(CITY_TYPES)],
+            "Festival": FESTIVAL[i % len(FESTIVAL)],
+            "Order_Date": ORDER_DATES[i % len(ORDER_DATES)],
+            "multiple_deliveries": str(i % 4)
+        })
+        payloads.append(payload)
+    return payloads
@@ -0,0 +1,31 @@
+import json
+import pytest
+import pandas as pd
+from sklearn.dummy import DummyRegressor
+from sklearn.preprocessing import FunctionTransformer
+from src.models.artifacts import save_artifact
+
+
+X = pd.DataFrame({"distance": [1.0, 2.0]})
+
+
+def make_constant_model(value: float) -> DummyRegressor:
+    return DummyRegressor(strategy="constant", constant=value).fit(X, [value, value])
+
+
+@pytest.fixture
+def constant_model():
+    return make_constant_model
+
+
+@pytest.fixture
+def save_bundles(tmp_path):
+    # constant model bundles with a pass through preprocessor next to their manifest
+    def save(constants: dict, manifest: dict):
+        for file_name, constant in constants.items():
+            save_artifact({"model": make_constant_model(constant), "preprocessor": FunctionTransformer()},
+                          tmp_path / file_name)
+        with open(tmp_path / "manifest.json", "w") as f:
+            json.dump(manifest, f)
+        return tmp_path / "manifest.json"
+    return save
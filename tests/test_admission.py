@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+import pytest
+from src.serving.admission import AdmissionController, DeadlineExceeded, Overloaded
+
+
+def test_full_queue_is_shed_and_expired_requests_are_not_run():
+    # a short estimated service time so the queue wait never refuses here
+    controller = AdmissionController(n_workers=1, max_queue=2, service_ms=1)
+    release = threading.Event()
+    calls = []
+
+    async def scenario():
+        far = time.monotonic() + 60
+        # one request holds the only worker, two wait behind it
+        blocked = asyncio.ensure_future(controller.run(release.wait, deadline=far))
+        await asyncio.sleep(0.05)
+        soon = asyncio.ensure_future(controller.run(calls.append, "soon", deadline=time.monotonic() + 0.05))
+        later = asyncio.ensure_future(controller.run(calls.append, "later", deadline=far))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as shed:
+            await controller.run(calls.append, "shed", deadline=far)
+        assert shed.value.reason == "queue_full" and shed.value.retry_after >= 1
+        await asyncio.sleep(0.1)
+        release.set()
+        await blocked
+        with pytest.raises(DeadlineExceeded):
+            await soon
+        await later
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        controller.shutdown()
+    assert calls == ["later"]
+    stats = controller.stats()
+    assert stats["shed"]["queue_full"] == 1 and stats["expired"] == 1
+    assert stats["queue_depth"] == 0 and sum(stats["queue_wait_ms"]["counts"]) == 3
+
+
+def test_deadline_shorter_than_the_queue_wait_is_refused():
+    controller = AdmissionController(n_workers=1, max_queue=8, service_ms=100)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(controller.run(release.wait, deadline=time.monotonic() + 60))
+        await asyncio.sleep(0.05)
+        with pytest.raises(Overloaded) as shed:
+            await controller.run(lambda: None, deadline=time.monotonic() + 0.01)
+        assert shed.value.reason == "deadline_too_short"
+        release.set()
+        await blocked
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        controller.shutdown()
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(n_workers=1, max_queue=1, service_ms=1)
+    release = threading.Event()
+
+    async def scenario():
+        far = time.monotonic() + 60
+        blocked = asyncio.ensure_future(controller.run(release.wait, deadline=far))
+        await asyncio.sleep(0.05)
+        # the caller gives up while its request still waits for the worker
+        waiting = asyncio.ensure_future(controller.run(lambda: None, deadline=far))
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+        waiting.cancel()
+        await asyncio.sleep(0.05)
+        assert controller.queue_depth == 0
+        release.set()
+        await blocked
+        # the freed slot takes a new request
+        await controller.run(lambda: None, deadline=far)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        controller.shutdown()
+    assert controller.stats()["cancelled"] == 1
+
+
+def test_failed_calls_are_not_counted_as_completed():
+    controller = AdmissionController(n_workers=1, max_queue=1, service_ms=1)
+
+    async def scenario():
+        with pytest.raises(ZeroDivisionError):
+            await controller.run(lambda: 1 / 0, deadline=time.monotonic() + 60)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        controller.shutdown()
+    stats = controller.stats()
+    assert stats["failed"] == 1 and stats["completed"] == 0 and stats["avg_service_ms"] == 1
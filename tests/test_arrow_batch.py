@@ -0,0 +1,62 @@
+import json
+import pytest
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from fastapi.exceptions import RequestValidationError
+from src.serving.arrow_batch import MAX_ERRORS_PER_COLUMN, ORDER_SCHEMA, read_table, table_to_frame, validate_table, write_predictions
+from src.serving.fast_decode import RequestDecoder, to_frame
+from src.serving.schema import Data
+
+order = {"ID": "0x4607", "Delivery_person_ID": "INDORES13DEL02", "Delivery_person_Age": "37",
+         "Delivery_person_Ratings": "4.9", "Restaurant_latitude": 22.745049,
+         "Restaurant_longitude": 75.892471, "Delivery_location_latitude": 22.765049,
+         "Delivery_location_longitude": 75.912471, "Order_Date": "19-03-2022",
+         "Time_Orderd": "11:30:00", "Time_Order_picked": "11:45:00",
+         "Weatherconditions": "conditions Sunny", "Road_traffic_density": "High ",
+         "Vehicle_condition": 2, "Type_of_order": "Snack ", "Type_of_vehicle": "motorcycle ",
+         "multiple_deliveries": "0", "Festival": "No ", "City": "Urban "}
+
+
+def ipc_bytes(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_frame_matches_json_batch():
+    orders = [order, {**order, "ID": "0x2", "Vehicle_condition": 0}]
+    table = validate_table(read_table(ipc_bytes(pa.Table.from_pylist(orders))))
+    decoded = RequestDecoder(Data).decode_batch(json.dumps(orders).encode())
+    pd.testing.assert_frame_equal(table_to_frame(table), to_frame(decoded))
+
+
+@pytest.mark.parametrize(argnames='table, loc',
+                         argvalues=[(pa.Table.from_pylist([order, {**order, "Restaurant_latitude": 40.0}]),
+                                     ("body", 1, "Restaurant_latitude")),
+                                    (pa.Table.from_pylist([order]).drop_columns(["City"]), ("body", "City")),
+                                    (pa.Table.from_pylist([order, {**order, "ID": None}], schema=ORDER_SCHEMA),
+                                     ("body", 1, "ID"))],
+                         ids=['out_of_india', 'missing_column', 'null_value'])
+def test_invalid_tables(table, loc):
+    with pytest.raises(RequestValidationError) as e:
+        validate_table(table)
+    assert [error["loc"] for error in e.value.errors()] == [loc]
+
+
+def test_predictions_keep_dropped_rows_as_null():
+    predictions = np.array([31.5, np.nan, 24.25])
+    result = read_table(write_predictions(predictions, np.array([3.1, np.nan, 7.0])))
+    assert result.column_names == ["prediction", "distance"]
+    assert result.column("prediction").to_pylist() == [31.5, None, 24.25]
+
+
+def test_row_errors_are_capped_per_column():
+    orders = [order] + [{**order, "Restaurant_latitude": 40.0}] * (MAX_ERRORS_PER_COLUMN + 20)
+    with pytest.raises(RequestValidationError) as e:
+        validate_table(pa.Table.from_pylist(orders))
+    errors = e.value.errors()
+    assert len(errors) == MAX_ERRORS_PER_COLUMN + 1
+    assert errors[0]["loc"] == ("body", "Restaurant_latitude")
+    assert errors[0]["ctx"]["count"] == MAX_ERRORS_PER_COLUMN + 20
@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn import config_context
+from src.features.compiled_preprocessor import CompiledPreprocessor, CompiledPipeline
+
+preprocessor = joblib.load('models/preprocessor.joblib')
+compiled = CompiledPreprocessor(preprocessor)
+
+# cleaned test split with its missing values kept
+test_data = pd.read_csv('data/interim/test.csv').drop(columns=['time_taken'])
+
+
+@pytest.fixture(autouse=True)
+def default_transform_output():
+    # other test modules set pandas output globally when imported, the results must not depend on the order
+    with config_context(transform_output="default"):
+        yield
+
+
+def expected_transform(data: pd.DataFrame) -> np.ndarray:
+    return np.asarray(preprocessor.transform(data), dtype=np.float64)
+
+
+def unknown_rows() -> pd.DataFrame:
+    data = test_data.dropna().head(5).copy()
+    data['weather'] = 'hail'
+    data['traffic'] = 'gridlock'
+    data.loc[data.index[0], 'distance_type'] = np.nan
+    return data
+
+
+@pytest.mark.parametrize(argnames='data',
+                         argvalues=[test_data, test_data.dropna().head(1), unknown_rows()],
+                         ids=['test_split', 'single_row', 'unknown_and_missing'])
+# the reference transform warns about the unknown categories the compiled one ignores
+@pytest.mark.filterwarnings("ignore:Found unknown categories:UserWarning")
+def test_compiled_matches_column_transformer(data):
+    out = np.empty((len(data), compiled.n_features_out), dtype=np.float32)
+    result = compiled.transform(data, out=out)
+
+    assert result is out
+    assert compiled.feature_names_out == list(preprocessor.get_feature_names_out())
+    np.testing.assert_allclose(result, expected_transform(data), rtol=1e-6, atol=1e-6)
+
+
+def test_compiled_pipeline_predictions():
+    model = joblib.load('models/model.joblib')
+    data = test_data.dropna()
+    # the model sees the feature names it was fitted with
+    features = pd.DataFrame(preprocessor.transform(data), columns=preprocessor.get_feature_names_out())
+
+    np.testing.assert_allclose(CompiledPipeline(preprocessor, model).predict(data),
+                               model.predict(features), atol=1e-6)
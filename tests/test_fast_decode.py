@@ -0,0 +1,88 @@
+import asyncio
+import json
+import pytest
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from src.serving.fast_decode import LineTooLong, RequestDecoder, iter_lines, to_frame
+from src.serving.schema import Data
+
+decoder = RequestDecoder(Data)
+
+order = {"ID": "0x4607", "Delivery_person_ID": "INDORES13DEL02", "Delivery_person_Age": "37",
+         "Delivery_person_Ratings": "4.9", "Restaurant_latitude": 22.745049,
+         "Restaurant_longitude": 75.892471, "Delivery_location_latitude": 22.765049,
+         "Delivery_location_longitude": 75.912471, "Order_Date": "19-03-2022",
+         "Time_Orderd": "11:30:00", "Time_Order_picked": "11:45:00",
+         "Weatherconditions": "conditions Sunny", "Road_traffic_density": "High ",
+         "Vehicle_condition": 2, "Type_of_order": "Snack ", "Type_of_vehicle": "motorcycle ",
+         "multiple_deliveries": "0", "Festival": "No ", "City": "Urban "}
+
+
+def pydantic_errors(payload) -> list:
+    # the 422 detail FastAPI returns for the same body on /predict
+    with pytest.raises(ValidationError) as e:
+        TypeAdapter(Data).validate_python(payload)
+    return jsonable_encoder([{**error, "loc": ("body", *error["loc"])}
+                             for error in e.value.errors(include_url=False)])
+
+
+@pytest.mark.parametrize(argnames='changes',
+                         argvalues=[{}, {"Vehicle_condition": "2"}, {"Restaurant_latitude": "22.7"}],
+                         ids=['exact_types', 'coerced_int', 'coerced_float'])
+def test_decode_matches_pydantic(changes):
+    payload = {**order, **changes}
+    decoded = decoder.decode(json.dumps(payload).encode())
+    expected = pd.DataFrame(Data(**payload).model_dump(), index=[0])
+    pd.testing.assert_frame_equal(to_frame([decoded]), expected)
+
+
+@pytest.mark.parametrize(argnames='changes',
+                         argvalues=[{"Restaurant_latitude": 40.0}, {"Delivery_location_longitude": 12},
+                                    {"ID": 5}, {"Vehicle_condition": "good"}],
+                         ids=['latitude', 'longitude', 'wrong_type', 'not_an_int'])
+def test_errors_match_pydantic(changes):
+    payload = {**order, **changes}
+    with pytest.raises(RequestValidationError) as e:
+        decoder.decode(json.dumps(payload).encode())
+    assert jsonable_encoder(e.value.errors()) == pydantic_errors(payload)
+
+
+def test_batch_errors_carry_the_row():
+    payload = [order, {**order, "Restaurant_latitude": 3.0}]
+    with pytest.raises(RequestValidationError) as e:
+        decoder.decode_batch(json.dumps(payload).encode())
+    error, = e.value.errors()
+    assert error["loc"] == ("body", 1, "Restaurant_latitude")
+    assert error["msg"] == "Value error, Latitude must be between 8.0 and 37.0 for India (got 3.0)"
+
+
+def test_iter_lines_across_chunks():
+    body = (json.dumps(order) + "\n\n" + json.dumps({**order, "ID": "0x2"})).encode()
+
+    async def chunks():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    async def collect():
+        return [decoder.decode(line) async for line in iter_lines(chunks())]
+
+    orders = asyncio.run(collect())
+    assert [decoded.ID for decoded in orders] == ["0x4607", "0x2"]
+
+
+def test_iter_lines_refuses_a_line_over_the_limit():
+    async def chunks():
+        yield json.dumps(order).encode() + b"\n"
+        for _ in range(100):
+            yield b"x" * 100
+
+    async def collect(lines):
+        async for line in iter_lines(chunks(), max_line_bytes=2000):
+            lines.append(line)
+
+    lines = []
+    with pytest.raises(LineTooLong):
+        asyncio.run(collect(lines))
+    assert len(lines) == 1
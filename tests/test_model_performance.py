@@ -1,15 +1,13 @@
 import pytest
-import mlflow
-from mlflow.tracking import MlflowClient
 import json
 from sklearn.pipeline import Pipeline
 import joblib
 import pandas as pd
 from sklearn.metrics import mean_absolute_error,r2_score
-import dagshub
+from src.models.registry import get_registry
 
-dagshub.init(repo_owner='speedyskill', repo_name='swiggy-delivery-time-prediction', mlflow=True)
-mlflow.set_tracking_uri('https://dagshub.com/speedyskill/swiggy-delivery-time-prediction.mlflow')
+# registry selected by MODEL_REGISTRY_BACKEND
+registry = get_registry()
 
 def load_model_info(path):
     with open(path) as f:
@@ -24,9 +22,9 @@ def load_transformer(path):
 model_name = load_model_info('run_information.json')['model_name']
 stage = 'Staging'
 
-model_uri = f'models:/{model_name}/{stage}'
+model_version = registry.get_latest_version(model_name=model_name,stage=stage)
 
-model = mlflow.sklearn.load_model(model_uri)
+model = registry.load_model(model_name=model_name,version=model_version)
 
 transformer = load_transformer('models/preprocessor.joblib')
 
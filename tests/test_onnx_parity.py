@@ -0,0 +1,31 @@
+import pytest
+import numpy as np
+import pandas as pd
+import joblib
+from pathlib import Path
+from sklearn.pipeline import Pipeline
+
+# the onnx backend is optional
+pytest.importorskip("onnxruntime")
+
+from src.serving.onnx_backend import OnnxPipeline
+
+onnx_path = Path('models/model.onnx')
+test_data_path = 'data/interim/test.csv'
+
+
+@pytest.mark.skipif(not onnx_path.exists(), reason="run the export_onnx stage first")
+def test_onnx_matches_sklearn_pipeline():
+    model_pipe = Pipeline(steps=[
+        ('preprocessor', joblib.load('models/preprocessor.joblib')),
+        ('regressor', joblib.load('models/model.joblib'))
+    ])
+    X = pd.read_csv(test_data_path).dropna().drop(columns=['time_taken'])
+
+    expected = model_pipe.predict(X)
+    actual = OnnxPipeline(onnx_path).predict(X)
+    difference = np.abs(actual - expected)
+
+    # float32 tree thresholds move a few predictions by a fraction of a minute
+    assert difference.max() < 0.1, f"max abs difference {difference.max():.4f} is over 0.1"
+    assert difference.mean() < 0.01, f"mean abs difference {difference.mean():.4f} is over 0.01"
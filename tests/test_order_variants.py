@@ -0,0 +1,83 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.benchmark_eta_matrix import ORDER, serving_cleaning
+from src.serving.order_variants import (clean_order, eta_matrix, haversine_matrix, rider_etas, what_if_grid,
+                                          with_riders)
+
+RESTAURANTS = np.array([[18.52, 73.85], [18.60, 73.80], [18.47, 73.95]])
+DELIVERIES = np.array([[18.56, 73.90], [18.53, 73.86], [18.64, 73.97], [18.50, 73.77]])
+CANDIDATES = pd.DataFrame({"Delivery_person_ID": ["PUNERES01DEL01", "PUNERES02DEL02", "PUNERES03DEL03",
+                                                  "PUNERES04DEL04", "PUNERES05DEL05"],
+                           "Delivery_person_Age": ["34", "16", "22", "NaN ", "29"],
+                           "Delivery_person_Ratings": ["4.9", "4.5", "6", "4.1", "NaN "],
+                           "Type_of_vehicle": ["scooter ", "motorcycle ", "motorcycle ", "electric_scooter ",
+                                               "bicycle "],
+                           "Vehicle_condition": [0, 1, 2, 1, 3],
+                           "Time_Order_picked": ["19:05:00", "19:15:00", "19:10:00", "19:25:00", "19:00:00"]})
+
+
+def stub_predict(cleaned: pd.DataFrame) -> np.ndarray:
+    # depends on the distance and on its type like the model does
+    return cleaned["distance"].to_numpy() * 2 + cleaned["distance_type"].cat.codes.to_numpy()
+
+
+def per_pair(column: str) -> np.ndarray:
+    raw = pd.DataFrame([{**ORDER, "Restaurant_latitude": r[0], "Restaurant_longitude": r[1],
+                         "Delivery_location_latitude": d[0], "Delivery_location_longitude": d[1]}
+                        for r in RESTAURANTS for d in DELIVERIES])
+    cleaned = serving_cleaning(raw)
+    values = stub_predict(cleaned) if column == "prediction" else cleaned[column].to_numpy()
+    return np.asarray(values, dtype=np.float64).reshape(len(RESTAURANTS), len(DELIVERIES))
+
+
+def test_haversine_matrix_matches_the_cleaning():
+    np.testing.assert_allclose(haversine_matrix(RESTAURANTS, DELIVERIES), per_pair("distance"))
+
+
+def test_exact_matrix_matches_one_row_per_pair():
+    cleaned = clean_order(ORDER, serving_cleaning)
+    matrix = eta_matrix(cleaned, RESTAURANTS, DELIVERIES, stub_predict, resolution_km=0, chunk_rows=5)
+    np.testing.assert_allclose(matrix, per_pair("prediction"))
+
+
+def test_rounded_matrix_stays_within_the_resolution():
+    cleaned = clean_order(ORDER, serving_cleaning)
+    matrix = eta_matrix(cleaned, RESTAURANTS, DELIVERIES, stub_predict, resolution_km=0.01)
+    # the distance type does not change between these pairs, only the rounding shows
+    assert np.abs(matrix - per_pair("prediction")).max() <= 0.01
+
+
+def test_minor_rider_is_rejected():
+    with pytest.raises(ValueError):
+        clean_order({**ORDER, "Delivery_person_Age": "15"}, serving_cleaning)
+
+
+def test_rider_columns_match_one_cleaned_row_per_rider():
+    riders = CANDIDATES.iloc[[0, 3, 4]].reset_index(drop=True)
+    expected = serving_cleaning(pd.DataFrame([{**ORDER, **rider} for rider in riders.to_dict("records")]))
+    cleaned = clean_order({**ORDER, **riders.iloc[0].to_dict()}, serving_cleaning)
+    pd.testing.assert_frame_equal(with_riders(cleaned, ORDER["Time_Orderd"], riders),
+                                  expected.reset_index(drop=True))
+
+
+def test_minor_and_six_star_riders_get_no_eta():
+    etas = rider_etas(ORDER, CANDIDATES, serving_cleaning, stub_predict)
+    assert np.isnan(etas).tolist() == [False, True, True, False, False]
+    all_excluded = rider_etas(ORDER, CANDIDATES.iloc[[1, 2]], serving_cleaning, stub_predict)
+    assert np.isnan(all_excluded).all()
+
+
+def test_what_if_grid_matches_one_cleaned_row_per_variant():
+    axes = {"pickup_delay_minutes": [0, 15, -20], "Road_traffic_density": ["Low ", "Jam "],
+            "Weatherconditions": ["conditions Fog", "conditions Sunny"], "order_hour": [0, 8, 23]}
+    rows = []
+    for delay, traffic, weather, hour in itertools.product(*axes.values()):
+        ordered = pd.Timestamp(f"2022-03-12 {hour:02d}:00:00")
+        picked = ordered + pd.Timedelta(minutes=10 + delay)
+        rows.append({**ORDER, "Road_traffic_density": traffic, "Weatherconditions": weather,
+                     "Time_Orderd": f"{hour:02d}:00:00", "Time_Order_picked": picked.strftime("%H:%M:%S")})
+    expected = serving_cleaning(pd.DataFrame(rows))
+    grid = what_if_grid(clean_order(ORDER, serving_cleaning), axes)
+    pd.testing.assert_frame_equal(grid, expected.reset_index(drop=True))
@@ -0,0 +1,41 @@
+from src.pipeline_runner import PipelineRunner, Stage, with_overrides
+
+params = {"Prepare": {"size": 1}, "Train": {"alpha": 0.5}}
+
+
+def make_stages(calls: list) -> list:
+    def stage(name):
+        def func(inputs, params):
+            calls.append(name)
+            return (name, sorted(inputs.values()))
+        return func
+
+    return [
+        Stage("prepare", stage("prepare"), params=["Prepare.size"]),
+        Stage("train", stage("train"), inputs=["prepare"], params=["Train"], keep=1),
+        Stage("evaluate", stage("evaluate"), inputs=["prepare", "train"]),
+    ]
+
+
+def test_unchanged_stages_come_from_the_cache():
+    calls = []
+    runner = PipelineRunner(stages=make_stages(calls))
+
+    runner.run(params)
+    _, records = runner.run(with_overrides(params, {"Train.alpha": 1.0}))
+
+    # only train and the stage that reads it run again
+    assert calls == ["prepare", "train", "evaluate", "train", "evaluate"]
+    assert [record["cached"] for record in records] == [True, False, False]
+
+
+def test_changed_upstream_params_rerun_downstream_stages():
+    calls = []
+    runner = PipelineRunner(stages=make_stages(calls))
+
+    runner.run(params, targets=["train"])
+    runner.run(with_overrides(params, {"Prepare.size": 2}), targets=["train"])
+    # keep=1 dropped the first train output, so it is fitted again
+    runner.run(params, targets=["train"])
+
+    assert calls == ["prepare", "train", "prepare", "train", "train"]
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from src.features.rider_features import clean_with_rider_id, compute_rider_stats
+from src.features.rider_store import FEATURES, RiderFeatureStore, RiderFeatureTable
+
+raw_data = pd.read_csv('data/raw/swiggy.csv')
+
+
+def build_table(data: pd.DataFrame) -> RiderFeatureTable:
+    return RiderFeatureTable(*compute_rider_stats(clean_with_rider_id(data)))
+
+
+def test_incremental_update_matches_full_build():
+    half = len(raw_data) // 2
+    full = build_table(raw_data)
+    incremental = build_table(raw_data.iloc[:half]).update(
+        *compute_rider_stats(clean_with_rider_id(raw_data.iloc[half:])))
+
+    # same riders, possibly in another row order
+    order = np.argsort(incremental.rider_ids)
+    assert list(incremental.rider_ids[order]) == list(full.rider_ids)
+    np.testing.assert_allclose(incremental.features[1:][order], full.features[1:], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(incremental.features[0], full.features[0], rtol=1e-5, atol=1e-6)
+    assert incremental.version == 2
+
+
+def test_store_lookup_and_default_row(tmp_path):
+    table = build_table(raw_data)
+    table_path = tmp_path / "rider_features.bundle"
+    table.save(table_path)
+    store = RiderFeatureStore(table_path)
+
+    rider_id = table.rider_ids[0]
+    row, known = store.lookup(f" {rider_id.lower()} ")
+    assert known
+    np.testing.assert_array_equal(row, table.features[1])
+
+    row, known = store.lookup("UNKNOWNRES00DEL00")
+    assert not known
+    np.testing.assert_array_equal(row, table.features[0])
+    assert row[FEATURES.index("rider_orders")] == 0
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from src.serving.shard_router import ShardRouter
+
+# one constant shard per city type
+CONSTANTS = {"urban": 10.0, "semi-urban": 20.0, "metropolitian": 30.0}
+
+
+def make_router(save_bundles, max_loaded: int, metrics: dict = None) -> ShardRouter:
+    shards = {value: {"file": f"{value}.bundle", **(metrics or {}).get(value, {})} for value in CONSTANTS}
+    manifest_path = save_bundles({f"{value}.bundle": constant for value, constant in CONSTANTS.items()},
+                                 {"column": "city_type", "shards": shards})
+    return ShardRouter(manifest_path, max_loaded=max_loaded)
+
+
+def test_rows_go_to_their_shard(save_bundles, constant_model):
+    router = make_router(save_bundles, max_loaded=3)
+    cleaned = pd.DataFrame({"distance": [1.0, 2.0, 3.0, 4.0, 5.0],
+                            "city_type": ["urban", "metropolitian", np.nan, "urban", "unknown"]})
+    # the global model predicts 0
+    predictions = router.predict(cleaned, fallback=constant_model(0.0))
+    np.testing.assert_array_equal(predictions, [10.0, 30.0, 0.0, 10.0, 0.0])
+    assert router.stats()["fallback_rows"] == 2
+
+
+def test_least_recently_used_shard_is_evicted(save_bundles):
+    router = make_router(save_bundles, max_loaded=2)
+    for value in ["urban", "semi-urban", "urban", "metropolitian"]:
+        router.predict(pd.DataFrame({"distance": [1.0], "city_type": [value]}), fallback=None)
+    stats = router.stats()
+    assert stats["loaded"] == ["urban", "metropolitian"]
+    assert stats["shards"]["semi-urban"]["evictions"] == 1
+    assert stats["shards"]["urban"]["loads"] == 1
+
+
+def test_shard_worse_than_the_global_model_is_not_routed(save_bundles, constant_model):
+    router = make_router(save_bundles, max_loaded=3,
+                         # the test error only reports, the cross validated one decides
+                         metrics={"urban": {"cv_shard_mae": 3.39, "cv_global_mae": 3.41,
+                                            "shard_mae": 3.52, "global_mae": 3.41},
+                                  "metropolitian": {"cv_shard_mae": 3.63, "cv_global_mae": 3.52,
+                                                    "shard_mae": 3.41, "global_mae": 3.52}})
+    cleaned = pd.DataFrame({"distance": [1.0, 2.0], "city_type": ["urban", "metropolitian"]})
+    predictions = router.predict(cleaned, fallback=constant_model(0.0))
+    np.testing.assert_array_equal(predictions, [10.0, 0.0])
+    assert router.stats()["skipped"] == ["metropolitian"]
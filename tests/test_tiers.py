@@ -0,0 +1,37 @@
+import pytest
+import pandas as pd
+from src.serving.tiers import FULL_TIER, TierSelector
+
+
+@pytest.fixture
+def selector(save_bundles) -> TierSelector:
+    # constant degraded tiers, 1 ms and 5 ms, the full stack takes 20 ms
+    tiers = {"0": {"file": "tier_0.bundle", "latency_ms": 1.0, "test_mae": 3.6},
+             "1": {"file": "tier_1.bundle", "latency_ms": 5.0, "test_mae": 3.6},
+             "2": {"latency_ms": 20.0, "test_mae": 3.5}}
+    manifest_path = save_bundles({"tier_0.bundle": 0.0, "tier_1.bundle": 1.0}, {"tiers": tiers})
+    selector = TierSelector(manifest_path, saturated_queue=4, safety=1.0)
+    selector.load()
+    return selector
+
+
+def test_tier_follows_the_remaining_budget(selector):
+    assert selector.choose(remaining_ms=100) == FULL_TIER
+    assert selector.choose(remaining_ms=10) == 1
+    assert selector.choose(remaining_ms=2) == 0
+    # nothing fits, the fastest tier still answers
+    assert selector.choose(remaining_ms=0.5) == 0
+    assert selector.pipeline(1).predict(pd.DataFrame({"distance": [1.0]}))[0] == 1.0
+
+
+def test_full_queue_takes_tiers_off_the_top(selector):
+    assert selector.choose(remaining_ms=100, queue_depth=3) == FULL_TIER
+    assert selector.choose(remaining_ms=100, queue_depth=4) == 1
+    assert selector.choose(remaining_ms=100, queue_depth=9) == 0
+
+
+def test_live_latency_updates_the_choice(selector):
+    for _ in range(30):
+        selector.observe(FULL_TIER, 200.0)
+    assert selector.choose(remaining_ms=100) == 1
+    assert selector.stats()["requests"][str(FULL_TIER)] == 30